@@ -0,0 +1,101 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+
+class TTLCache:
+    """
+    Cache en memoria (por proceso) LRU con expiración por entrada.
+
+    - get/set/pop son O(1) y seguros entre hilos
+    - stamp(): se toma antes de leer de la BD y se pasa a set(); si hubo
+      una invalidación entretanto, el valor (posiblemente viejo) no se guarda.
+      Es un contador por cache, no por clave: un pop() o clear() de cualquier
+      clave descarta todos los llenados en curso de esa cache (el próximo get
+      vuelve a leer de la BD). Un stamp solo vale para la cache que lo dio.
+    - on_evict(key, value): se llama (fuera del lock) por cada entrada que sale
+      del cache: expiración, desalojo LRU, reemplazo, pop() o clear()
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_evict: Optional[Callable[[Hashable, Any], None]] = None
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._invalidations = 0
+
+    def _evicted(self, items: List[tuple]) -> None:
+        if self.on_evict is not None:
+            for key, value in items:
+                self.on_evict(key, value)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+
+            value, expires_at = item
+            if expires_at >= time.monotonic():
+                self._data.move_to_end(key)
+                return value
+
+            del self._data[key]
+
+        self._evicted([(key, value)])
+        return default
+
+    def stamp(self) -> int:
+        """Marca de invalidaciones para usar en set(stamp=...)"""
+        return self._invalidations
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None, stamp: Optional[int] = None) -> bool:
+        """Guarda el valor; False si no se guardó (cache desactivado o stamp viejo)"""
+        if self.maxsize <= 0:
+            return False
+
+        evicted = []
+        with self._lock:
+            if stamp is not None and stamp != self._invalidations:
+                return False
+
+            previous = self._data.get(key)
+            if previous is not None and previous[0] is not value:
+                evicted.append((key, previous[0]))
+
+            self._data[key] = (value, time.monotonic() + (self.ttl if ttl is None else ttl))
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                old_key, (old_value, _) = self._data.popitem(last=False)
+                evicted.append((old_key, old_value))
+
+        self._evicted(evicted)
+        return True
+
+    def pop(self, key: Hashable) -> Any:
+        """Invalida una entrada"""
+        with self._lock:
+            self._invalidations += 1
+            item = self._data.pop(key, None)
+        if item is None:
+            return None
+        self._evicted([(key, item[0])])
+        return item[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._invalidations += 1
+            evicted = [(key, value) for key, (value, _) in self._data.items()]
+            self._data.clear()
+        self._evicted(evicted)
+
+    def __len__(self) -> int:
+        return len(self._data)
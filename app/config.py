@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -9,10 +9,73 @@ class Settings(BaseSettings):
     """    
     # Base de datos
     DATABASE_URL: str
+    # Pool de conexiones (valores por proceso/worker: total = workers * (size + overflow))
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30  # segundos esperando una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos; -1 para no reciclar
+    DB_POOL_PRE_PING: bool = True
+    # Token para los endpoints /internal (si no se define, quedan deshabilitados)
+    INTERNAL_API_TOKEN: Optional[str] = None
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 días por defecto
+    # Tokens stateless: el JWT lleva role/creator_type/username y la versión del token,
+    # get_current_user no consulta la tabla users mientras la versión esté vigente.
+    # Otros workers pueden aceptar un token revocado hasta TOKEN_VERSION_CACHE_TTL_SECONDS.
+    AUTH_STATELESS_TOKENS: bool = False
+    TOKEN_VERSION_CACHE_TTL_SECONDS: int = 30
+    # Hashing de contraseñas (bcrypt) en un pool de procesos por worker
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32  # pedidos en espera antes de responder 503
+    # Costo de bcrypt. Si se define BCRYPT_TARGET_MS, al iniciar se calibra el costo
+    # para que un hash tarde como máximo ese tiempo en este host. Los hashes con menor
+    # costo se regeneran en el próximo login exitoso (nunca se baja el costo).
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_MS: Optional[int] = None
+    # Cache del usuario autenticado (por proceso)
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    # Importación masiva de eventos: máximo de filas por request
+    EVENT_IMPORT_MAX_ROWS: int = 5000
+    # Cache de respuestas de GET /events/{id} (por proceso)
+    EVENT_CACHE_SIZE: int = 10000
+    EVENT_CACHE_TTL_SECONDS: int = 30
+    # Leer eventos de la tabla events_with_location_mat (migración 005) en vez de la vista.
+    # Se mantiene al crear/editar eventos; python -m app.jobs.refresh_events_mat la recalcula.
+    EVENTS_MATERIALIZED: bool = False
+    # Eventos recurrentes: cache de ocurrencias por evento y máximo por serie y ventana
+    RECURRENCE_CACHE_SIZE: int = 1000
+    RECURRENCE_CACHE_TTL_SECONDS: int = 300
+    RECURRENCE_MAX_OCCURRENCES: int = 1000
+    # Feed de eventos por categorías favoritas: próximos eventos precalculados por usuario.
+    # Cada feed guarda solo claves (start_time, id); los datos de los eventos están una vez
+    # por proceso (FEED_EVENT_CACHE_SIZE). Crear/editar/borrar actualiza solo las caches del
+    # proceso que atendió el request: en los otros workers un feed puede mostrar un evento
+    # editado o borrado hasta FEED_CACHE_TTL_SECONDS.
+    FEED_SIZE: int = 100
+    FEED_CACHE_SIZE: int = 10000
+    FEED_CACHE_TTL_SECONDS: int = 300
+    FEED_EVENT_CACHE_SIZE: int = 20000
+    # Categorías favoritas activas por usuario (por proceso)
+    FAVORITES_CACHE_SIZE: int = 10000
+    FAVORITES_CACHE_TTL_SECONDS: int = 300
+    # Métricas por ruta (latencia, status, consultas a la BD) en /internal/metrics
+    METRICS_ENABLED: bool = True
+    # Presupuesto de consultas por request (requiere METRICS_ENABLED): se registra un warning
+    # al superarlo. QUERY_BUDGETS='{"GET /events/{event_id}": 3}'; el resto usa QUERY_BUDGET_DEFAULT.
+    QUERY_BUDGET_DEFAULT: Optional[int] = None
+    QUERY_BUDGETS: Dict[str, int] = {}
+    # Misma sentencia repetida en un request a partir de estas veces: posible N+1 (0 = no detectar)
+    N_PLUS_ONE_THRESHOLD: int = 5
+    # Perfilado por request (app/monitoring/profiling.py): con X-Profile: 1 + X-Internal-Token,
+    # o al azar con PROFILING_SAMPLE_RATE (0 a 1). Guarda .prof y .folded en PROFILING_DIR.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_DIR: str = "profiles"
+    PROFILING_INTERVAL_MS: float = 1.0  # intervalo del muestreo de pilas
+    PROFILING_MAX_FILES: int = 100  # perfiles guardados (se borran los más viejos)
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, exists, func, literal, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Assist, EventStats
+from app.schemas import AssistStatus
+
+
+class EventNotFound(Exception):
+    """El evento no existe (violación de la FK assist.event_id -> events.id)"""
+
+
+# FK assist.event_id -> events.id (nombre que le da PostgreSQL) y SQLSTATE foreign_key_violation
+_EVENT_FK_CONSTRAINT = "assist_event_id_fkey"
+_FOREIGN_KEY_VIOLATION = "23503"
+
+
+def _is_missing_event(error: IntegrityError) -> bool:
+    """
+    True solo si el error es la FK de assist.event_id. Las demás violaciones
+    (FK de user_id, FK de event_stats, assist_status_check) no son un 404.
+    La excepción de asyncpg queda como causa del error del adaptador (error.orig).
+    """
+    cause = getattr(error.orig, "__cause__", None)
+    return (
+        getattr(cause, "sqlstate", None) == _FOREIGN_KEY_VIOLATION
+        and getattr(cause, "constraint_name", None) == _EVENT_FK_CONSTRAINT
+    )
+
+
+_MARK_COLUMNS = ("id", "user_id", "event_id", "status", "created_at")
+
+
+def _toggle_statement(user_id: UUID, event_id: UUID, status: str):
+    """
+    Un solo statement (CTEs con DELETE/INSERT ... RETURNING):
+    
+    1. deleted:  borra la marca si existe
+    2. inserted: si no se borró nada, la crea (ON CONFLICT DO NOTHING por unique_user_event_status)
+    3. counter:  aplica +1/-1 a event_stats en la misma sentencia
+    
+    Devuelve la fila borrada ('removed') o la creada ('added'); ninguna fila
+    significa que otro request concurrente ya creó la marca.
+    """
+    deleted = (
+        delete(Assist)
+        .where(
+            Assist.user_id == user_id,
+            Assist.event_id == event_id,
+            Assist.status == status
+        )
+        .returning(*[getattr(Assist, column) for column in _MARK_COLUMNS])
+        .cte("deleted")
+    )
+    
+    new_mark = select(
+        literal(uuid4(), Assist.id.type),
+        literal(user_id, Assist.user_id.type),
+        literal(event_id, Assist.event_id.type),
+        literal(status, Assist.status.type),
+        literal(datetime.utcnow(), Assist.created_at.type),
+    ).where(~exists(select(deleted.c.id)))
+    
+    inserted = (
+        pg_insert(Assist)
+        .from_select(list(_MARK_COLUMNS), new_mark)
+        .on_conflict_do_nothing(constraint="unique_user_event_status")
+        .returning(*[getattr(Assist, column) for column in _MARK_COLUMNS])
+        .cte("inserted")
+    )
+    
+    # Contador: +1 si se insertó, -1 si se borró, 0 si hubo conflicto
+    delta = (
+        select(func.count()).select_from(inserted).scalar_subquery()
+        - select(func.count()).select_from(deleted).scalar_subquery()
+    )
+    counter_column = "total_assists" if status == AssistStatus.ASSIST.value else "total_likes"
+    other_column = "total_likes" if counter_column == "total_assists" else "total_assists"
+    
+    counter = (
+        pg_insert(EventStats)
+        .from_select(
+            ["event_id", counter_column, other_column],
+            select(literal(event_id, EventStats.event_id.type), func.greatest(delta, 0), literal(0))
+        )
+        .on_conflict_do_update(
+            index_elements=[EventStats.event_id],
+            set_={counter_column: getattr(EventStats, counter_column) + delta}
+        )
+        .cte("counter")
+    )
+    
+    return union_all(
+        select(literal("removed").label("action"), *[deleted.c[column] for column in _MARK_COLUMNS]),
+        select(literal("added").label("action"), *[inserted.c[column] for column in _MARK_COLUMNS]),
+    ).add_cte(counter)
+
+
+async def toggle_mark(db: AsyncSession, user_id: UUID, event_id: UUID, status: str) -> Tuple[str, Optional[dict]]:
+    """
+    Marca o desmarca un evento en un solo round-trip atómico.
+    
+    Devuelve (acción, marca):
+    - ("added", marca creada)
+    - ("removed", marca borrada)
+    - ("unchanged", marca existente): un toggle concurrente la creó primero
+    
+    Lanza EventNotFound si el evento no existe.
+    """
+    try:
+        result = await db.execute(_toggle_statement(user_id, event_id, status))
+        row = result.mappings().first()
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        if _is_missing_event(e):
+            raise EventNotFound(event_id)
+        raise
+    
+    if row:
+        return row["action"], dict(row)
+    
+    # Doble tap concurrente: devolver la marca que quedó
+    result = await db.execute(
+        select(*[getattr(Assist, column) for column in _MARK_COLUMNS]).where(
+            Assist.user_id == user_id,
+            Assist.event_id == event_id,
+            Assist.status == status
+        )
+    )
+    mark = result.mappings().first()
+    return "unchanged", dict(mark) if mark else None
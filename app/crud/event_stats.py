@@ -0,0 +1,94 @@
+from typing import Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import Row, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models import Assist, EventStats
+from app.schemas import AssistStatus
+
+
+# Lecturas: filas Core de solo lectura (sin identity map)
+_STATS_COLUMNS = (EventStats.event_id, EventStats.total_assists, EventStats.total_likes)
+
+
+async def get_event_stats(db: AsyncSession, event_id: UUID) -> Optional[Row]:
+    """Contadores de un evento (lookup por primary key). None si no tiene fila"""
+    result = await db.execute(
+        select(*_STATS_COLUMNS).where(EventStats.event_id == event_id)
+    )
+    return result.first()
+
+
+async def get_many_event_stats(db: AsyncSession, event_ids: List[UUID]) -> Dict[UUID, Row]:
+    """Contadores de varios eventos en una sola consulta: event_id -> (event_id, total_assists, total_likes)"""
+    result = await db.execute(
+        select(*_STATS_COLUMNS).where(EventStats.event_id.in_(event_ids))
+    )
+    return {stats.event_id: stats for stats in result}
+
+
+async def subtract_user_marks(db: AsyncSession, user_id: UUID) -> None:
+    """
+    Descuenta las marcas de un usuario antes de borrarlo
+    (sus assists se eliminan por ON DELETE CASCADE). No hace commit.
+    """
+    marks = select(
+        Assist.event_id,
+        func.count().filter(Assist.status == AssistStatus.ASSIST.value).label("assists"),
+        func.count().filter(Assist.status == AssistStatus.LIKE.value).label("likes"),
+    ).where(
+        Assist.user_id == user_id
+    ).group_by(Assist.event_id).subquery()
+    
+    await db.execute(
+        update(EventStats)
+        .where(EventStats.event_id == marks.c.event_id)
+        .values(
+            total_assists=EventStats.total_assists - marks.c.assists,
+            total_likes=EventStats.total_likes - marks.c.likes,
+        )
+    )
+
+
+async def reconcile_event_stats(db: AsyncSession) -> int:
+    """
+    Recalcula todos los contadores desde la tabla assist y corrige los que difieran.
+    Bloquea escrituras en assist mientras corre (los toggles esperan): usar fuera de hora pico.
+    Devuelve la cantidad de eventos corregidos.
+    """
+    await db.execute(text("LOCK TABLE assist IN SHARE MODE"))
+    
+    actual = select(
+        Assist.event_id,
+        func.count().filter(Assist.status == AssistStatus.ASSIST.value).label("total_assists"),
+        func.count().filter(Assist.status == AssistStatus.LIKE.value).label("total_likes"),
+    ).group_by(Assist.event_id)
+    
+    upsert = pg_insert(EventStats).from_select(
+        ["event_id", "total_assists", "total_likes"], actual
+    )
+    upsert = upsert.on_conflict_do_update(
+        index_elements=[EventStats.event_id],
+        set_={
+            "total_assists": upsert.excluded.total_assists,
+            "total_likes": upsert.excluded.total_likes,
+        },
+        where=(EventStats.total_assists != upsert.excluded.total_assists)
+        | (EventStats.total_likes != upsert.excluded.total_likes)
+    )
+    fixed = (await db.execute(upsert)).rowcount
+    
+    # Eventos con contadores pero sin ninguna marca
+    zeroed = (await db.execute(
+        update(EventStats)
+        .where(
+            (EventStats.total_assists != 0) | (EventStats.total_likes != 0),
+            ~select(Assist.id).where(Assist.event_id == EventStats.event_id).exists()
+        )
+        .values(total_assists=0, total_likes=0)
+    )).rowcount
+    
+    await db.commit()
+    return fixed + zeroed
@@ -0,0 +1,519 @@
+import heapq
+import uuid
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import and_, bindparam, column, delete, func, insert, or_, select, table, tuple_, update
+from sqlalchemy.dialects.postgresql import TSVECTOR, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app import recurrence
+from app.cache import TTLCache
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.dates import utc_now
+from app.models import EVENTS_WITH_LOCATION_VIEW, Event, EventCategory, EventWithLocationView
+from app.schemas import EventCreate, EventWithLocation
+
+
+# Vista y copia materializada (misma estructura que EventWithLocationView)
+_VIEW_COLUMNS = [col.name for col in EventWithLocationView.__table__.columns]
+_events_view = table(EVENTS_WITH_LOCATION_VIEW, *[column(name) for name in _VIEW_COLUMNS])
+_events_mat = table("events_with_location_mat", *[column(name) for name in _VIEW_COLUMNS])
+
+# Columnas de EventWithLocation: las lecturas traen filas Core (sin identity map)
+# con solo lo que necesita la respuesta, en vez de entidades EventWithLocationView
+EVENT_COLUMNS = tuple(getattr(EventWithLocationView, name) for name in EventWithLocation.model_fields)
+
+
+def _upsert_materialized(source_query):
+    """INSERT ... SELECT desde la vista; solo reescribe las filas que cambiaron"""
+    stmt = pg_insert(_events_mat).from_select(_VIEW_COLUMNS, source_query)
+    changed = [name for name in _VIEW_COLUMNS if name != "id"]
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={name: stmt.excluded[name] for name in changed},
+        where=tuple_(*[_events_mat.c[name] for name in changed]).is_distinct_from(
+            tuple_(*[stmt.excluded[name] for name in changed])
+        )
+    )
+
+
+async def sync_materialized_events(db: AsyncSession, event_ids: List[UUID]) -> None:
+    """
+    Actualizar events_with_location_mat para los eventos indicados (sin commit).
+    Se llama en la misma transacción que crea/edita los eventos; los borrados
+    se propagan solos (FK con ON DELETE CASCADE).
+    """
+    if not settings.EVENTS_MATERIALIZED or not event_ids:
+        return
+    
+    await db.execute(_upsert_materialized(
+        select(*[_events_view.c[name] for name in _VIEW_COLUMNS])
+        .where(_events_view.c.id.in_(event_ids))
+    ))
+
+
+async def refresh_materialized_events(db: AsyncSession) -> Tuple[int, int]:
+    """
+    Recalcular events_with_location_mat completa desde la vista (p. ej. si
+    cambió el nombre de una locación). Devuelve (filas actualizadas, filas borradas).
+    """
+    upserted = await db.execute(_upsert_materialized(
+        select(*[_events_view.c[name] for name in _VIEW_COLUMNS])
+    ))
+    deleted = await db.execute(
+        delete(_events_mat).where(
+            ~_events_mat.c.id.in_(select(_events_view.c.id))
+        )
+    )
+    await db.commit()
+    
+    return upserted.rowcount, deleted.rowcount
+
+
+async def backfill_series_end(db: AsyncSession) -> int:
+    """
+    Calcular series_end de las series que lo tienen en NULL (creadas antes de
+    la migración 009). Devuelve cuántas series terminan.
+    """
+    result = await db.execute(
+        select(Event.id, Event.recurrence_rule, Event.start_time).where(
+            Event.is_recurring == True,
+            Event.recurrence_rule.isnot(None),
+            Event.series_end.is_(None)
+        )
+    )
+    ends = [
+        {"event_id": series.id, "series_end": end}
+        for series in result
+        if (end := recurrence.series_end(series.recurrence_rule, series.start_time)) is not None
+    ]
+    
+    if ends:
+        await db.execute(
+            update(Event)
+            .where(Event.id == bindparam("event_id"))
+            .values(series_end=bindparam("series_end"))
+            .execution_options(synchronize_session=False),
+            ends
+        )
+        await sync_materialized_events(db, [end["event_id"] for end in ends])
+    await db.commit()
+    
+    return len(ends)
+
+
+# Cache de GET /events/{id}: event_id -> (etag, body JSON)
+_event_response_cache = TTLCache(
+    maxsize=settings.EVENT_CACHE_SIZE,
+    ttl=settings.EVENT_CACHE_TTL_SECONDS
+)
+
+
+def event_etag(event) -> str:
+    """ETag de un evento: cambia cada vez que se edita (edited_at)"""
+    version = event.edited_at or event.created_at
+    return f'"{event.id}-{version:%Y%m%d%H%M%S%f}"' if version else f'"{event.id}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    If-None-Match coincide con el ETag vigente: '*' o alguna de las etiquetas,
+    comparando sin el prefijo W/ (comparación débil, como pide RFC 9110 para GET)
+    """
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or any(tag.removeprefix("W/") == etag for tag in tags)
+
+
+async def get_event_response_cached(db: AsyncSession, event_id: UUID) -> Optional[Tuple[str, bytes]]:
+    """
+    Respuesta ya serializada de GET /events/{id}: (etag, body).
+    Solo consulta la BD (y serializa) si no está en cache o expiró.
+    """
+    cached = _event_response_cache.get(event_id)
+    if cached is not None:
+        return cached
+    
+    stamp = _event_response_cache.stamp()
+    result = await db.execute(
+        select(*EVENT_COLUMNS, EventWithLocationView.created_at, EventWithLocationView.edited_at)
+        .where(EventWithLocationView.id == event_id)
+    )
+    event = result.first()
+    
+    if not event:
+        return None
+    
+    cached = (event_etag(event), EventWithLocation.model_validate(event, from_attributes=True).model_dump_json().encode())
+    _event_response_cache.set(event_id, cached, stamp=stamp)
+    return cached
+
+
+def invalidate_event(event_id: UUID) -> None:
+    """Quitar el evento de la cache (después de modificarlo o borrarlo)"""
+    _event_response_cache.pop(event_id)
+
+
+def _format_validation_error(error: ValidationError) -> List[str]:
+    """Errores de pydantic como 'campo: mensaje'"""
+    return [
+        f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}"
+        for err in error.errors()
+    ]
+
+
+# Valores del CHECK de events.status
+EVENT_STATUSES = ("active", "cancelled", "past")
+
+# Columnas con default: una celda vacía (None) toma el default del schema en vez de NULL
+_DEFAULTED_FIELDS = ("is_recurring", "status")
+
+
+def validate_event_rows(rows: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, EventCreate]], List[Dict[str, Any]]]:
+    """
+    Validar un lote de filas con EventCreate.
+    
+    Devuelve (válidas, errores): válidas es [(row, EventCreate)] y errores
+    [{"row", "errors"}], con row empezando en 1 (posición en el lote).
+    """
+    parsed = []
+    errors = []
+    
+    for row, data in enumerate(rows, start=1):
+        try:
+            parsed.append((row, EventCreate.model_validate(data)))
+        except ValidationError as e:
+            errors.append({"row": row, "errors": _format_validation_error(e)})
+    
+    # Reglas de la tabla events (end_time > start_time y CHECK de status),
+    # para que una fila no haga fallar el INSERT de todo el lote
+    invalid = {}
+    for row, event in parsed:
+        row_errors = []
+        if event.end_time <= event.start_time:
+            row_errors.append("end_time must be after start_time")
+        if event.status is not None and event.status not in EVENT_STATUSES:
+            row_errors.append(f"status: must be one of {', '.join(EVENT_STATUSES)}")
+        if row_errors:
+            invalid[row] = row_errors
+    
+    errors.extend({"row": row, "errors": row_errors} for row, row_errors in invalid.items())
+    errors.sort(key=lambda error: error["row"])
+    
+    valid = [(row, event) for row, event in parsed if row not in invalid]
+    return valid, errors
+
+
+_categories = table("categories", column("id"))
+
+
+async def get_unknown_category_ids(db: AsyncSession, category_ids: Iterable[int]) -> Set[int]:
+    """Ids de categoría que no existen en la tabla categories"""
+    category_ids = set(category_ids)
+    if not category_ids:
+        return set()
+    
+    result = await db.execute(
+        select(_categories.c.id).where(_categories.c.id.in_(category_ids))
+    )
+    return category_ids - set(result.scalars())
+
+
+_locations = table("locations", column("id"))
+
+
+async def get_unknown_location_ids(db: AsyncSession, location_ids: Iterable[int]) -> Set[int]:
+    """Ids de locación que no existen en la tabla locations"""
+    location_ids = set(location_ids)
+    if not location_ids:
+        return set()
+    
+    result = await db.execute(
+        select(_locations.c.id).where(_locations.c.id.in_(location_ids))
+    )
+    return location_ids - set(result.scalars())
+
+
+async def check_event_references(
+    db: AsyncSession,
+    valid: List[Tuple[int, EventCreate]],
+    errors: List[Dict[str, Any]]
+) -> List[Tuple[int, EventCreate]]:
+    """
+    Quita del lote las filas con categorías o locaciones inexistentes (una
+    consulta por tabla para todo el lote) y las agrega a errors.
+    """
+    unknown_categories = await get_unknown_category_ids(
+        db, (category_id for _, event in valid for category_id in event.category_ids or [])
+    )
+    unknown_locations = await get_unknown_location_ids(
+        db, (event.location_id for _, event in valid if event.location_id is not None)
+    )
+    if not unknown_categories and not unknown_locations:
+        return valid
+    
+    checked = []
+    for row, event in valid:
+        row_errors = []
+        missing = unknown_categories.intersection(event.category_ids or [])
+        if missing:
+            row_errors.append(f"category_ids: unknown {sorted(missing)}")
+        if event.location_id in unknown_locations:
+            row_errors.append(f"location_id: unknown {event.location_id}")
+        
+        if row_errors:
+            errors.append({"row": row, "errors": row_errors})
+        else:
+            checked.append((row, event))
+    
+    errors.sort(key=lambda error: error["row"])
+    return checked
+
+
+async def add_event_categories(db: AsyncSession, event_id: UUID, category_ids: Iterable[int]) -> None:
+    """Asociar categorías a un evento (sin commit)"""
+    links = [{"event_id": event_id, "category_id": category_id} for category_id in set(category_ids)]
+    if links:
+        await db.execute(insert(EventCategory), links)
+
+
+async def get_event_category_ids(db: AsyncSession, event_id: UUID) -> Set[int]:
+    """Categorías de un evento"""
+    result = await db.execute(
+        select(EventCategory.category_id).where(EventCategory.event_id == event_id)
+    )
+    return set(result.scalars())
+
+
+async def bulk_create_events(db: AsyncSession, events: List[EventCreate], created_by: UUID) -> List[UUID]:
+    """
+    Insertar muchos eventos en una sola escritura (executemany, sin refresh por fila).
+    Devuelve los ids en el mismo orden que events.
+    """
+    if not events:
+        return []
+    
+    now = utc_now()
+    rows = []
+    category_links = []
+    for event in events:
+        row = event.model_dump()
+        for name in _DEFAULTED_FIELDS:
+            if row[name] is None:
+                row[name] = EventCreate.model_fields[name].default
+        row["id"] = uuid.uuid4()
+        category_links.extend(
+            {"event_id": row["id"], "category_id": category_id}
+            for category_id in set(row.pop("category_ids") or [])
+        )
+        row["created_by"] = created_by
+        row["series_end"] = recurrence.series_end(row["recurrence_rule"], row["start_time"])
+        # created_at es parte de la clave del cursor: nunca NULL
+        if row.get("created_at") is None:
+            row["created_at"] = now
+        rows.append(row)
+    
+    event_ids = [row["id"] for row in rows]
+    
+    await db.execute(insert(Event), rows)
+    if category_links:
+        await db.execute(insert(EventCategory), category_links)
+    await sync_materialized_events(db, event_ids)
+    await db.commit()
+    
+    return event_ids
+
+
+# Columnas de la exportación (mismos campos que EventWithLocation)
+EXPORT_COLUMNS = (
+    "id", "title", "description", "location_id",
+    "start_time", "end_time", "location_name",
+)
+
+
+_EXPORT_START = EXPORT_COLUMNS.index("start_time")
+_EXPORT_END = EXPORT_COLUMNS.index("end_time")
+
+
+def _export_key(row) -> Tuple[datetime, UUID]:
+    return (row[_EXPORT_START], row[0])
+
+
+def _export_occurrences(series_rows, start_date: datetime, end_date: datetime) -> List[tuple]:
+    """
+    Ocurrencias de las series dentro del rango, como filas de EXPORT_COLUMNS
+    ordenadas por (start_time, id). Cada serie aporta como mucho
+    RECURRENCE_MAX_OCCURRENCES, así que entran en memoria.
+    """
+    occurrences = []
+    for series in series_rows:
+        starts = recurrence.get_series_occurrences(series, start_date, end_date)
+        if not starts:
+            continue
+        
+        duration = series.end_time - series.start_time if series.end_time else timedelta(0)
+        values = list(series[:len(EXPORT_COLUMNS)])
+        for start in starts:
+            values[_EXPORT_START], values[_EXPORT_END] = start, start + duration
+            occurrences.append(tuple(values))
+    
+    occurrences.sort(key=_export_key)
+    return occurrences
+
+
+async def merge_occurrences(
+    batches: AsyncIterator[List[Any]],
+    occurrences: List[tuple],
+    batch_size: int
+) -> AsyncIterator[List[Any]]:
+    """
+    Intercala las ocurrencias (ya ordenadas) con los lotes de eventos únicos,
+    en orden (start_time, id): cada lote sale con las ocurrencias hasta su última fila.
+    """
+    keys = [_export_key(occurrence) for occurrence in occurrences]
+    position = 0
+    
+    async for rows in batches:
+        if not rows:
+            continue
+        cut = bisect_right(keys, _export_key(rows[-1]), lo=position)
+        yield list(heapq.merge(rows, occurrences[position:cut], key=_export_key))
+        position = cut
+    
+    for offset in range(position, len(occurrences), batch_size):
+        yield occurrences[offset:offset + batch_size]
+
+
+async def stream_events_by_date_range(
+    start_date: datetime,
+    end_date: datetime,
+    location_id: Optional[int] = None,
+    batch_size: int = 1000
+) -> AsyncIterator[List[Any]]:
+    """
+    Recorre los eventos del rango con un cursor del servidor, de a batch_size filas.
+    Las series recurrentes se expanden en sus ocurrencias del rango, como en
+    /events/by-date-range/.
+    
+    Abre su propia sesión: se usa desde un StreamingResponse, que sigue
+    leyendo después de que termina el request (y se cierra la sesión de get_async_db).
+    """
+    filters = []
+    if location_id is not None:
+        filters.append(EventWithLocationView.location_id == location_id)
+    
+    export_columns = [getattr(EventWithLocationView, column) for column in EXPORT_COLUMNS]
+    
+    # 1. Eventos únicos: cursor del servidor en orden (start_time, id)
+    query = (
+        select(*export_columns)
+        .where(
+            or_(
+                EventWithLocationView.is_recurring.isnot(True),
+                EventWithLocationView.recurrence_rule.is_(None)
+            ),
+            EventWithLocationView.start_time >= start_date,
+            EventWithLocationView.start_time <= end_date,
+            *filters
+        )
+        .order_by(EventWithLocationView.start_time, EventWithLocationView.id)
+        .execution_options(yield_per=batch_size)
+    )
+    
+    # 2. Series que pueden tener ocurrencias en el rango (ver migración 009)
+    series_query = select(
+        *export_columns,
+        EventWithLocationView.recurrence_rule,
+        EventWithLocationView.created_at,
+        EventWithLocationView.edited_at
+    ).where(
+        EventWithLocationView.is_recurring == True,
+        EventWithLocationView.recurrence_rule.isnot(None),
+        EventWithLocationView.start_time <= end_date,
+        or_(
+            EventWithLocationView.series_end.is_(None),
+            EventWithLocationView.series_end >= start_date
+        ),
+        *filters
+    )
+    
+    async with AsyncSessionLocal() as db:
+        occurrences = _export_occurrences(await db.execute(series_query), start_date, end_date)
+        result = await db.stream(query)
+        async for rows in merge_occurrences(result.partitions(), occurrences, batch_size):
+            yield rows
+
+
+# ==================== BÚSQUEDA DE TEXTO ====================
+
+# events.search_vector es una columna generada (migración 008). No está en el
+# modelo Event: la mantiene PostgreSQL y el ORM nunca la escribe ni la lee.
+_events_search = table(
+    "events",
+    column("id"), column("start_time"), column("location_id"),
+    column("search_vector", TSVECTOR)
+)
+SEARCH_CONFIG = "spanish"
+
+
+def _search_filters(
+    source,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    location_id: Optional[int]
+) -> list:
+    """Filtros de fecha/ubicación sobre las columnas de events"""
+    filters = []
+    if start_date is not None:
+        filters.append(source.start_time >= start_date)
+    if end_date is not None:
+        filters.append(source.start_time <= end_date)
+    if location_id is not None:
+        filters.append(source.location_id == location_id)
+    return filters
+
+
+async def search_events(
+    db: AsyncSession,
+    text: str,
+    limit: int,
+    after: Optional[Tuple[float, UUID]] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    location_id: Optional[int] = None
+) -> List[Tuple[float, Any]]:
+    """
+    Eventos cuyo título/descripción coinciden con text: [(rank, evento)],
+    ordenados por rank descendente e id. after es (rank, id) del último de la página anterior.
+    """
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank(_events_search.c.search_vector, tsquery)
+    
+    # 1. Ranking solo sobre events (índice GIN); la vista se lee para la página
+    events = _events_search.c
+    ranked = select(events.id, rank.label("rank")).where(
+        events.search_vector.op("@@")(tsquery),
+        *_search_filters(events, start_date, end_date, location_id)
+    )
+    
+    if after:
+        last_rank, last_id = after
+        ranked = ranked.where(
+            or_(rank < last_rank, and_(rank == last_rank, events.id > last_id))
+        )
+    
+    ranked = ranked.order_by(rank.desc(), events.id).limit(limit).subquery()
+    
+    # 2. Datos de la vista para esos eventos
+    result = await db.execute(
+        select(*EVENT_COLUMNS, ranked.c.rank)
+        .join(ranked, ranked.c.id == EventWithLocationView.id)
+        .order_by(ranked.c.rank.desc(), EventWithLocationView.id)
+    )
+    return [(row.rank, row) for row in result]
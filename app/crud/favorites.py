@@ -1,62 +1,120 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Row, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
-from typing import List, Optional
+from typing import Callable, FrozenSet, List, Optional
 from uuid import UUID
 from datetime import datetime
 
+from app.cache import TTLCache
+from app.config import settings
+from app.crud import events as crud_events
+from app.crud import feed as crud_feed
 from app.models import Favorite
-from app.schemas import FavoriteCreate
+from app.schemas import FavoriteCreate, FavoriteResponse
 
 
-def get_favorite(db: Session, favorite_id: int, include_deleted: bool = False) -> Optional[Favorite]:
+class UnknownCategories(Exception):
+    """Alguna de las categorías no existe (args[0]: ids desconocidos, ordenados)"""
+
+
+class FavoritesConflict(Exception):
+    """La sincronización chocó con otro cambio concurrente (IntegrityError): reintentar"""
+
+
+async def get_favorite(db: AsyncSession, favorite_id: int, include_deleted: bool = False) -> Optional[Favorite]:
     """Obtener un favorito por ID"""
-    query = db.query(Favorite).filter(Favorite.id == favorite_id)
+    query = select(Favorite).where(Favorite.id == favorite_id)
     
     if not include_deleted:
-        query = query.filter(Favorite.deleted_at.is_(None))
+        query = query.where(Favorite.deleted_at.is_(None))
     
-    return query.first()
+    result = await db.execute(query)
+    return result.scalars().first()
 
 
-def get_user_favorite(db: Session, user_id: UUID, category_id: int) -> Optional[Favorite]:
+async def get_user_favorite(db: AsyncSession, user_id: UUID, category_id: int) -> Optional[Favorite]:
     """Obtener favorito específico de un usuario (solo activos)"""
-    return db.query(Favorite).filter(
-        Favorite.user_id == user_id,
-        Favorite.category_id == category_id,
-        Favorite.deleted_at.is_(None)
-    ).first()
+    result = await db.execute(
+        select(Favorite).where(
+            Favorite.user_id == user_id,
+            Favorite.category_id == category_id,
+            Favorite.deleted_at.is_(None)
+        )
+    )
+    return result.scalars().first()
 
 
-def get_user_favorites(db: Session, user_id: UUID, include_deleted: bool = False) -> List[Favorite]:
-    """Obtener todas las categorías favoritas de un usuario"""
-    query = db.query(Favorite).filter(Favorite.user_id == user_id)
+# Lecturas: filas Core con las columnas de FavoriteResponse (sin identity map)
+_FAVORITE_COLUMNS = tuple(getattr(Favorite, name) for name in FavoriteResponse.model_fields)
+
+
+async def get_user_favorites(db: AsyncSession, user_id: UUID, include_deleted: bool = False) -> List[Row]:
+    """Obtener todas las categorías favoritas de un usuario (solo lectura)"""
+    query = select(*_FAVORITE_COLUMNS).where(Favorite.user_id == user_id)
     
     if not include_deleted:
-        query = query.filter(Favorite.deleted_at.is_(None))
+        query = query.where(Favorite.deleted_at.is_(None))
+    
+    result = await db.execute(query.order_by(Favorite.created_at.desc()))
+    return list(result.all())
+
+
+# Categorías favoritas activas: user_id -> frozenset de category_id
+_favorite_ids_cache = TTLCache(
+    maxsize=settings.FAVORITES_CACHE_SIZE,
+    ttl=settings.FAVORITES_CACHE_TTL_SECONDS
+)
+
+
+async def get_user_favorite_id_set(db: AsyncSession, user_id: UUID) -> FrozenSet[int]:
+    """
+    Categorías favoritas activas del usuario desde la cache del proceso.
+    Solo consulta la BD si no está en cache o expiró.
+    """
+    category_ids = _favorite_ids_cache.get(user_id)
+    if category_ids is not None:
+        return category_ids
     
-    return query.order_by(Favorite.created_at.desc()).all()
+    stamp = _favorite_ids_cache.stamp()
+    result = await db.execute(
+        select(Favorite.category_id).where(
+            Favorite.user_id == user_id,
+            Favorite.deleted_at.is_(None)
+        )
+    )
+    category_ids = frozenset(result.scalars())
+    _favorite_ids_cache.set(user_id, category_ids, stamp=stamp)
+    return category_ids
+
 
+def _update_favorite_ids(user_id: UUID, change: Callable[[FrozenSet[int]], FrozenSet[int]]) -> None:
+    """Aplica un cambio (después del commit) al set en cache, si está"""
+    # pop invalida las lecturas de la BD en curso, que podrían ser anteriores al cambio
+    category_ids = _favorite_ids_cache.pop(user_id)
+    if category_ids is not None:
+        _favorite_ids_cache.set(user_id, change(category_ids))
 
-def get_user_favorite_ids(db: Session, user_id: UUID) -> List[int]:
+
+async def get_user_favorite_ids(db: AsyncSession, user_id: UUID) -> List[int]:
     """Obtener solo los IDs de categorías favoritas activas de un usuario"""
-    favorites = db.query(Favorite.category_id).filter(
-        Favorite.user_id == user_id,
-        Favorite.deleted_at.is_(None)
-    ).all()
-    return [fav.category_id for fav in favorites]
+    return sorted(await get_user_favorite_id_set(db, user_id))
 
 
-def create_favorite(db: Session, user_id: UUID, favorite: FavoriteCreate) -> Optional[Favorite]:
+async def create_favorite(db: AsyncSession, user_id: UUID, favorite: FavoriteCreate) -> Optional[Favorite]:
     """
     Agregar una categoría a favoritos.
     Si existía previamente pero fue eliminado (soft delete), lo reactiva.
     Retorna None si ya existe activo.
     """
     # Verificar si existe (activo o eliminado)
-    existing = db.query(Favorite).filter(
-        Favorite.user_id == user_id,
-        Favorite.category_id == favorite.category_id
-    ).first()
+    result = await db.execute(
+        select(Favorite).where(
+            Favorite.user_id == user_id,
+            Favorite.category_id == favorite.category_id
+        )
+    )
+    existing = result.scalars().first()
     
     if existing:
         if existing.deleted_at is None:
@@ -65,8 +123,10 @@ def create_favorite(db: Session, user_id: UUID, favorite: FavoriteCreate) -> Opt
         else:
             # Existía pero estaba eliminado, reactivarlo
             existing.deleted_at = None
-            db.commit()
-            db.refresh(existing)
+            await db.commit()
+            await db.refresh(existing)
+            _update_favorite_ids(user_id, lambda ids: ids | {favorite.category_id})
+            await crud_feed.on_favorite_added(db, user_id, favorite.category_id)
             return existing
     
     # Crear nuevo favorito
@@ -77,89 +137,162 @@ def create_favorite(db: Session, user_id: UUID, favorite: FavoriteCreate) -> Opt
     
     try:
         db.add(db_favorite)
-        db.commit()
-        db.refresh(db_favorite)
-        return db_favorite
+        await db.commit()
+        await db.refresh(db_favorite)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         return None
+    
+    _update_favorite_ids(user_id, lambda ids: ids | {favorite.category_id})
+    await crud_feed.on_favorite_added(db, user_id, favorite.category_id)
+    return db_favorite
 
 
-def delete_favorite(db: Session, user_id: UUID, category_id: int) -> bool:
+async def delete_favorite(db: AsyncSession, user_id: UUID, category_id: int) -> bool:
     """
     Soft delete: marca una categoría como eliminada en lugar de borrarla.
     Retorna True si se eliminó, False si no existía.
     """
-    favorite = get_user_favorite(db, user_id, category_id)
+    favorite = await get_user_favorite(db, user_id, category_id)
     
     if not favorite:
         return False
     
     # Soft delete: marcar como eliminado
     favorite.deleted_at = datetime.now()
-    db.commit()
+    await db.commit()
+    _update_favorite_ids(user_id, lambda ids: ids - {favorite.category_id})
+    crud_feed.on_favorite_removed(user_id)
     return True
 
 
-def delete_favorite_by_id(db: Session, user_id: UUID, favorite_id: int) -> bool:
+async def delete_favorite_by_id(db: AsyncSession, user_id: UUID, favorite_id: int) -> bool:
     """
     Soft delete por ID.
     Solo permite eliminar favoritos del propio usuario.
     """
-    favorite = db.query(Favorite).filter(
-        Favorite.id == favorite_id,
-        Favorite.user_id == user_id,
-        Favorite.deleted_at.is_(None)
-    ).first()
+    result = await db.execute(
+        select(Favorite).where(
+            Favorite.id == favorite_id,
+            Favorite.user_id == user_id,
+            Favorite.deleted_at.is_(None)
+        )
+    )
+    favorite = result.scalars().first()
     
     if not favorite:
         return False
     
     # Soft delete
     favorite.deleted_at = datetime.now()
-    db.commit()
+    await db.commit()
+    _update_favorite_ids(user_id, lambda ids: ids - {favorite.category_id})
+    crud_feed.on_favorite_removed(user_id)
     return True
 
 
-def restore_favorite(db: Session, user_id: UUID, category_id: int) -> Optional[Favorite]:
+async def restore_favorite(db: AsyncSession, user_id: UUID, category_id: int) -> Optional[Favorite]:
     """
     Restaurar un favorito eliminado (reactivarlo).
     """
-    favorite = db.query(Favorite).filter(
-        Favorite.user_id == user_id,
-        Favorite.category_id == category_id,
-        Favorite.deleted_at.isnot(None)
-    ).first()
+    result = await db.execute(
+        select(Favorite).where(
+            Favorite.user_id == user_id,
+            Favorite.category_id == category_id,
+            Favorite.deleted_at.isnot(None)
+        )
+    )
+    favorite = result.scalars().first()
     
     if not favorite:
         return None
     
     favorite.deleted_at = None
-    db.commit()
-    db.refresh(favorite)
+    await db.commit()
+    await db.refresh(favorite)
+    _update_favorite_ids(user_id, lambda ids: ids | {category_id})
+    await crud_feed.on_favorite_added(db, user_id, category_id)
     return favorite
 
 
-def is_favorite(db: Session, user_id: UUID, category_id: int) -> bool:
+async def sync_favorites(db: AsyncSession, user_id: UUID, category_ids: List[int]) -> List[Row]:
+    """
+    Dejar como favoritas exactamente estas categorías, en una transacción:
+    
+    1. INSERT ... ON CONFLICT: crea las nuevas y reactiva las eliminadas
+    2. UPDATE: soft delete de las activas que no están en la lista
+    
+    Retorna la lista final de favoritos activos. Lanza UnknownCategories si
+    alguna categoría no existe (sin cambiar nada) y FavoritesConflict si el
+    INSERT/UPDATE viola una constraint.
+    """
+    category_ids = list(dict.fromkeys(category_ids))
+    
+    # Una consulta para todas: un id inexistente violaría la FK en el INSERT
+    unknown = await crud_events.get_unknown_category_ids(db, category_ids)
+    if unknown:
+        raise UnknownCategories(sorted(unknown))
+    
+    added = removed = 0
+    try:
+        if category_ids:
+            insert_stmt = pg_insert(Favorite).values([
+                {"user_id": user_id, "category_id": category_id} for category_id in category_ids
+            ])
+            result = await db.execute(
+                insert_stmt.on_conflict_do_update(
+                    constraint="unique_user_category",
+                    set_={"deleted_at": None},
+                    where=Favorite.deleted_at.isnot(None)
+                )
+            )
+            added = result.rowcount
+        
+        result = await db.execute(
+            update(Favorite)
+            .where(
+                Favorite.user_id == user_id,
+                Favorite.deleted_at.is_(None),
+                Favorite.category_id.notin_(category_ids)
+            )
+            .values(deleted_at=datetime.now())
+            .execution_options(synchronize_session=False)
+        )
+        removed = result.rowcount
+        
+        favorites = await get_user_favorites(db, user_id)
+        await db.commit()
+    except IntegrityError:
+        # Categoría borrada entretanto, o el usuario ya no existe
+        await db.rollback()
+        raise FavoritesConflict(user_id)
+    
+    if added or removed:
+        _update_favorite_ids(user_id, lambda ids: frozenset(category_ids))
+        crud_feed.on_favorite_removed(user_id)
+    
+    return favorites
+
+
+async def is_favorite(db: AsyncSession, user_id: UUID, category_id: int) -> bool:
     """Verificar si una categoría es favorita activa del usuario"""
-    return get_user_favorite(db, user_id, category_id) is not None
+    return category_id in await get_user_favorite_id_set(db, user_id)
 
 
-def count_user_favorites(db: Session, user_id: UUID, include_deleted: bool = False) -> int:
+async def count_user_favorites(db: AsyncSession, user_id: UUID, include_deleted: bool = False) -> int:
     """Contar cuántas categorías favoritas tiene un usuario"""
-    query = db.query(Favorite).filter(Favorite.user_id == user_id)
-    
     if not include_deleted:
-        query = query.filter(Favorite.deleted_at.is_(None))
+        return len(await get_user_favorite_id_set(db, user_id))
     
-    return query.count()
+    result = await db.execute(
+        select(func.count(Favorite.id)).where(Favorite.user_id == user_id)
+    )
+    return result.scalar_one()
 
 
-def get_favorite_history(db: Session, user_id: UUID) -> List[Favorite]:
+async def get_favorite_history(db: AsyncSession, user_id: UUID) -> List[Row]:
     """
     Obtener historial completo de favoritos del usuario.
     Incluye activos y eliminados, útil para análisis.
     """
-    return db.query(Favorite).filter(
-        Favorite.user_id == user_id
-    ).order_by(Favorite.created_at.desc()).all()
\ No newline at end of file
+    return await get_user_favorites(db, user_id, include_deleted=True)
\ No newline at end of file
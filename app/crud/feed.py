@@ -0,0 +1,303 @@
+from bisect import insort
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from uuid import UUID
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.cache import TTLCache
+from app.config import settings
+from app.crud.events import EVENT_COLUMNS
+from app.dates import utc_now
+from app.models import EventCategory, EventWithLocationView, Favorite
+from app.schemas import EventWithLocation
+
+
+# ==================== FEED POR CATEGORÍAS FAVORITAS ====================
+# Para cada usuario se precalculan sus próximos FEED_SIZE eventos (en orden
+# start_time, id) de las categorías favoritas activas. La lista se actualiza
+# al crear eventos o agregar favoritos, sin volver a consultar el feed entero.
+# "Próximos" se compara con utc_now(): start_time se guarda sin zona, en UTC.
+# Cada feed guarda solo claves (start_time, id); los datos de cada evento están
+# una sola vez en _feed_events, compartida por todos los feeds del proceso.
+# Las caches son por proceso: los otros workers ven un evento editado o borrado
+# hasta que su feed expira (FEED_CACHE_TTL_SECONDS).
+
+
+@dataclass
+class UserFeed:
+    category_ids: Set[int]
+    events: List[Tuple[datetime, UUID]]  # claves (start_time, id), ordenadas
+    complete: bool  # True: no hay más eventos próximos que los de la lista
+
+
+# Índices inversos de los feeds en cache. Se actualizan al guardar o modificar
+# un feed, y _on_feed_evicted los limpia cuando el feed sale del cache.
+_feeds_by_category: Dict[int, Set[UUID]] = {}  # category_id -> usuarios que la siguen
+_feeds_by_event: Dict[UUID, Set[UUID]] = {}  # event_id -> usuarios con el evento en su lista
+
+
+def _index_add(index: dict, key, user_id: UUID) -> None:
+    index.setdefault(key, set()).add(user_id)
+
+
+def _index_discard(index: dict, key, user_id: UUID) -> None:
+    users = index.get(key)
+    if users is not None:
+        users.discard(user_id)
+        if not users:
+            del index[key]
+
+
+def _on_feed_evicted(user_id: UUID, feed: UserFeed) -> None:
+    """El feed expiró, fue desalojado, recalculado o invalidado: sacarlo de los índices"""
+    for category_id in feed.category_ids:
+        _index_discard(_feeds_by_category, category_id, user_id)
+    for _, event_id in feed.events:
+        _index_discard(_feeds_by_event, event_id, user_id)
+
+
+# Cache del feed: user_id -> UserFeed
+_feed_cache = TTLCache(
+    maxsize=settings.FEED_CACHE_SIZE,
+    ttl=settings.FEED_CACHE_TTL_SECONDS,
+    on_evict=_on_feed_evicted
+)
+
+
+# Datos de los eventos de los feeds: event_id -> EventWithLocation (compartida)
+_feed_events = TTLCache(
+    maxsize=settings.FEED_EVENT_CACHE_SIZE,
+    ttl=settings.FEED_CACHE_TTL_SECONDS
+)
+
+
+def _entry(event: EventWithLocation, stamp: Optional[int] = None) -> Tuple[datetime, UUID]:
+    """Clave del evento en el feed; sus datos quedan en _feed_events"""
+    _feed_events.set(event.id, event, stamp=stamp)
+    return (event.start_time, event.id)
+
+
+async def query_feed(
+    db: AsyncSession,
+    category_ids: Iterable[int],
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None
+) -> List[EventWithLocation]:
+    """
+    Próximos eventos de las categorías indicadas, en orden (start_time, id).
+    Semi-join con event_categories (índice por category_id) y keyset con after.
+    """
+    category_ids = list(category_ids)
+    if not category_ids:
+        return []
+
+    query = select(*EVENT_COLUMNS).where(
+        EventWithLocationView.id.in_(
+            select(EventCategory.event_id).where(EventCategory.category_id.in_(category_ids))
+        ),
+        EventWithLocationView.start_time >= utc_now()
+    )
+
+    if after:
+        query = query.where(
+            tuple_(EventWithLocationView.start_time, EventWithLocationView.id) > after
+        )
+
+    result = await db.execute(
+        query.order_by(EventWithLocationView.start_time, EventWithLocationView.id).limit(limit)
+    )
+    return [EventWithLocation.model_validate(event, from_attributes=True) for event in result]
+
+
+async def query_events(db: AsyncSession, event_ids: List[UUID]) -> List[EventWithLocation]:
+    """Eventos por id (los que salieron de _feed_events)"""
+    result = await db.execute(
+        select(*EVENT_COLUMNS).where(EventWithLocationView.id.in_(event_ids))
+    )
+    return [EventWithLocation.model_validate(event, from_attributes=True) for event in result]
+
+
+async def _resolve_events(db: AsyncSession, keys: List[Tuple[datetime, UUID]]) -> Optional[List[EventWithLocation]]:
+    """
+    Datos de los eventos de una página del feed: de _feed_events, y los que
+    no están, en una consulta. None si alguno ya no existe (el feed quedó viejo).
+    """
+    events = {}
+    missing = []
+    for _, event_id in keys:
+        event = _feed_events.get(event_id)
+        if event is None:
+            missing.append(event_id)
+        else:
+            events[event_id] = event
+
+    if missing:
+        stamp = _feed_events.stamp()
+        for event in await query_events(db, missing):
+            _feed_events.set(event.id, event, stamp=stamp)
+            events[event.id] = event
+
+    if len(events) < len(keys):
+        return None
+    return [events[event_id] for _, event_id in keys]
+
+
+async def _build_feed(db: AsyncSession, user_id: UUID) -> UserFeed:
+    """Calcula el feed completo del usuario (2 consultas) y lo guarda en cache"""
+    stamp = _feed_cache.stamp()
+    events_stamp = _feed_events.stamp()
+
+    result = await db.execute(
+        select(Favorite.category_id).where(
+            Favorite.user_id == user_id,
+            Favorite.deleted_at.is_(None)
+        )
+    )
+    category_ids = set(result.scalars())
+    events = await query_feed(db, category_ids, settings.FEED_SIZE + 1)
+
+    feed = UserFeed(
+        category_ids=category_ids,
+        events=[_entry(event, events_stamp) for event in events[:settings.FEED_SIZE]],
+        complete=len(events) <= settings.FEED_SIZE
+    )
+
+    # Si había un feed anterior, set() lo saca de los índices (on_evict)
+    if _feed_cache.set(user_id, feed, stamp=stamp):
+        for category_id in category_ids:
+            _index_add(_feeds_by_category, category_id, user_id)
+        for _, event_id in feed.events:
+            _index_add(_feeds_by_event, event_id, user_id)
+
+    return feed
+
+
+async def get_feed_page(
+    db: AsyncSession,
+    user_id: UUID,
+    limit: int,
+    after: Optional[Tuple[datetime, UUID]] = None
+) -> List[EventWithLocation]:
+    """
+    Hasta limit + 1 eventos del feed después de after (para build_page).
+    Se sirve del feed precalculado; solo consulta la BD más allá de él.
+    """
+    feed = _feed_cache.get(user_id) or await _build_feed(db, user_id)
+
+    now = utc_now()
+    keys = [
+        key for key in feed.events
+        if key[0] >= now and (after is None or key > after)
+    ]
+
+    if len(keys) > limit or feed.complete:
+        events = await _resolve_events(db, keys[:limit + 1])
+        if events is not None:
+            return events
+        # Un evento del feed ya no existe: se recalcula en el próximo acceso
+        _feed_cache.pop(user_id)
+
+    # Página fuera de lo precalculado
+    return await query_feed(db, feed.category_ids, limit + 1, after)
+
+
+def _insert_event(user_id: UUID, feed: UserFeed, event: EventWithLocation) -> None:
+    """Agrega un evento nuevo a un feed, manteniendo el orden y FEED_SIZE"""
+    entry = (event.start_time, event.id)
+
+    if not feed.complete and (not feed.events or entry >= feed.events[-1]):
+        # Más allá de lo precalculado: quedará para la consulta de páginas siguientes
+        return
+
+    insort(feed.events, entry)
+    _index_add(_feeds_by_event, event.id, user_id)
+
+    if len(feed.events) > settings.FEED_SIZE:
+        _, dropped_id = feed.events.pop()
+        _index_discard(_feeds_by_event, dropped_id, user_id)
+        feed.complete = False
+
+
+def on_event_created(event: EventWithLocation, category_ids: Iterable[int]) -> None:
+    """Agrega el evento a los feeds en cache de quienes siguen alguna de sus categorías"""
+    if event.start_time < utc_now():
+        return
+
+    users = set()
+    for category_id in category_ids:
+        users.update(_feeds_by_category.get(category_id, ()))
+    if users:
+        _entry(event)
+
+    for user_id in users:
+        feed = _feed_cache.get(user_id)
+        if feed is None:
+            continue
+        if feed.category_ids.intersection(category_ids):
+            _insert_event(user_id, feed, event)
+
+
+def invalidate_categories(category_ids: Iterable[int]) -> None:
+    """
+    Descarta los feeds de quienes siguen estas categorías (importación masiva,
+    o un evento que cambió de fecha y puede entrar o salir de sus listas)
+    """
+    users = set()
+    for category_id in set(category_ids):
+        users.update(_feeds_by_category.get(category_id, ()))
+
+    for user_id in users:
+        _feed_cache.pop(user_id)
+
+
+def on_event_changed(event_id: UUID) -> None:
+    """Descarta los datos del evento editado o borrado y los feeds que lo contienen"""
+    _feed_events.pop(event_id)
+    for user_id in list(_feeds_by_event.get(event_id, ())):
+        _feed_cache.pop(user_id)
+
+
+async def on_favorite_added(db: AsyncSession, user_id: UUID, category_id: int) -> None:
+    """Suma al feed en cache los próximos eventos de la categoría nueva (una consulta)"""
+    feed = _feed_cache.get(user_id)
+    if feed is None or category_id in feed.category_ids:
+        return
+
+    events_stamp = _feed_events.stamp()
+    added = await query_feed(db, [category_id], settings.FEED_SIZE + 1)
+    if _feed_cache.get(user_id) is not feed:
+        # Invalidado mientras se consultaba: se recalcula en el próximo acceso
+        return
+    added_complete = len(added) <= settings.FEED_SIZE
+    added = [_entry(event, events_stamp) for event in added[:settings.FEED_SIZE]]
+
+    # Solo es exacto hasta el último evento de la lista que esté incompleta
+    cutoffs = []
+    if not feed.complete and feed.events:
+        cutoffs.append(feed.events[-1])
+    if not added_complete and added:
+        cutoffs.append(added[-1])
+    cutoff = min(cutoffs) if cutoffs else None
+
+    events = sorted(
+        entry for entry in set(feed.events + added) if cutoff is None or entry <= cutoff
+    )
+
+    for _, event_id in feed.events:
+        _index_discard(_feeds_by_event, event_id, user_id)
+
+    feed.complete = cutoff is None and len(events) <= settings.FEED_SIZE
+    feed.events = events[:settings.FEED_SIZE]
+    feed.category_ids.add(category_id)
+
+    _index_add(_feeds_by_category, category_id, user_id)
+    for _, event_id in feed.events:
+        _index_add(_feeds_by_event, event_id, user_id)
+
+
+def on_favorite_removed(user_id: UUID) -> None:
+    """Descarta el feed del usuario: se recalcula en el próximo acceso"""
+    _feed_cache.pop(user_id)
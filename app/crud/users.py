@@ -1,95 +1,149 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import or_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import or_, select
 from typing import Optional, List
 from uuid import UUID
-from passlib.context import CryptContext
-import bcrypt
 
+from app import passwords
+from app.cache import TTLCache
+from app.config import settings
+from app.crud import event_stats as crud_event_stats
 from app.models import User
-from app.schemas import UserCreate, UserUpdate
+from app.schemas import CurrentUser, UserCreate, UserUpdate
 
-# Configuración para hashear contraseñas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+async def get_user(db: AsyncSession, user_id: UUID) -> Optional[User]:
+    """Obtener usuario por ID"""
+    return await db.get(User, user_id)
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt"""
-    pwd_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(pwd_bytes, salt)
-    return hashed.decode('utf-8')
+# Cache del usuario autenticado: user_id -> CurrentUser
+_current_user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS
+)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against a hash"""
-    return bcrypt.checkpw(
-        plain_password.encode('utf-8'),
-        hashed_password.encode('utf-8')
-    )
+# Versión de token vigente (tokens stateless): user_id -> token_version
+_token_version_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS
+)
 
 
-def get_user(db: Session, user_id: UUID) -> Optional[User]:
-    """Obtener usuario por ID"""
-    return db.query(User).filter(User.id == user_id).first()
+async def get_current_user_cached(db: AsyncSession, user_id: UUID) -> Optional[CurrentUser]:
+    """
+    Obtener el usuario autenticado desde la cache del proceso.
+    Solo consulta la BD si no está en cache o expiró.
+    """
+    current_user = _current_user_cache.get(user_id)
+    if current_user is not None:
+        return current_user
+    
+    # Cada cache lleva su propio contador de invalidaciones
+    stamp = _current_user_cache.stamp()
+    version_stamp = _token_version_cache.stamp()
+    user = await get_user(db, user_id)
+    
+    if not user:
+        return None
+    
+    current_user = CurrentUser.model_validate(user)
+    _current_user_cache.set(user_id, current_user, stamp=stamp)
+    _token_version_cache.set(user_id, current_user.token_version, stamp=version_stamp)
+    return current_user
+
+
+def invalidate_current_user(user_id: UUID) -> None:
+    """Quitar al usuario de la cache (después de modificarlo)"""
+    _current_user_cache.pop(user_id)
 
 
-def get_user_by_email(db: Session, email: str) -> Optional[User]:
+def get_known_token_version(user_id: UUID) -> Optional[int]:
+    """Versión de token vigente conocida por este proceso (None si no se sabe)"""
+    return _token_version_cache.get(user_id)
+
+
+async def refresh_current_user(db: AsyncSession, user_id: UUID) -> Optional[CurrentUser]:
+    """Releer el usuario desde la BD (ignora la cache) y actualizar su versión de token"""
+    invalidate_current_user(user_id)
+    return await get_current_user_cached(db, user_id)
+
+
+def _bump_token_version(db_user: User) -> None:
+    """Revoca los tokens stateless emitidos hasta ahora para este usuario"""
+    db_user.token_version = (db_user.token_version or 0) + 1
+
+
+def _after_user_change(db_user: User) -> None:
+    """Actualiza las caches del proceso después del commit"""
+    invalidate_current_user(db_user.id)
+    # pop() mueve el contador: una lectura en curso (stamp anterior) no puede
+    # volver a escribir la versión vieja encima de la nueva
+    _token_version_cache.pop(db_user.id)
+    _token_version_cache.set(db_user.id, db_user.token_version)
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Obtener usuario por email"""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
 
-def get_user_by_username(db: Session, username: str) -> Optional[User]:
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
     """Obtener usuario por username"""
-    return db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
 
-def get_user_by_email_or_username(db: Session, identifier: str) -> Optional[User]:
+async def get_user_by_email_or_username(db: AsyncSession, identifier: str) -> Optional[User]:
     """Obtener usuario por email o username"""
-    return db.query(User).filter(
-        or_(User.email == identifier, User.username == identifier)
-    ).first()
+    result = await db.execute(
+        select(User).where(or_(User.email == identifier, User.username == identifier))
+    )
+    return result.scalars().first()
 
 
-def get_users(
-    db: Session, 
+async def get_users(
+    db: AsyncSession, 
     skip: int = 0, 
     limit: int = 100,
     role: Optional[str] = None,
     creator_type: Optional[str] = None
 ) -> List[User]:
     """Obtener lista de usuarios con paginación"""
-    query = db.query(User)
+    query = select(User)
     
     if role:
-        query = query.filter(User.role == role)
+        query = query.where(User.role == role)
     
     if creator_type:
-        query = query.filter(User.creator_type == creator_type)
+        query = query.where(User.creator_type == creator_type)
     
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    return list(result.scalars().all())
 
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Crear nuevo usuario"""
-    hashed_password = get_password_hash(user.password)
+    # bcrypt es CPU-bound: se ejecuta en el pool de procesos
+    hashed_password = await passwords.hash_password(user.password)
     
     db_user = User(
         email=user.email,
         username=user.username,
         hashed_password=hashed_password,
-        name=user.username
+        #name=user.username  # 'name' no es columna del modelo User
         #profile_picture=getattr(user, 'profile_picture', None),
         #is_event_creator=user.is_event_creator or False,
         #event_category=user.event_category
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 
-def update_user(db: Session, user_id: UUID, user_update: UserUpdate) -> Optional[User]:
+async def update_user(db: AsyncSession, user_id: UUID, user_update: UserUpdate) -> Optional[User]:
     """
     Actualizar usuario.
     Solo permite actualizar: profile_picture
@@ -99,7 +153,7 @@ def update_user(db: Session, user_id: UUID, user_update: UserUpdate) -> Optional
      allowed_fields = {'profile_picture', 'bio'}  # Ejemplo
 
     """
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     
     if not db_user:
         return None
@@ -110,59 +164,84 @@ def update_user(db: Session, user_id: UUID, user_update: UserUpdate) -> Optional
     # Lista blanca de campos permitidos para actualizar
     allowed_fields = {'profile_picture', 'role','creator_type','bio'}
     
+    # Campos que viajan como claims en los tokens stateless
+    claim_fields = {'role', 'creator_type'}
+    claims_changed = False
+    
     # Filtrar solo campos permitidos
     for field, value in update_data.items():
         if field in allowed_fields:
+            if field in claim_fields and getattr(db_user, field) != value:
+                claims_changed = True
             setattr(db_user, field, value)
     
-    db.commit()
-    db.refresh(db_user)
+    if claims_changed:
+        _bump_token_version(db_user)
+    
+    await db.commit()
+    _after_user_change(db_user)
+    await db.refresh(db_user)
     
     return db_user
 
 
-def delete_user(db: Session, user_id: UUID) -> bool:
+async def delete_user(db: AsyncSession, user_id: UUID) -> bool:
     """Eliminar usuario"""
-    db_user = get_user(db, user_id)
+    db_user = await get_user(db, user_id)
     
     if not db_user:
         return False
     
-    db.delete(db_user)
-    db.commit()
+    # Sus marcas se borran por cascada: descontarlas de los contadores
+    await crud_event_stats.subtract_user_marks(db, user_id)
+    await db.delete(db_user)
+    await db.commit()
+    invalidate_current_user(user_id)
+    _token_version_cache.pop(user_id)
     
     return True
 
 
-def authenticate_user(db: Session, identifier: str, password: str) -> Optional[User]:
+async def authenticate_user(db: AsyncSession, identifier: str, password: str) -> Optional[User]:
     """
     Autenticar usuario con email/username y contraseña.
     Devuelve el usuario si las credenciales son correctas, None si no.
+    Si el hash guardado no usa el costo de bcrypt actual, lo regenera.
     """
-    user = get_user_by_email_or_username(db, identifier)
+    user = await get_user_by_email_or_username(db, identifier)
     
     if not user:
         return None
     
-    if not verify_password(password, user.hashed_password):
+    if not await passwords.check_password(password, user.hashed_password):
         return None
     
+    if passwords.needs_rehash(user.hashed_password):
+        try:
+            user.hashed_password = await passwords.hash_password(password)
+            await db.commit()
+        except passwords.PasswordHashingBusy:
+            # El login no falla por esto: se reintenta en el próximo
+            pass
+    
     return user
 
 
-def change_password(db: Session, user_id: UUID, old_password: str, new_password: str) -> bool:
+async def change_password(db: AsyncSession, user_id: UUID, old_password: str, new_password: str) -> bool:
     """Cambiar contraseña del usuario"""
-    user = get_user(db, user_id)
+    user = await get_user(db, user_id)
     
     if not user:
         return False
     
     # Verificar contraseña actual
-    if not verify_password(old_password, user.hashed_password):
+    if not await passwords.check_password(old_password, user.hashed_password):
         return False
     
     # Actualizar con nueva contraseña
-    user.hashed_password = get_password_hash(new_password)
-    db.commit()
+    user.hashed_password = await passwords.hash_password(new_password)
+    _bump_token_version(user)
+    await db.commit()
+    _after_user_change(user)
     
     return True
\ No newline at end of file
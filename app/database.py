@@ -1,15 +1,66 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 import os
 from dotenv import load_dotenv
 
+from app.config import settings
+from app.monitoring.pool import instrumented_pool_class
+from app.monitoring.routes import instrument_queries
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+
+def get_async_database_url(url: str) -> str:
+    """
+    Convierte la URL síncrona (psycopg2) en una URL para asyncpg.
+    asyncpg no entiende 'sslmode', usa 'ssl' con los mismos valores.
+    """
+    async_url = make_url(url).set(drivername="postgresql+asyncpg")
+    query = dict(async_url.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return async_url.set(query=query).render_as_string(hide_password=False)
+
+
+# Configuración del pool, común a ambos engines
+POOL_OPTIONS = dict(
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+engine = create_engine(
+    DATABASE_URL,
+    poolclass=instrumented_pool_class("sync", QueuePool),
+    **POOL_OPTIONS
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Engine y sesiones async (asyncpg) para los routers async
+async_engine = create_async_engine(
+    get_async_database_url(DATABASE_URL),
+    poolclass=instrumented_pool_class("async", AsyncAdaptedQueuePool),
+    **POOL_OPTIONS
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # Los objetos se serializan después del commit
+)
+
+# Consultas y tiempo de BD por request (ver app/monitoring/routes.py)
+if settings.METRICS_ENABLED:
+    instrument_queries(engine)
+    instrument_queries(async_engine.sync_engine)
+
 Base = declarative_base()
 
 # Dependencia para obtener sesión de BD en cada request
@@ -18,4 +69,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependencia async: no ocupa un hilo del threadpool durante el round-trip a la BD
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,36 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from pydantic import GetCoreSchemaHandler
+from pydantic_core import core_schema
+
+
+# ==================== FECHAS SIN ZONA HORARIA ====================
+# Las columnas de fecha son TIMESTAMP WITHOUT TIME ZONE y asyncpg no acepta
+# datetimes con zona para ellas (psycopg2 se las pasaba a PostgreSQL como texto).
+# Las fechas que llegan con offset (2025-01-01T00:00:00Z, ...-03:00) se pasan
+# a UTC y se usan sin zona; las que llegan sin zona quedan como están.
+
+
+def to_naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """datetime con zona -> mismo instante en UTC, sin tzinfo"""
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_now() -> datetime:
+    """Ahora en UTC sin tzinfo, comparable con las fechas guardadas (p.ej. start_time)"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class NaiveUTCDatetime(datetime):
+    """
+    datetime validado con to_naive_utc, para query params (= Query(...)) y
+    campos de los schemas. Es un tipo y no Annotated[datetime, AfterValidator]:
+    FastAPI descarta los validadores de Annotated si el parámetro tiene = Query(...).
+    """
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source: Any, handler: GetCoreSchemaHandler) -> core_schema.CoreSchema:
+        return core_schema.no_info_after_validator_function(to_naive_utc, handler(datetime))
@@ -0,0 +1,24 @@
+"""
+Calcula events.series_end de las series recurrentes creadas antes de la migración 009.
+
+Mientras series_end es NULL la serie se trata como abierta: los resultados son
+los mismos, pero /events/by-date-range/ la sigue leyendo aunque haya terminado.
+
+Uso (una vez, después de aplicar la migración):
+    python -m app.jobs.backfill_series_end
+"""
+import asyncio
+
+from app.crud import events as crud_events
+from app.database import AsyncSessionLocal, async_engine
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        ended = await crud_events.backfill_series_end(db)
+    await async_engine.dispose()
+    print(f"events.series_end: {ended} series con fin calculado")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
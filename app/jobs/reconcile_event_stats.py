@@ -0,0 +1,21 @@
+"""
+Recalcula los contadores de event_stats desde la tabla assist.
+
+Uso (por ejemplo desde cron, fuera de hora pico):
+    python -m app.jobs.reconcile_event_stats
+"""
+import asyncio
+
+from app.crud import event_stats as crud_event_stats
+from app.database import AsyncSessionLocal, async_engine
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        fixed = await crud_event_stats.reconcile_event_stats(db)
+    await async_engine.dispose()
+    print(f"event_stats: {fixed} eventos corregidos")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
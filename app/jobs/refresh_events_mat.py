@@ -0,0 +1,24 @@
+"""
+Recalcula events_with_location_mat completa desde la vista events_with_location.
+
+La API la mantiene al crear/editar eventos; este job corrige lo que cambia
+por fuera (por ejemplo, el nombre de una locación).
+
+Uso (por ejemplo desde cron, fuera de hora pico):
+    python -m app.jobs.refresh_events_mat
+"""
+import asyncio
+
+from app.crud import events as crud_events
+from app.database import AsyncSessionLocal, async_engine
+
+
+async def main() -> None:
+    async with AsyncSessionLocal() as db:
+        upserted, deleted = await crud_events.refresh_materialized_events(db)
+    await async_engine.dispose()
+    print(f"events_with_location_mat: {upserted} eventos actualizados, {deleted} borrados")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
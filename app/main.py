@@ -1,18 +1,60 @@
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
 from fastapi import FastAPI
-from fastapi import FastAPI
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.security import HTTPBearer
 from app.routers import favorites
-from app.database import Base
+from app.database import Base, async_engine
+from app import passwords
+from app.config import settings
+from app.monitoring.profiling import ProfilingMiddleware
+from app.monitoring.routes import MetricsMiddleware
 from app.routers import events,  assists, auth  # 👈Importa los routerpip freeze 
+from app.routers import internal
 
 
 #Base.metadata.create_all(bind=engine)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Inicio: calibrar el costo de bcrypt para este host (opcional)
+    if settings.BCRYPT_TARGET_MS:
+        await passwords.calibrate_rounds(settings.BCRYPT_TARGET_MS)
+    yield
+    # Apagado: cerrar el pool de hashing y las conexiones async
+    passwords.shutdown_pool()
+    await async_engine.dispose()
+
+
 app = FastAPI(
     title="Eventos API",
     description="API para gestión de eventos",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    # orjson en vez de json de la stdlib para todas las respuestas (ver también app/responses.py)
+    default_response_class=ORJSONResponse
 )
+
+
+# 👇 Perfilado opt-in de requests (X-Profile: 1 o muestreo), ver app/monitoring/profiling.py
+if settings.PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+
+# 👇 Latencia, status y consultas a la BD por ruta (GET /internal/metrics)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
+
+# 👇 Pool de hashing de contraseñas saturado (ráfaga de logins)
+@app.exception_handler(passwords.PasswordHashingBusy)
+async def password_hashing_busy_handler(request: Request, exc: passwords.PasswordHashingBusy):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Servicio ocupado, intente nuevamente en unos segundos"},
+        headers={"Retry-After": "1"}
+    )
+
 # 👇 Configuración global de seguridad para Swagger UI
 security = HTTPBearer()
 
@@ -21,6 +63,7 @@ app.include_router(events.router)
 app.include_router(assists.router)
 app.include_router(auth.router)
 app.include_router(favorites.router)
+app.include_router(internal.router)
 
 # Endpoint Ruta raíz
 @app.get("/")
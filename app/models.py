@@ -3,6 +3,7 @@ import uuid
 from sqlalchemy import UUID, Boolean, CheckConstraint, Column, ForeignKey, Integer, String, DateTime, Text, UniqueConstraint, func
 from sqlalchemy.dialects.postgresql import UUID as PG_UUID
 from .database import Base
+from .config import settings
 from enum import Enum
 
 class Event(Base):
@@ -21,6 +22,7 @@ class Event(Base):
     end_time = Column(DateTime)
     is_recurring = Column(Boolean, default=False)
     recurrence_rule = Column(Text)
+    series_end = Column(DateTime)  # Última ocurrencia de la serie (NULL: no termina)
     created_by = Column(UUID(as_uuid=True))
     status = Column(Text, default='active')
     created_at = Column(DateTime)
@@ -29,8 +31,12 @@ class Event(Base):
 
      
 
+# Vista events_with_location (JOIN events/locations en cada consulta)
+EVENTS_WITH_LOCATION_VIEW = "events_with_location"
+
 class EventWithLocationView(Base):
-    __tablename__ = "events_with_location"
+    # Con EVENTS_MATERIALIZED se lee la copia materializada (misma estructura, con índices)
+    __tablename__ = "events_with_location_mat" if settings.EVENTS_MATERIALIZED else EVENTS_WITH_LOCATION_VIEW
     __table_args__ = {'schema': 'public'}
     
     id = Column(UUID(as_uuid=True), primary_key=True)
@@ -43,6 +49,10 @@ class EventWithLocationView(Base):
     location_name = Column(String)  # ✅ Campo extra de la vista
     created_by =  Column(UUID)
     created_at = Column(DateTime, nullable=False)
+    edited_at = Column(DateTime)  # ETag de GET /events/{id}
+    is_recurring = Column(Boolean)
+    recurrence_rule = Column(Text)
+    series_end = Column(DateTime)
 
     def __repr__(self):
         return f"<EventWithLocation(id={self.id}, location_id={self.location_id}, title={self.title})>"
@@ -55,6 +65,13 @@ class User(Base):
     name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False)
 '''
+class EventCategory(Base):
+    """Relación N:N eventos - categorías (tabla event_categories)"""
+    __tablename__ = "event_categories"
+    
+    event_id = Column(UUID(as_uuid=True), ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    category_id = Column(Integer, primary_key=True)  # ForeignKey("categories.id"), sin modelo Category
+
 class Assist(Base):
     __tablename__ = "assist"
     
@@ -70,6 +87,17 @@ class Assist(Base):
         UniqueConstraint('user_id', 'event_id', 'status', name='unique_user_event_status'),
     )
 
+class EventStats(Base):
+    """Contadores materializados de assists/likes por evento (ver app/crud/event_stats.py)"""
+    __tablename__ = "event_stats"
+    
+    event_id = Column(UUID(as_uuid=True), ForeignKey('events.id', ondelete='CASCADE'), primary_key=True)
+    total_assists = Column(Integer, nullable=False, default=0, server_default='0')
+    total_likes = Column(Integer, nullable=False, default=0, server_default='0')
+    
+    def __repr__(self):
+        return f"<EventStats event={self.event_id} assists={self.total_assists} likes={self.total_likes}>"
+
 class User(Base):
     __tablename__ = "users"
     
@@ -84,6 +112,9 @@ class User(Base):
     role = Column(String, default='user', nullable=False)
     creator_type = Column(String, nullable=True)
     
+    # Versión de los tokens: se incrementa al cambiar contraseña o rol (revoca tokens stateless)
+    token_version = Column(Integer, default=0, server_default='0', nullable=False)
+    
     # Timestamp
     created_at = Column(DateTime, default=datetime.now, server_default=func.now(), nullable=False)
     
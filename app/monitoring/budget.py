@@ -0,0 +1,134 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== PRESUPUESTO DE CONSULTAS POR REQUEST ====================
+# QUERY_BUDGETS = {"GET /events/{event_id}": 3, ...} (ruta como en el router) y
+# QUERY_BUDGET_DEFAULT para el resto. Si un request hace más consultas, o repite
+# la misma sentencia N_PLUS_ONE_THRESHOLD veces o más, se registra un warning
+# con la huella de la sentencia.
+
+_WHITESPACE = re.compile(r"\s+")
+# $1, $2 (asyncpg, con el cast que agrega SQLAlchemy: $1::UUID,
+# $2::TIMESTAMP WITHOUT TIME ZONE) / %(name)s (psycopg2) / listas expandidas de IN
+_PLACEHOLDER = (
+    r"(?:\$\d+|%\(\w+\)s|\?)"
+    r"(?:::\w+(?: (?:WITH|WITHOUT) TIME ZONE)?(?:\(\d+(?:,\s*\d+)?\))?(?:\[\])?)?"
+)
+_PLACEHOLDER_LIST = re.compile(rf"{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def fingerprint(statement: str) -> str:
+    """Sentencia normalizada: parámetros, listas de IN y literales como ?"""
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    statement = _LITERAL.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def get_query_budget(method: str, route: str) -> Optional[int]:
+    """Máximo de consultas para la ruta (None: sin límite)"""
+    return settings.QUERY_BUDGETS.get(f"{method} {route}", settings.QUERY_BUDGET_DEFAULT)
+
+
+def repeated_statements(statements: Dict[str, int], threshold: int) -> List[Tuple[str, int]]:
+    """(huella, veces) de las sentencias repetidas threshold veces o más"""
+    counts = Counter()
+    for statement, count in statements.items():
+        counts[fingerprint(statement)] += count
+    return [(statement, count) for statement, count in counts.most_common() if count >= threshold]
+
+
+@dataclass
+class QueryReport:
+    """Resultado del control de un request"""
+    method: str
+    route: str
+    queries: int
+    budget: Optional[int]
+    suspects: List[Tuple[str, int]]  # posibles N+1: (huella, veces)
+
+    @property
+    def over_budget(self) -> bool:
+        return self.budget is not None and self.queries > self.budget
+
+
+# Requests capturados por capture_requests() (pruebas)
+_captured_requests: ContextVar[Optional[List[QueryReport]]] = ContextVar("captured_requests", default=None)
+
+
+def check_request(method: str, route: str, queries: int, statements: Dict[str, int]) -> QueryReport:
+    """Controla presupuesto y N+1 de un request terminado (lo llama MetricsMiddleware)"""
+    threshold = settings.N_PLUS_ONE_THRESHOLD
+    report = QueryReport(
+        method=method,
+        route=route,
+        queries=queries,
+        budget=get_query_budget(method, route),
+        # Sin repeticiones no hace falta normalizar nada
+        suspects=repeated_statements(statements, threshold) if threshold and queries >= threshold else [],
+    )
+
+    if report.over_budget:
+        logger.warning(
+            "Presupuesto de consultas superado en %s %s: %d consultas (máximo %d)",
+            method, route, queries, report.budget
+        )
+    for statement, count in report.suspects:
+        logger.warning("Posible N+1 en %s %s: %d veces %s", method, route, count, statement)
+
+    captured = _captured_requests.get()
+    if captured is not None:
+        captured.append(report)
+
+    return report
+
+
+# ==================== AYUDAS PARA PRUEBAS ====================
+
+@contextmanager
+def capture_requests() -> Iterator[List[QueryReport]]:
+    """
+    Junta los QueryReport de los requests atendidos dentro del bloque.
+    La app tiene que correr en la misma tarea (httpx.AsyncClient con ASGITransport).
+    """
+    captured: List[QueryReport] = []
+    token = _captured_requests.set(captured)
+    try:
+        yield captured
+    finally:
+        _captured_requests.reset(token)
+
+
+async def assert_query_budget(client, method: str, url: str, max_queries: Optional[int] = None, **kwargs):
+    """
+    Hace el request con client (httpx.AsyncClient sobre la app) y falla con
+    AssertionError si supera max_queries (por defecto, el presupuesto de la ruta)
+    o si repite una sentencia N_PLUS_ONE_THRESHOLD veces. Devuelve la respuesta.
+
+        response = await assert_query_budget(client, "GET", f"/events/{event_id}", max_queries=2)
+    """
+    with capture_requests() as captured:
+        response = await client.request(method, url, **kwargs)
+
+    assert captured, "El request no pasó por MetricsMiddleware (METRICS_ENABLED=false?)"
+    report = captured[-1]
+    budget = max_queries if max_queries is not None else report.budget
+
+    problems = []
+    if budget is not None and report.queries > budget:
+        problems.append(f"{report.queries} consultas (máximo {budget})")
+    problems.extend(f"posible N+1, {count} veces: {statement}" for statement, count in report.suspects)
+
+    assert not problems, f"{method} {report.route}: " + "; ".join(problems)
+    return response
@@ -0,0 +1,42 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Sequence
+
+
+# Buckets por defecto (segundos), mismos límites que usa Prometheus
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """
+    Histograma acumulativo de buckets fijos.
+    observe() es O(log n) y seguro entre hilos (el engine síncrono corre en el threadpool).
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+
+    def snapshot(self) -> Dict:
+        """Buckets acumulados (le -> count), count y sum"""
+        with self._lock:
+            counts = list(self._counts)
+            total_sum = self._sum
+
+        cumulative = {}
+        running = 0
+        for bound, count in zip(self.buckets, counts):
+            running += count
+            cumulative[str(bound)] = running
+        running += counts[-1]
+        cumulative["+Inf"] = running
+
+        return {"buckets": cumulative, "count": running, "sum": total_sum}
@@ -0,0 +1,63 @@
+import time
+from typing import Dict, Type
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+from app.monitoring.histogram import Histogram
+
+
+class PoolMetrics:
+    """Métricas acumuladas de un pool: tiempo de checkout y timeouts"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkout_wait = Histogram()
+        self.timeouts = 0
+
+
+# Registro global: nombre del engine -> métricas
+pool_metrics: Dict[str, PoolMetrics] = {}
+
+
+def instrumented_pool_class(name: str, base: Type[Pool]) -> Type[Pool]:
+    """
+    Crea una subclase del pool que mide cuánto tarda cada checkout
+    (espera en la cola + pre-ping + conexión nueva si hay overflow).
+    Se usa como poolclass= en create_engine / create_async_engine.
+    """
+    metrics = pool_metrics.setdefault(name, PoolMetrics(name))
+
+    class InstrumentedPool(base):
+        def connect(self):
+            start = time.perf_counter()
+            try:
+                return super().connect()
+            except exc.TimeoutError:
+                metrics.timeouts += 1
+                raise
+            finally:
+                metrics.checkout_wait.observe(time.perf_counter() - start)
+
+    InstrumentedPool.__name__ = f"Instrumented{base.__name__}"
+    return InstrumentedPool
+
+
+def pool_stats(name: str, engine: Engine) -> Dict:
+    """Estado actual del pool del engine más sus métricas acumuladas"""
+    pool = engine.pool
+    metrics = pool_metrics.get(name)
+
+    stats = {
+        "pool_class": type(pool).__name__,
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": pool.overflow(),
+    }
+    if metrics:
+        stats["timeouts"] = metrics.timeouts
+        stats["checkout_wait_seconds"] = metrics.checkout_wait.snapshot()
+
+    return stats
@@ -0,0 +1,135 @@
+import asyncio
+import cProfile
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+from collections import Counter
+from datetime import datetime
+
+from app.config import settings
+
+
+# ==================== PERFILADO POR REQUEST (OPT-IN) ====================
+# Con PROFILING_ENABLED se perfila un request si trae X-Profile: 1 junto con el
+# X-Internal-Token válido, o al azar con probabilidad PROFILING_SAMPLE_RATE.
+# Se guardan en PROFILING_DIR:
+#   <id>.prof    cProfile (snakeviz, python -m pstats)
+#   <id>.folded  pilas muestreadas en formato "collapsed" (flamegraph.pl, speedscope)
+# y la respuesta lleva X-Profile-Id / X-Profile-Url (GET /internal/profiles/...).
+#
+# Se perfila el hilo del event loop: incluye lo que hagan otros requests
+# concurrentes en ese lapso, y no los endpoints síncronos del threadpool.
+
+PROFILE_ID = re.compile(r"^\d{8}-\d{6}-[0-9a-f]{8}$")
+
+# Un solo perfil a la vez por proceso (cProfile no admite dos activos)
+_profile_lock = threading.Lock()
+
+
+def profile_path(profile_id: str, extension: str) -> str:
+    return os.path.join(settings.PROFILING_DIR, f"{profile_id}.{extension}")
+
+
+def _requested(scope) -> bool:
+    """X-Profile: 1 con el token interno (solo administradores)"""
+    if not settings.INTERNAL_API_TOKEN:
+        return False
+    headers = dict(scope["headers"])
+    token = headers.get(b"x-internal-token", b"").decode("latin-1")
+    return headers.get(b"x-profile") == b"1" and secrets.compare_digest(token, settings.INTERNAL_API_TOKEN)
+
+
+def _should_profile(scope) -> bool:
+    if _requested(scope):
+        return True
+    return settings.PROFILING_SAMPLE_RATE > 0 and random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+class StackSampler(threading.Thread):
+    """Muestrea la pila de un hilo cada interval segundos (pilas colapsadas para flame graphs)"""
+
+    def __init__(self, thread_id: int, interval: float):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stopped = threading.Event()
+
+    def run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> Counter:
+        self._stopped.set()
+        self.join()
+        return self.stacks
+
+
+def _write_profile(profile_id: str, profiler: cProfile.Profile, stacks: Counter) -> None:
+    os.makedirs(settings.PROFILING_DIR, exist_ok=True)
+    profiler.dump_stats(profile_path(profile_id, "prof"))
+    with open(profile_path(profile_id, "folded"), "w") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+
+    # Conservar solo los PROFILING_MAX_FILES perfiles más recientes
+    profiles = sorted(name for name in os.listdir(settings.PROFILING_DIR) if name.endswith(".prof"))
+    for name in profiles[:-settings.PROFILING_MAX_FILES]:
+        for extension in ("prof", "folded"):
+            try:
+                os.remove(profile_path(name[:-len(".prof")], extension))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """Middleware ASGI puro: perfila los requests elegidos (ver arriba)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        # Si ya hay otro perfil en curso en este proceso, el request sigue sin perfilar
+        if not _profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = f"{datetime.now():%Y%m%d-%H%M%S}-{secrets.token_hex(4)}"
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-profile-id", profile_id.encode()),
+                    (b"x-profile-url", f"/internal/profiles/{profile_id}.prof".encode()),
+                ]
+            await send(message)
+
+        profiler = cProfile.Profile()
+        sampler = StackSampler(threading.get_ident(), settings.PROFILING_INTERVAL_MS / 1000)
+        try:
+            sampler.start()
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+                stacks = sampler.stop()
+        finally:
+            _profile_lock.release()
+
+        # Escribir a disco fuera del event loop
+        await asyncio.get_running_loop().run_in_executor(None, _write_profile, profile_id, profiler, stacks)
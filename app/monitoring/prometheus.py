@@ -0,0 +1,74 @@
+from typing import Dict, List
+
+from app.monitoring.histogram import Histogram
+from app.monitoring.pool import pool_metrics
+from app.monitoring.routes import route_metrics
+
+
+# Formato de texto de Prometheus (exposition format 0.0.4)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + "}"
+
+
+def _header(lines: List[str], name: str, kind: str, help_text: str) -> None:
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram(lines: List[str], name: str, labels: Dict[str, str], histogram: Histogram) -> None:
+    snapshot = histogram.snapshot()
+    for bound, count in snapshot["buckets"].items():
+        lines.append(f"{name}_bucket{_labels({**labels, 'le': bound})} {count}")
+    lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+
+
+def render_metrics() -> str:
+    """Métricas de este worker en formato de texto de Prometheus"""
+    routes = sorted(route_metrics.items())
+    lines: List[str] = []
+
+    _header(lines, "http_requests_total", "counter", "Requests atendidos por ruta y status")
+    for (method, route), metrics in routes:
+        for status_code, count in sorted(metrics.statuses.items()):
+            labels = {"method": method, "route": route, "status": status_code}
+            lines.append(f"http_requests_total{_labels(labels)} {count}")
+
+    _header(lines, "http_request_duration_seconds", "histogram", "Latencia de los requests por ruta")
+    for (method, route), metrics in routes:
+        _histogram(lines, "http_request_duration_seconds", {"method": method, "route": route}, metrics.latency)
+
+    _header(lines, "http_request_db_queries", "histogram", "Consultas a la BD por request")
+    for (method, route), metrics in routes:
+        _histogram(lines, "http_request_db_queries", {"method": method, "route": route}, metrics.db_queries)
+
+    _header(lines, "http_request_db_seconds", "histogram", "Tiempo en la BD por request")
+    for (method, route), metrics in routes:
+        _histogram(lines, "http_request_db_seconds", {"method": method, "route": route}, metrics.db_time)
+
+    _header(lines, "http_request_query_budget_exceeded_total", "counter", "Requests que superaron su presupuesto de consultas")
+    for (method, route), metrics in routes:
+        labels = {"method": method, "route": route}
+        lines.append(f"http_request_query_budget_exceeded_total{_labels(labels)} {metrics.over_budget}")
+
+    _header(lines, "http_request_n_plus_one_total", "counter", "Requests con una sentencia repetida (posible N+1)")
+    for (method, route), metrics in routes:
+        labels = {"method": method, "route": route}
+        lines.append(f"http_request_n_plus_one_total{_labels(labels)} {metrics.n_plus_one}")
+
+    _header(lines, "db_pool_checkout_wait_seconds", "histogram", "Espera para obtener una conexión del pool")
+    for name, metrics in sorted(pool_metrics.items()):
+        _histogram(lines, "db_pool_checkout_wait_seconds", {"pool": name}, metrics.checkout_wait)
+
+    _header(lines, "db_pool_timeouts_total", "counter", "Checkouts que superaron DB_POOL_TIMEOUT")
+    for name, metrics in sorted(pool_metrics.items()):
+        lines.append(f"db_pool_timeouts_total{_labels({'pool': name})} {metrics.timeouts}")
+
+    return "\n".join(lines) + "\n"
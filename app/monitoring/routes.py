@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.monitoring import budget
+from app.monitoring.histogram import Histogram
+
+
+# Buckets de consultas por request (un N+1 se ve como requests con 50+ consultas)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+
+class RequestStats:
+    """Consultas y tiempo de BD del request en curso"""
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements: Dict[str, int] = {}  # sentencia -> veces (detección de N+1)
+
+
+class RouteMetrics:
+    """Métricas acumuladas de una ruta (método + path de la ruta, no la URL)"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.db_time = Histogram()
+        self.db_queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.statuses: Dict[int, int] = defaultdict(int)
+        self.over_budget = 0  # requests que superaron el presupuesto de consultas
+        self.n_plus_one = 0  # requests con alguna sentencia repetida (posible N+1)
+
+
+# Request en curso: lo fija el middleware, lo leen los hooks de SQLAlchemy.
+# Llega a las consultas async (greenlet de SQLAlchemy) y a las síncronas (threadpool).
+_current_request: ContextVar[Optional[RequestStats]] = ContextVar("current_request", default=None)
+
+# Registro global: (método, ruta) -> métricas
+route_metrics: Dict[Tuple[str, str], RouteMetrics] = {}
+_registry_lock = threading.Lock()
+
+# Requests que no coinciden con ninguna ruta (404): un solo grupo
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def _get_route_metrics(method: str, route: str) -> RouteMetrics:
+    key = (method, route)
+    metrics = route_metrics.get(key)
+    if metrics is None:
+        with _registry_lock:
+            metrics = route_metrics.setdefault(key, RouteMetrics())
+    return metrics
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro (sin BaseHTTPMiddleware: no copia el body ni crea tareas).
+    Mide la latencia de cada request y la agrupa por la ruta que lo atendió,
+    junto con el status y las consultas hechas a la BD (con su presupuesto,
+    ver app/monitoring/budget.py).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current_request.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _current_request.reset(token)
+
+            # El router de Starlette deja la ruta elegida en el scope
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            metrics = _get_route_metrics(scope["method"], route)
+            metrics.latency.observe(elapsed)
+            metrics.db_time.observe(stats.db_seconds)
+            metrics.db_queries.observe(stats.queries)
+            metrics.statuses[status_code] += 1
+
+            report = budget.check_request(scope["method"], route, stats.queries, stats.statements)
+            if report.over_budget:
+                metrics.over_budget += 1
+            if report.suspects:
+                metrics.n_plus_one += 1
+
+
+# ==================== CONSULTAS A LA BD ====================
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_request.get() is not None:
+        # En el contexto de ejecución: si la consulta falla no queda nada pendiente
+        context._metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_request.get()
+    if stats is None:
+        return
+    start = getattr(context, "_metrics_start", None)
+    if start is not None:
+        stats.db_seconds += time.perf_counter() - start
+    stats.queries += 1
+    stats.statements[statement] = stats.statements.get(statement, 0) + 1
+
+
+def instrument_queries(engine: Engine) -> None:
+    """
+    Registra los hooks que atribuyen cada consulta al request en curso.
+    Para el engine async se pasa async_engine.sync_engine.
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
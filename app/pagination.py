@@ -0,0 +1,60 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, status
+
+
+# ==================== CURSORES (KEYSET PAGINATION) ====================
+# El cursor es opaco para el cliente: base64url de una lista JSON con los
+# valores de la clave de orden del último elemento de la página, p.ej.
+# (start_time, id). La página siguiente filtra "clave > cursor" usando el
+# índice, así la página N cuesta lo mismo que la primera.
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+def encode_cursor(*values: Any) -> str:
+    """Codifica los valores de la clave de orden en un cursor opaco"""
+    raw = json.dumps([_to_json(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, types: Sequence[Callable[[Any], Any]]) -> Tuple:
+    """
+    Decodifica un cursor y convierte cada valor con el tipo indicado
+    (p.ej. (datetime.fromisoformat, UUID)). Un cursor inválido es un 400.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise ValueError("cursor length")
+        return tuple(convert(value) for convert, value in zip(types, values))
+    except (ValueError, TypeError, UnicodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor inválido"
+        )
+
+
+def build_page(rows: Sequence[Any], limit: int, cursor_key: Callable[[Any], Tuple]) -> dict:
+    """
+    Arma el envelope de una página a partir de limit + 1 filas:
+    la fila extra solo indica que hay página siguiente.
+    """
+    items: List[Any] = list(rows[:limit])
+    next_cursor: Optional[str] = None
+
+    if len(rows) > limit and items:
+        next_cursor = encode_cursor(*cursor_key(items[-1]))
+
+    return {"items": items, "next_cursor": next_cursor}
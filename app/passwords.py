@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import bcrypt
+
+from app.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Límites del costo de bcrypt aceptados (por debajo de 10 es demasiado débil)
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+
+_HASH_ROUNDS_RE = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+
+class PasswordHashingBusy(Exception):
+    """El pool de hashing tiene la cola llena: se responde 503"""
+
+
+def get_password_hash(password: str, rounds: int = 12) -> str:
+    """Hash a password using bcrypt"""
+    pwd_bytes = password.encode('utf-8')
+    salt = bcrypt.gensalt(rounds=rounds)
+    hashed = bcrypt.hashpw(pwd_bytes, salt)
+    return hashed.decode('utf-8')
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against a hash"""
+    return bcrypt.checkpw(
+        plain_password.encode('utf-8'),
+        hashed_password.encode('utf-8')
+    )
+
+
+def measure_hash_seconds(rounds: int, samples: int = 3) -> float:
+    """Tiempo mínimo de un hash bcrypt con ese costo en este host"""
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration-password", bcrypt.gensalt(rounds=rounds))
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def hash_rounds(hashed_password: str) -> Optional[int]:
+    """Costo con el que se generó un hash bcrypt ($2b$12$... -> 12)"""
+    match = _HASH_ROUNDS_RE.match(hashed_password or "")
+    return int(match.group(1)) if match else None
+
+
+# ==================== COSTO OBJETIVO ====================
+
+_target_rounds = min(max(settings.BCRYPT_ROUNDS, MIN_ROUNDS), MAX_ROUNDS)
+
+
+def get_target_rounds() -> int:
+    return _target_rounds
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    True si el hash guardado tiene menor costo que el objetivo actual.
+    Nunca se baja el costo: cada proceso calibra el suyo, y si dos workers
+    quedan con costos distintos no deben regenerar uno los hashes del otro.
+    """
+    rounds = hash_rounds(hashed_password)
+    return rounds is None or rounds < _target_rounds
+
+
+def rounds_for_target(target_ms: float, base_rounds: int, base_seconds: float) -> int:
+    """
+    Mayor costo cuyo hash no supere target_ms.
+    Cada +1 en el costo duplica el tiempo de bcrypt.
+    """
+    if base_seconds <= 0:
+        return MAX_ROUNDS
+    extra = math.floor(math.log2((target_ms / 1000) / base_seconds))
+    return min(max(base_rounds + extra, MIN_ROUNDS), MAX_ROUNDS)
+
+
+# ==================== POOL DE PROCESOS ====================
+# bcrypt consume ~250ms de CPU por llamada: corre en procesos aparte para que
+# una ráfaga de logins no deje sin hilos/CPU al resto de los endpoints.
+# Usa "spawn": los scripts que importen la app deben tener if __name__ == "__main__".
+
+_executor: Optional[ProcessPoolExecutor] = None
+_pending = 0  # tareas en ejecución + en cola (solo se toca desde el event loop)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _executor
+
+
+def shutdown_pool() -> None:
+    """Cerrar el pool (al apagar la app)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def _run_in_pool(func, *args):
+    global _executor, _pending
+    
+    if _pending >= settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHashingBusy()
+    
+    _pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    except BrokenProcessPool:
+        # Un worker murió: el próximo request crea un pool nuevo
+        _executor = None
+        raise
+    finally:
+        _pending -= 1
+
+
+async def hash_password(password: str) -> str:
+    """get_password_hash (con el costo objetivo) en el pool de procesos"""
+    return await _run_in_pool(get_password_hash, password, _target_rounds)
+
+
+async def check_password(plain_password: str, hashed_password: str) -> bool:
+    """verify_password en el pool de procesos"""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
+
+
+async def calibrate_rounds(target_ms: float) -> int:
+    """
+    Mide el tiempo de hash en este host (dentro del pool) y ajusta el costo
+    objetivo para que un hash tarde como máximo target_ms.
+    """
+    global _target_rounds
+    
+    base_seconds = await _run_in_pool(measure_hash_seconds, MIN_ROUNDS)
+    _target_rounds = rounds_for_target(target_ms, MIN_ROUNDS, base_seconds)
+    
+    logger.info(
+        "bcrypt calibrado: costo %s (costo %s = %.1f ms, objetivo %s ms)",
+        _target_rounds, MIN_ROUNDS, base_seconds * 1000, target_ms
+    )
+    return _target_rounds
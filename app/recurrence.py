@@ -0,0 +1,213 @@
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from dateutil.parser import parse as parse_datetime
+from dateutil.rrule import rrulestr
+
+from app.cache import TTLCache
+from app.config import settings
+from app.dates import to_naive_utc
+
+logger = logging.getLogger(__name__)
+
+
+# ==================== EVENTOS RECURRENTES (RRULE) ====================
+# recurrence_rule es una RRULE de RFC 5545 (p.ej. "FREQ=WEEKLY;BYDAY=MO,WE")
+# y start_time/end_time son la primera ocurrencia. Las ocurrencias se generan
+# solo dentro de la ventana pedida y se guardan en cache por evento.
+# Todas las fechas se manejan sin zona (UTC, como en la BD; ver app/dates.py).
+
+
+# Frecuencias de período fijo: se puede adelantar DTSTART hasta la ventana
+# sin cambiar las ocurrencias (MONTHLY/YEARLY generan pocas por año)
+_FIXED_PERIODS = {
+    "WEEKLY": timedelta(weeks=1),
+    "DAILY": timedelta(days=1),
+    "HOURLY": timedelta(hours=1),
+    "MINUTELY": timedelta(minutes=1),
+    "SECONDLY": timedelta(seconds=1),
+}
+
+# Cache de ocurrencias: event_id -> (versión del evento, {ventana: starts})
+_occurrence_cache = TTLCache(
+    maxsize=settings.RECURRENCE_CACHE_SIZE,
+    ttl=settings.RECURRENCE_CACHE_TTL_SECONDS
+)
+
+# Ventanas guardadas por evento (las más recientes)
+_MAX_WINDOWS_PER_EVENT = 8
+
+# series_end con COUNT se calcula recorriendo la serie: más ocurrencias que
+# esto se guardan como serie abierta (NULL)
+_SERIES_END_MAX_COUNT = 100_000
+
+
+def _rule_parts(rule: str) -> Dict[str, str]:
+    """'FREQ=DAILY;INTERVAL=2' -> {'FREQ': 'DAILY', 'INTERVAL': '2'}"""
+    rule = rule.strip()
+    if rule.upper().startswith("RRULE:"):
+        rule = rule[len("RRULE:"):]
+    return dict(
+        part.split("=", 1) for part in rule.upper().split(";") if "=" in part
+    )
+
+
+def _parse_rule(rule: str, dtstart: datetime):
+    """
+    rrulestr() con las convenciones de la app: DTSTART sin zona, así que un
+    UNTIL en UTC (20251231T235959Z, la forma de RFC 5545) se pasa a UTC sin zona
+    (ver app/dates.py). INTERVAL < 1 no avanza nunca: ValueError.
+    """
+    parts = _rule_parts(rule)
+    if int(parts.get("INTERVAL", "1")) < 1:
+        raise ValueError("INTERVAL must be a positive integer")
+
+    if parts.get("UNTIL", "").endswith("Z"):
+        until = to_naive_utc(parse_datetime(parts["UNTIL"]))
+        rule = rule.strip()
+        if rule.upper().startswith("RRULE:"):
+            rule = rule[len("RRULE:"):]
+        rule = ";".join(
+            f"UNTIL={until:%Y%m%dT%H%M%S}" if part.strip().upper().startswith("UNTIL=") else part
+            for part in rule.split(";")
+        )
+
+    return rrulestr(rule, dtstart=to_naive_utc(dtstart), cache=False)
+
+
+def validate_rule(rule: str) -> str:
+    """Verifica que la RRULE sea válida (ValueError si no)"""
+    try:
+        _parse_rule(rule, datetime(2000, 1, 1))
+    except (ValueError, TypeError, OverflowError) as e:
+        raise ValueError(f"Invalid recurrence_rule: {e}")
+    return rule
+
+
+def series_end(rule: Optional[str], dtstart: datetime) -> Optional[datetime]:
+    """
+    Cota del inicio de la última ocurrencia: UNTIL, o la última de las COUNT.
+    None si la serie no termina (o la regla no es válida). Se guarda en
+    events.series_end para no expandir las series que ya terminaron.
+    """
+    if not rule:
+        return None
+
+    parts = _rule_parts(rule)
+    try:
+        occurrences = _parse_rule(rule, dtstart)
+        if "UNTIL" in parts:
+            return to_naive_utc(parse_datetime(parts["UNTIL"]))
+        if "COUNT" in parts and int(parts["COUNT"]) <= _SERIES_END_MAX_COUNT:
+            last = None
+            for last in occurrences:
+                pass
+            return last
+    except (ValueError, TypeError, OverflowError):
+        # Reglas viejas sin validar: quedan abiertas y expand() las omite
+        pass
+    return None
+
+
+def _aligned_dtstart(rule: str, dtstart: datetime, window_start: datetime) -> datetime:
+    """
+    DTSTART adelantado a la ventana en períodos completos (FREQ * INTERVAL),
+    para no recorrer la serie desde el principio. Con COUNT o BYSETPOS hay que
+    contar desde la primera ocurrencia: se usa el DTSTART original.
+    """
+    parts = _rule_parts(rule)
+    period = _FIXED_PERIODS.get(parts.get("FREQ"))
+
+    if period is None or "COUNT" in parts or "BYSETPOS" in parts or window_start <= dtstart:
+        return dtstart
+
+    period = period * int(parts.get("INTERVAL", "1"))
+    if period <= timedelta(0):
+        # INTERVAL < 1 (filas sin validar): _parse_rule la rechaza
+        return dtstart
+    return dtstart + period * ((window_start - dtstart) // period)
+
+
+def expand(rule: str, dtstart: datetime, window_start: datetime, window_end: datetime) -> Tuple[datetime, ...]:
+    """Inicios de las ocurrencias entre window_start y window_end (inclusive)"""
+    # dtstart viene sin zona de la BD: la ventana tiene que ser comparable
+    dtstart, window_start, window_end = (
+        to_naive_utc(dtstart), to_naive_utc(window_start), to_naive_utc(window_end)
+    )
+    aligned = _aligned_dtstart(rule, dtstart, window_start)
+    occurrences = _parse_rule(rule, aligned)
+
+    starts = []
+    for start in occurrences.xafter(window_start, count=settings.RECURRENCE_MAX_OCCURRENCES, inc=True):
+        if start > window_end:
+            break
+        starts.append(start)
+
+    return tuple(starts)
+
+
+def get_occurrences(
+    event_id: Hashable,
+    version: Optional[datetime],
+    rule: str,
+    dtstart: datetime,
+    window_start: datetime,
+    window_end: datetime
+) -> Tuple[datetime, ...]:
+    """
+    expand() con cache por evento. version (edited_at) cambia al editar el
+    evento, así otros procesos no usan ocurrencias viejas hasta el TTL.
+    """
+    window_start, window_end = to_naive_utc(window_start), to_naive_utc(window_end)
+    window = (window_start, window_end)
+    cached = _occurrence_cache.get(event_id)
+
+    if cached is not None and cached[0] == version and window in cached[1]:
+        return cached[1][window]
+
+    stamp = _occurrence_cache.stamp()
+    starts = expand(rule, dtstart, window_start, window_end)
+
+    windows = dict(cached[1]) if cached is not None and cached[0] == version else {}
+    windows[window] = starts
+    while len(windows) > _MAX_WINDOWS_PER_EVENT:
+        del windows[next(iter(windows))]
+
+    _occurrence_cache.set(event_id, (version, windows), stamp=stamp)
+    return starts
+
+
+def get_series_occurrences(series: Any, window_start: datetime, window_end: datetime) -> Tuple[datetime, ...]:
+    """
+    get_occurrences() para una fila de serie (id, recurrence_rule, start_time,
+    created_at, edited_at). Las reglas se validan al escribirlas, pero las filas
+    anteriores pueden tener cualquier texto: esa serie se omite (y se registra)
+    en vez de hacer fallar la consulta entera.
+    """
+    try:
+        return get_occurrences(
+            series.id,
+            series.edited_at or series.created_at,
+            series.recurrence_rule,
+            series.start_time,
+            window_start,
+            window_end
+        )
+    except ValueError as e:
+        logger.warning("Evento %s: recurrence_rule inválida %r, se omite (%s)", series.id, series.recurrence_rule, e)
+        return ()
+
+
+def starts_after(starts: Tuple[datetime, ...], after: Optional[datetime], inclusive: bool = False) -> List[datetime]:
+    """Ocurrencias posteriores a after (o iguales, con inclusive). None: todas"""
+    if after is None:
+        return list(starts)
+    position = bisect_left(starts, after) if inclusive else bisect_right(starts, after)
+    return list(starts[position:])
+
+
+def invalidate(event_id: Hashable) -> None:
+    """Quitar las ocurrencias del evento de la cache (después de editarlo o borrarlo)"""
+    _occurrence_cache.pop(event_id)
@@ -0,0 +1,34 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+
+# ==================== RESPUESTAS JSON DIRECTAS ====================
+# Con response_model, FastAPI valida lo que devuelve el endpoint, lo convierte
+# a objetos Python "JSON-compatibles" y recién ahí los pasa al encoder JSON.
+# Las rutas de listas calientes usan model_response(): una sola validación de
+# toda la página (acepta objetos ORM; los modelos ya validados pasan tal cual)
+# y serialización directa a bytes en pydantic-core, sin el paso intermedio.
+# response_model se mantiene en el decorador para la documentación (OpenAPI).
+
+
+@lru_cache(maxsize=None)
+def _adapter(type_: Any) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+def model_response(
+    type_: Any,
+    value: Any,
+    status_code: int = 200,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Respuesta JSON de value serializado como type_ (p.ej. EventWithLocationPage
+    o List[AssistResponse]), el mismo tipo que el response_model de la ruta.
+    """
+    adapter = _adapter(type_)
+    body = adapter.dump_json(adapter.validate_python(value, from_attributes=True))
+    return Response(content=body, media_type="application/json", status_code=status_code, headers=headers)
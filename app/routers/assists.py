@@ -1,21 +1,26 @@
 from typing import List, Optional
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
 from uuid import UUID
 
 
-from app.models import Assist, EventWithLocationView, User
+from app.models import Assist, EventWithLocationView
 from app.schemas import (
     AssistCreate, 
     AssistResponse, 
     AssistWithEvent, 
     EventAssistStats,
-    AssistStatus
+    EventStatsBatchRequest,
+    AssistStatus,
+    CurrentUser
 )
 
 from app.routers.auth import get_current_user
-from app.database import get_db
+from app.database import get_async_db
+from app.crud import assists as crud_assists
+from app.crud import event_stats as crud_event_stats
+from app.responses import model_response
 # from app.dependencies import get_current_user  # Para obtener el user_id autenticado
 
 router = APIRouter(prefix="/assists", tags=["assists"])
@@ -23,13 +28,37 @@ router = APIRouter(prefix="/assists", tags=["assists"])
 
 # ==================== GESTIÓN DE ASISTENCIAS/LIKES ====================
 
+async def _toggle_mark(db: AsyncSession, user_id: UUID, event_id: UUID, mark: AssistStatus, removed_detail: str):
+    """
+    Marca o desmarca en un solo round-trip atómico (ver crud_assists.toggle_mark).
+    La existencia del evento la valida la FK: no hay consulta previa a la vista.
+    """
+    try:
+        action, assist = await crud_assists.toggle_mark(db, user_id, event_id, mark.value)
+    except crud_assists.EventNotFound:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Event {event_id} not found"
+        )
+    
+    if action == "removed":
+        # Retorna una respuesta adecuada para 'desmarcado' (puede ser un DTO especial o el mismo objeto si lo ajustas)
+        raise HTTPException(
+            status_code=status.HTTP_204_NO_CONTENT, # No Content es común para DELETE exitoso
+            detail=removed_detail
+        )
+    
+    # "added" o "unchanged" (otro request concurrente ya la creó)
+    return assist
+
+
 # 30. Marcar evento (assist o like)
 # --- Endpoint para Marcar/Desmarcar 'Assist' ---
 @router.post("/{event_id}/assist", response_model=AssistResponse, status_code=status.HTTP_200_OK)
-def toggle_assist(
+async def toggle_assist(
     event_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     if current_user is None:
         raise HTTPException(
@@ -40,52 +69,17 @@ def toggle_assist(
     Marcar o desmarcar un evento como 'assist' (asistiré).
     Si ya existe la marca, la elimina (desmarca).
     """
-    event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == event_id
-    ).first()
-    
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Event {event_id} not found"
-        )
-    
-    # Intenta encontrar la marca 'assist' existente
-    existing_mark = db.query(Assist).filter(
-        Assist.user_id == current_user.id,
-        Assist.event_id == event_id,
-        Assist.status == AssistStatus.ASSIST.value # Asumiendo que AssistStatus es un Enum
-    ).first()
-    
-    if existing_mark:
-        # Ya existe -> Desmarcar (Eliminar)
-        db.delete(existing_mark)
-        db.commit()
-        # Retorna una respuesta adecuada para 'desmarcado' (puede ser un DTO especial o el mismo objeto si lo ajustas)
-        raise HTTPException(
-            status_code=status.HTTP_204_NO_CONTENT, # No Content es común para DELETE exitoso
-            detail="Assist mark removed successfully"
-        )
-    
-    # No existe -> Marcar (Crear)
-    new_assist = Assist(
-        user_id=current_user.id,
-        event_id=event_id,
-        status=AssistStatus.ASSIST.value
+    return await _toggle_mark(
+        db, current_user.id, event_id, AssistStatus.ASSIST,
+        "Assist mark removed successfully"
     )
-    
-    db.add(new_assist)
-    db.commit()
-    db.refresh(new_assist)
-    
-    return new_assist
 
 # --- Endpoint para Marcar/Desmarcar 'Like' ---
 @router.post("/{event_id}/like", response_model=AssistResponse, status_code=status.HTTP_200_OK)
-def toggle_like(
+async def toggle_like(
     event_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     if current_user is None:
         raise HTTPException(
@@ -96,77 +90,70 @@ def toggle_like(
     Marcar o desmarcar un evento como 'like' (me gusta).
     Si ya existe la marca, la elimina (desmarca).
     """
-    event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == event_id
-    ).first()
-    
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Event {event_id} not found"
-        )
-    
-    # Intenta encontrar la marca 'like' existente
-    existing_mark = db.query(Assist).filter(
-        Assist.user_id == current_user.id,
-        Assist.event_id == event_id,
-        Assist.status == AssistStatus.LIKE.value
-    ).first()
-    
-    if existing_mark:
-        # Ya existe -> Desmarcar (Eliminar)
-        db.delete(existing_mark)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_204_NO_CONTENT,
-            detail="Like mark removed successfully"
-        )
-
-    # No existe -> Marcar (Crear)
-    new_assist = Assist(
-        user_id=current_user.id,
-        event_id=event_id,
-        status=AssistStatus.LIKE.value
+    return await _toggle_mark(
+        db, current_user.id, event_id, AssistStatus.LIKE,
+        "Like mark removed successfully"
     )
+
+
+# 34. Estadísticas de varios eventos en un solo request (feed)
+@router.post("/stats/batch", response_model=List[EventAssistStats])
+async def get_events_stats_batch(
+    request: EventStatsBatchRequest,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Obtener estadísticas de varios eventos (hasta 200) en una sola consulta.
     
-    db.add(new_assist)
-    db.commit()
-    db.refresh(new_assist)
+    - Respeta el orden de event_ids (sin duplicados)
+    - Los eventos sin marcas (o inexistentes) vuelven con contadores en 0
+    """
+    event_ids = list(dict.fromkeys(request.event_ids))
+    stats_by_event = await crud_event_stats.get_many_event_stats(db, event_ids)
     
-    return new_assist
+    result = []
+    for event_id in event_ids:
+        stats = stats_by_event.get(event_id)
+        total_assists = stats.total_assists if stats else 0
+        total_likes = stats.total_likes if stats else 0
+        result.append({
+            "event_id": event_id,
+            "total_assists": total_assists,
+            "total_likes": total_likes,
+            "total": total_assists + total_likes
+        })
+    
+    return result
 
 
 # 33. Obtener estadísticas de un evento (cuántos assists/likes tiene)
 @router.get("/{event_id}/stats", response_model=EventAssistStats)
-def get_event_stats(
+async def get_event_stats(
     event_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener estadísticas de asistencias y likes de un evento.
+    Lee los contadores materializados (lookup por primary key en event_stats).
     """
-    # Verificar que el evento existe
-    event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == event_id
-    ).first()
-    
-    if not event:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Event {event_id} not found"
+    stats = await crud_event_stats.get_event_stats(db, event_id)
+    
+    if stats:
+        total_assists = stats.total_assists
+        total_likes = stats.total_likes
+    else:
+        # Sin contadores: el evento no tiene marcas o no existe
+        event_exists = await db.scalar(
+            select(EventWithLocationView.id).where(EventWithLocationView.id == event_id)
         )
-    
-    # Contar assists
-    total_assists = db.query(func.count(Assist.id)).filter(
-        Assist.event_id == event_id,
-        Assist.status == 'assist'
-    ).scalar() or 0
-    
-    # Contar likes
-    total_likes = db.query(func.count(Assist.id)).filter(
-        Assist.event_id == event_id,
-        Assist.status == 'like'
-    ).scalar() or 0
+        
+        if not event_exists:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Event {event_id} not found"
+            )
+        
+        total_assists = total_likes = 0
     
     return {
         "event_id": event_id,
@@ -178,11 +165,11 @@ def get_event_stats(
 
 # BONUS: Verificar marcas LIKE ASSIST del usuario logueado. si no se pasa event_id trae todo
 @router.get("/my-marks", response_model=List[AssistResponse])
-def get_my_marks_for_event_or_all(
+async def get_my_marks_for_event_or_all(
     # event_id ahora es un query parameter y es opcional
     event_id: Optional[UUID] = None, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Verificar qué marcas tiene el usuario actual en un evento específico (o en todos los eventos).
@@ -196,21 +183,23 @@ def get_my_marks_for_event_or_all(
             detail="Authentication required"
         )
     
-    # 1. Iniciar la consulta
-    query = db.query(Assist).filter(
+    # 1. Iniciar la consulta (solo las columnas de AssistResponse, como filas Core)
+    query = select(*[getattr(Assist, name) for name in AssistResponse.model_fields]).where(
         Assist.user_id == current_user.id
     )
     
     # 2. Aplicar el filtro de event_id si se proporciona
     if event_id:
-        query = query.filter(
+        query = query.where(
             Assist.event_id == event_id
         )
     
     # 3. Ejecutar la consulta
-    marks = query.all()
+    result = await db.execute(query)
+    marks = result.all()
     
-    return marks
+    # 4. Serializar directo (ver app/responses.py)
+    return model_response(List[AssistResponse], marks)
 
 # 32. Ver eventos marcados por el usuario (mis asistencias/likes)
 '''
@@ -218,7 +207,7 @@ def get_my_marks_for_event_or_all(
 def get_my_marked_events(
     status_type: Optional[AssistStatus] = Query(None, description="Filtrar por tipo de marcado"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Obtener todos los eventos marcados por el usuario actual.
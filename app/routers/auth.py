@@ -1,13 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from uuid import UUID
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from fastapi.security import HTTPBearer
 
-from app.database import get_db
-from app.models import User
+from app.database import get_async_db
 from app.schemas import (
     UserCreate,
     UserUpdate,
@@ -15,7 +14,8 @@ from app.schemas import (
     UserPublicProfile,
     LoginRequest,
     AuthResponse,
-    ChangePasswordRequest
+    ChangePasswordRequest,
+    CurrentUser
 )
 
 from app.crud import users as crud_users
@@ -33,10 +33,23 @@ router = APIRouter(tags=["Authentication & Users"])
 
 # ==================== JWT HELPERS ====================
 
-def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None) -> str:
-    """Crea un JWT token con el user_id."""
+def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None, user=None) -> str:
+    """
+    Crea un JWT token con el user_id.
+    
+    Con AUTH_STATELESS_TOKENS y un user, agrega los claims que usan los routers
+    (username, role, creator_type) y la versión del token ("ver").
+    """
     to_encode = {"sub": str(user_id)}
     
+    if settings.AUTH_STATELESS_TOKENS and user is not None:
+        to_encode.update({
+            "username": user.username,
+            "role": user.role,
+            "creator_type": user.creator_type,
+            "ver": user.token_version or 0,
+        })
+    
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -48,41 +61,80 @@ def create_access_token(user_id: UUID, expires_delta: Optional[timedelta] = None
     return encoded_jwt
 
 
-def verify_token(token: str) -> UUID:
-    """Verifica y decodifica el JWT token, devuelve el user_id."""
+def decode_token(token: str) -> dict:
+    """Verifica y decodifica el JWT token, devuelve el payload completo."""
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        user_id: str = payload.get("sub")
-        
-        if user_id is None:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Token inválido"
-            )
-        
-        return UUID(user_id)
-    
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Token inválido o expirado"
         )
+    
+    if payload.get("sub") is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token inválido"
+        )
+    
+    return payload
+
+
+def verify_token(token: str) -> UUID:
+    """Verifica y decodifica el JWT token, devuelve el user_id."""
+    return UUID(decode_token(token)["sub"])
+
+
+def principal_from_claims(user_id: UUID, payload: dict) -> Optional[CurrentUser]:
+    """
+    Arma el usuario autenticado solo con los claims del token (sin BD),
+    si el token es stateless y su versión coincide con la vigente conocida.
+    """
+    version = payload.get("ver")
+    
+    if version is None or crud_users.get_known_token_version(user_id) != version:
+        return None
+    
+    return CurrentUser(
+        id=user_id,
+        username=payload["username"],
+        role=payload["role"],
+        creator_type=payload.get("creator_type"),
+        token_version=version,
+        from_claims=True
+    )
 
 
-def get_current_user(
+async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Dependency para obtener el usuario autenticado desde el token JWT."""
+    db: AsyncSession = Depends(get_async_db)
+) -> CurrentUser:
+    """
+    Dependency para obtener el usuario autenticado desde el token JWT.
+    Usa la cache de usuarios: en el caso común no consulta la BD.
+    """
     
     token = credentials.credentials
     
-    # 🔍 DEBUG - Temporal
-    print(f"=== DEBUG AUTH ===")
-    print(f"Token recibido: {token}")
+    payload = decode_token(token)
+    user_id = UUID(payload["sub"])
     
-    user_id = verify_token(token)
-    user = crud_users.get_user(db, user_id)
+    # Tokens stateless: sin BD mientras la versión del token esté vigente
+    if settings.AUTH_STATELESS_TOKENS and "ver" in payload:
+        principal = principal_from_claims(user_id, payload)
+        if principal is not None:
+            return principal
+        
+        # Versión desconocida o distinta: se consulta la BD
+        user = await crud_users.refresh_current_user(db, user_id)
+        if user and payload["ver"] != user.token_version:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token revocado",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+    else:
+        user = await crud_users.get_current_user_cached(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -96,9 +148,9 @@ def get_current_user(
 # ==================== AUTH ENDPOINTS ====================
 
 @router.post("/auth/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Registrar un nuevo usuario.
@@ -109,24 +161,24 @@ def register_user(
     - Devuelve token JWT
     """
     # Verificar si el email ya existe
-    if crud_users.get_user_by_email(db, user_data.email):
+    if await crud_users.get_user_by_email(db, user_data.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El email ya está registrado"
         )
     
     # Verificar si el nombre ya existe
-    if crud_users.get_user_by_username(db, user_data.username):
+    if await crud_users.get_user_by_username(db, user_data.username):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El nombre ya está en uso"
         )
     
     # Crear usuario
-    user = crud_users.create_user(db, user_data)
+    user = await crud_users.create_user(db, user_data)
     
     # Generar token JWT
-    access_token = create_access_token(user.id)
+    access_token = create_access_token(user.id, user=user)
     
     return {
         "access_token": access_token,
@@ -136,9 +188,9 @@ def register_user(
 
 
 @router.post("/auth/login", response_model=AuthResponse)
-def login(
+async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Login con email/username y contraseña.
@@ -147,7 +199,7 @@ def login(
     - Verifica la contraseña
     - Devuelve token JWT
     """
-    user = crud_users.authenticate_user(db, login_data.identifier, login_data.password)
+    user = await crud_users.authenticate_user(db, login_data.identifier, login_data.password)
     
     if not user:
         raise HTTPException(
@@ -157,7 +209,7 @@ def login(
         )
     
     # Generar token JWT
-    access_token = create_access_token(user.id)
+    access_token = create_access_token(user.id, user=user)
     
     return {
         "access_token": access_token,
@@ -167,18 +219,20 @@ def login(
 
 
 @router.post("/auth/change-password")
-def change_password(
+async def change_password(
     password_data: ChangePasswordRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Cambiar contraseña del usuario autenticado.
     
     - Requiere contraseña actual
     - Valida nueva contraseña
+    - Con tokens stateless revoca los tokens anteriores y envía uno nuevo en X-Access-Token
     """
-    success = crud_users.change_password(
+    success = await crud_users.change_password(
         db, 
         current_user.id, 
         password_data.old_password, 
@@ -191,22 +245,33 @@ def change_password(
             detail="Contraseña actual incorrecta"
         )
     
+    if settings.AUTH_STATELESS_TOKENS:
+        user = await crud_users.get_current_user_cached(db, current_user.id)
+        response.headers["X-Access-Token"] = create_access_token(user.id, user=user)
+    
     return {"message": "Contraseña actualizada exitosamente"}
 
 
 # ==================== USER ENDPOINTS ====================
 #devolver datos del perfil del usuario
 @router.get("/users/me", response_model=UserResponse)
-def get_my_profile(current_user: User = Depends(get_current_user)):
+async def get_my_profile(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
     """Obtener mi perfil (usuario autenticado)."""
+    # Un token stateless no trae email/bio/etc: se completa desde la cache/BD
+    if current_user.from_claims:
+        current_user = await crud_users.get_current_user_cached(db, current_user.id)
     return current_user
 
 
 @router.patch("/users/me", response_model=UserResponse)
-def update_my_profile(
+async def update_my_profile(
     user_update: UserUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Campos editables:
@@ -214,32 +279,39 @@ def update_my_profile(
     - role
     - creator_type
     - bio
+    
+    Si cambia role o creator_type con tokens stateless, el token actual queda
+    revocado y se envía uno nuevo en X-Access-Token.
     """
-    updated_user = crud_users.update_user(db, current_user.id, user_update)
+    updated_user = await crud_users.update_user(db, current_user.id, user_update)
+    
+    if settings.AUTH_STATELESS_TOKENS and updated_user.token_version != current_user.token_version:
+        response.headers["X-Access-Token"] = create_access_token(updated_user.id, user=updated_user)
+    
     return updated_user
 
 
 @router.delete("/users/me", status_code=status.HTTP_204_NO_CONTENT)
-def delete_my_account(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def delete_my_account(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Eliminar mi cuenta.
     
     CUIDADO: Esta acción es irreversible.
     """
-    crud_users.delete_user(db, current_user.id)
+    await crud_users.delete_user(db, current_user.id)
     return None
 
 
 @router.get("/users/{user_id}", response_model=UserPublicProfile)
-def get_user_public_profile(
+async def get_user_public_profile(
     user_id: UUID,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtener perfil público de otro usuario."""
-    user = crud_users.get_user(db, user_id)
+    user = await crud_users.get_user(db, user_id)
     
     if not user:
         raise HTTPException(
@@ -256,7 +328,7 @@ def list_users(
     skip: int = 0,
     limit: int = 100,
     #is_event_creator: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Listar usuarios (perfiles públicos).
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+import csv
+import heapq
+import io
+import json
+import logging
+from itertools import islice
+
+from fastapi import APIRouter, Body, Depends, File, Header, HTTPException, status, Query, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
-from app import models, schemas
-from app.database import get_db
+from app import models, recurrence, schemas
+from app.database import get_async_db
 from app.models import Event as EventModel
 from app.models import EventWithLocationView
-from app.schemas import EventBase, EventCreate, Event, EventUpdate, EventWithLocation
+from app.schemas import EventBase, EventCreate, Event, EventUpdate, EventWithLocation, EventWithLocationPage
+from app.schemas import EventImportResult
 from app.schemas import (
     AssistCreate, 
     AssistResponse, 
@@ -15,11 +25,19 @@ from app.schemas import (
     AssistStatus
 )
 
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
 from datetime import datetime, timedelta
 from uuid import UUID
-from app.models import User
+from app.schemas import CurrentUser
 from app.routers.auth import get_current_user
+from app.dates import NaiveUTCDatetime, utc_now
+from app.pagination import build_page, decode_cursor
+from app.responses import model_response
+from app.config import settings
+from app.crud import events as crud_events
+from app.crud import feed as crud_feed
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/events", tags=["Events"])
 
@@ -28,10 +46,10 @@ router = APIRouter(prefix="/events", tags=["Events"])
 
 #🎉 3. Crear un nuevo evento
 @router.post("/", response_model=EventWithLocation, status_code=status.HTTP_201_CREATED)
-def create_event(
+async def create_event(
     event_data: EventCreate, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
     ):
     """
     Crear un nuevo evento.
@@ -55,8 +73,23 @@ def create_event(
     
     # 3. Preparar los datos del evento, incluyendo el ID del creador
     event_data_dict = event_data.dict()
+    # Las categorías van a event_categories
+    category_ids = event_data_dict.pop('category_ids', None) or []
+    
+    unknown_categories = await crud_events.get_unknown_category_ids(db, category_ids)
+    if unknown_categories:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown category_ids: {sorted(unknown_categories)}"
+        )
     # Usaremos 'created_by' para coincidir con el campo de tu tabla
     event_data_dict['created_by'] = current_user.id 
+    # created_at es parte de la clave del cursor: nunca NULL
+    if event_data_dict.get('created_at') is None:
+        event_data_dict['created_at'] = utc_now()
+    event_data_dict['series_end'] = recurrence.series_end(
+        event_data_dict.get('recurrence_rule'), event_data_dict['start_time']
+    )
     
     # 4. Crear evento en la tabla
     db_event = EventModel(**event_data_dict) 
@@ -64,10 +97,13 @@ def create_event(
     db.add(db_event)
     
     try:
-        db.commit()
-        db.refresh(db_event)
+        await db.flush()
+        await crud_events.add_event_categories(db, db_event.id, category_ids)
+        await crud_events.sync_materialized_events(db, [db_event.id])
+        await db.commit()
+        await db.refresh(db_event)
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # Si la Foreign Key todavía está mal, fallará aquí, pero con el cambio 
         # anterior a 'created_by' y la corrección de la FK, debería funcionar.
         raise HTTPException(
@@ -76,24 +112,127 @@ def create_event(
         )
     
     # 5. Retornar desde la vista
-    created_event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == db_event.id
-    ).first()
+    created_event = await db.get(EventWithLocationView, db_event.id)
+    
+    # 6. Agregarlo a los feeds precalculados de quienes siguen sus categorías
+    if category_ids:
+        crud_feed.on_event_created(
+            EventWithLocation.model_validate(created_event, from_attributes=True), category_ids
+        )
     
     return created_event
 
+#🎉 3.1 Importación masiva de eventos (JSON o CSV)
+async def _import_events(
+    rows: List[Dict[str, Any]],
+    db: AsyncSession,
+    current_user: CurrentUser
+) -> Dict[str, Any]:
+    """
+    Valida todas las filas y las inserta en una sola escritura.
+    Las filas inválidas no se insertan: vuelven en 'errors' con su número de fila.
+    """
+    if current_user.role != "organizer":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User must have 'organizer' role to create an event"
+        )
+    
+    if len(rows) > settings.EVENT_IMPORT_MAX_ROWS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Cannot import more than {settings.EVENT_IMPORT_MAX_ROWS} events per request"
+        )
+    
+    valid, errors = crud_events.validate_event_rows(rows)
+    valid = await crud_events.check_event_references(db, valid, errors)
+    
+    try:
+        event_ids = await crud_events.bulk_create_events(
+            db, [event for _, event in valid], current_user.id
+        )
+    except Exception:
+        await db.rollback()
+        # El detalle queda en el log: el error de la BD no se devuelve al cliente
+        logger.exception("Event import failed (%d rows)", len(valid))
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Database error during event import"
+        )
+    
+    crud_feed.invalidate_categories(
+        category_id for _, event in valid for category_id in event.category_ids or []
+    )
+    
+    return {
+        "created": len(event_ids),
+        "event_ids": event_ids,
+        "errors": errors
+    }
+
+
+@router.post("/bulk", response_model=EventImportResult, status_code=status.HTTP_201_CREATED)
+async def import_events(
+    rows: List[Dict[str, Any]] = Body(..., description="Lista de eventos (mismos campos que POST /events/)"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Importar muchos eventos en un request (JSON array).
+    Requiere el rol de 'organizer'.
+    
+    - Cada fila se valida como EventCreate, con end_time > start_time, un status
+      válido y location_id/category_ids existentes
+    - Las filas válidas se insertan juntas; las inválidas vuelven en 'errors'
+    """
+    return await _import_events(rows, db, current_user)
+
+
+@router.post("/bulk/csv", response_model=EventImportResult, status_code=status.HTTP_201_CREATED)
+async def import_events_csv(
+    file: UploadFile = File(..., description="CSV con encabezado: title,description,location_id,start_time,end_time,..."),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Importar eventos desde un archivo CSV (una fila por evento).
+    Las celdas vacías se toman como null (is_recurring y status vacíos toman su
+    valor por defecto). Mismas reglas que /events/bulk.
+    """
+    try:
+        content = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must be UTF-8 encoded"
+        )
+    
+    reader = csv.DictReader(io.StringIO(content))
+    if not reader.fieldnames:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="CSV file must have a header row"
+        )
+    
+    rows = [
+        {key: (value.strip() or None) if value is not None else None for key, value in row.items() if key}
+        for row in reader
+    ]
+    
+    return await _import_events(rows, db, current_user)
+
 #🎉 4. Actualizar un evento
 @router.put("/{event_id}", response_model=EventUpdate)
-def update_event(
+async def update_event(
     event_id: UUID,
     event_data: EventUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Actualizar un evento existente (actualización completa).
     """
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    db_event = await db.get(EventModel, event_id)
     
     if not db_event: 
         raise HTTPException(
@@ -115,29 +254,41 @@ def update_event(
                 detail="end_time must be after start_time"
             )
     
+    # Si cambia la fecha, el evento puede entrar o salir de los feeds de
+    # quienes siguen sus categorías (PUT no cambia las categorías)
+    moved = 'start_time' in update_data and update_data['start_time'] != db_event.start_time
+    
     for key, value in update_data.items():
         setattr(db_event, key, value)
+    db_event.series_end = recurrence.series_end(db_event.recurrence_rule, db_event.start_time)
     
-    db.commit()
-    db.refresh(db_event)
+    # edited_at lo define el servidor: es la versión del ETag de GET /events/{id}
+    db_event.edited_at = utc_now()
+    
+    await db.flush()
+    await crud_events.sync_materialized_events(db, [event_id])
+    await db.commit()
+    crud_events.invalidate_event(event_id)
+    recurrence.invalidate(event_id)
+    if moved:
+        crud_feed.invalidate_categories(await crud_events.get_event_category_ids(db, event_id))
+    crud_feed.on_event_changed(event_id)
     
     # Retornar desde la vista
-    updated_event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == event_id
-    ).first()
+    updated_event = await db.get(EventWithLocationView, event_id)
     
     return updated_event
 
 #🎉 5. Eliminar un evento
 @router.delete("/{event_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_event(
+async def delete_event(
     event_id: UUID, 
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)):
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)):
     """
     Eliminar un evento permanentemente.
     """
-    db_event = db.query(EventModel).filter(EventModel.id == event_id).first()
+    db_event = await db.get(EventModel, event_id)
     
     if not db_event:
         raise HTTPException(
@@ -145,76 +296,187 @@ def delete_event(
             detail=f"Event with id {event_id} not found"
         )
     
-    db.delete(db_event)
-    db.commit()
+    await db.delete(db_event)
+    await db.commit()
+    crud_events.invalidate_event(event_id)
+    recurrence.invalidate(event_id)
+    crud_feed.on_event_changed(event_id)
     
     return None
 
 
 ## EVENTOS CONSULTAS ########################################################################
 
+#🎉 1. Feed: próximos eventos de mis categorías favoritas
+@router.get("/feed", response_model=EventWithLocationPage)
+async def get_my_feed(
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Próximos eventos de las categorías favoritas del usuario autenticado.
+    
+    - Ordenados por start_time; paginación por cursor (next_cursor)
+    - Los primeros eventos salen del feed precalculado del usuario
+    - Los eventos recurrentes aparecen una vez, por su primera fecha (start_time),
+      no por ocurrencia: para ver ocurrencias usar /by-date-range/
+    """
+    after = decode_cursor(cursor, (datetime.fromisoformat, UUID)) if cursor else None
+    
+    events = await crud_feed.get_feed_page(db, current_user.id, limit, after)
+    
+    page = build_page(events, limit, lambda event: (event.start_time, event.id))
+    return model_response(EventWithLocationPage, page)
+
+#🔎 Búsqueda de texto en título y descripción
+@router.get("/search", response_model=EventWithLocationPage)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200, description="Texto a buscar (admite \"frases\", OR y -excluir)"),
+    start_date: Optional[NaiveUTCDatetime] = Query(None, description="Desde (start_time)"),
+    end_date: Optional[NaiveUTCDatetime] = Query(None, description="Hasta (start_time)"),
+    location_id: Optional[int] = Query(None, description="Filtrar por ID de ubicación"),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Buscar eventos por título y descripción.
+    
+    - Ordenados por relevancia (el título pesa más que la descripción)
+    - Filtros opcionales por rango de fechas y ubicación
+    - Los eventos recurrentes aparecen una vez; el rango de fechas filtra por su
+      primera fecha (start_time), no por sus ocurrencias
+    - Paginación por cursor (next_cursor)
+    """
+    after = decode_cursor(cursor, (float, UUID)) if cursor else None
+    
+    matches = await crud_events.search_events(
+        db, q, limit + 1, after,
+        start_date=start_date, end_date=end_date, location_id=location_id
+    )
+    
+    page = build_page(matches, limit, lambda match: (match[0], match[1].id))
+    page["items"] = [event for _, event in page["items"]]
+    
+    return model_response(EventWithLocationPage, page)
+
 #🎉 2. Obtener un evento específico
 @router.get("/{event_id}", response_model=EventWithLocation)
-def read_event(
+async def read_event(
     event_id: UUID,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)):
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)):
     """
     Obtener detalles de un evento específico.
+    
+    - Responde desde la cache del proceso (sin BD ni serialización) si está
+    - Con If-None-Match igual al ETag vigente (también W/"..." o *) responde 304 sin cuerpo
     """
-    event = db.query(EventWithLocationView).filter(
-        EventWithLocationView.id == event_id
-    ).first()
+    cached = await crud_events.get_event_response_cached(db, event_id)
     
-    if not event:
+    if not cached:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Event with id {event_id} not found"
         )
     
-    return event
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if crud_events.etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    return Response(content=body, media_type="application/json", headers=headers)
 # 🎉 2. Obtener todos los eventos creados por el usuario autenticado
-@router.get("/by_created_by/", response_model=List[EventWithLocation])
-def get_my_created_events(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(50, le=500)
+@router.get("/by_created_by/", response_model=EventWithLocationPage)
+async def get_my_created_events(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user),
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(50, ge=1, le=500)
 ):
     """
     Obtener todos los eventos creados por el usuario autenticado.
     
     - Retorna lista ordenada por fecha de creación (más recientes primero)
-    - Soporta paginación con skip y limit
+    - Paginación por cursor: pasar next_cursor para la página siguiente
     """
-    events = db.query(EventWithLocationView).filter(
+    # Solo las columnas de la respuesta (+ created_at del cursor), como filas Core
+    query = select(*crud_events.EVENT_COLUMNS, EventWithLocationView.created_at).where(
         EventWithLocationView.created_by == current_user.id
-    ).order_by(
-        EventWithLocationView.created_at.desc()  # Más recientes primero
-    ).offset(skip).limit(limit).all()
+    )
+    
+    # Keyset: continuar después de (created_at, id) del último evento
+    if cursor:
+        created_at, last_id = decode_cursor(cursor, (datetime.fromisoformat, UUID))
+        query = query.where(
+            tuple_(EventWithLocationView.created_at, EventWithLocationView.id) < (created_at, last_id)
+        )
+    
+    result = await db.execute(
+        query.order_by(
+            EventWithLocationView.created_at.desc(),  # Más recientes primero
+            EventWithLocationView.id.desc()
+        ).limit(limit + 1)
+    )
+    events = result.all()
+    
+    # Serialización directa de la página (ver app/responses.py)
+    page = build_page(events, limit, lambda event: (event.created_at, event.id))
+    return model_response(EventWithLocationPage, page)
+
+def _series_occurrences(
+    series: Any,
+    window_start: datetime,
+    window_end: datetime,
+    after: Optional[tuple],
+    limit: int
+) -> List[EventWithLocation]:
+    """
+    Ocurrencias de un evento recurrente dentro de la ventana, posteriores al cursor.
+    Cada ocurrencia es el evento con start_time/end_time corridos (misma duración).
+    series es una fila con EVENT_COLUMNS más recurrence_rule, created_at y edited_at.
+    """
+    # Una regla inválida (filas anteriores a la validación) omite solo esa serie
+    starts = recurrence.get_series_occurrences(series, window_start, window_end)
+    
+    if after:
+        after_start, after_id = after
+        starts = recurrence.starts_after(starts, after_start, inclusive=series.id > after_id)
     
-    if not events:
-        # Retornar lista vacía en lugar de error
+    if not starts:
         return []
     
-    return events
+    duration = series.end_time - series.start_time if series.end_time else timedelta(0)
+    event = EventWithLocation.model_validate(series, from_attributes=True)
+    
+    return [
+        event.model_copy(update={"start_time": start, "end_time": start + duration})
+        for start in starts[:limit]
+    ]
+
 
 # 9. Filtrar por rango de fechas, locacion y categoria
-@router.get("/by-date-range/", response_model=List[EventWithLocation])
-def get_events_by_date_range(
-    start_date: datetime = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
-    end_date: datetime = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+@router.get("/by-date-range/", response_model=EventWithLocationPage)
+async def get_events_by_date_range(
+    start_date: NaiveUTCDatetime = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: NaiveUTCDatetime = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
     location_id: Optional[int] = Query(None, description="Filtrar por ID de ubicación"),
     category: Optional[str] = Query(None, description="Filtrar por categoría"),
-    limit: int = Query(100, le=500),
-    offset: int = Query(0),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="next_cursor de la página anterior"),
+    limit: int = Query(100, ge=1, le=500),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """
     Obtener eventos dentro de un rango de fechas.
     
     Busca eventos cuya fecha de inicio esté entre start_date y end_date (inclusive).
+    Ordenados por start_time; paginación por cursor (next_cursor).
     """
     # Validar rango
     if end_date < start_date:
@@ -231,30 +493,139 @@ def get_events_by_date_range(
             detail="Date range cannot exceed 365 days"
         )
     
-    # Query base
-    query = db.query(EventWithLocationView)
-    
-    # Filtrar por rango de fechas
     end_of_day = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59)
-    query = query.filter(
-        EventWithLocationView.start_time >= start_date,
-        EventWithLocationView.start_time <= end_of_day
-    )
     
-    # Filtros adicionales
+    # Filtros adicionales (se aplican a eventos únicos y a series recurrentes)
+    filters = []
     # Aplicar filtro por location_id si se proporciona
     if location_id is not None:
-        query = query.filter(EventWithLocationView.location_id == location_id)
+        filters.append(EventWithLocationView.location_id == location_id)
     
     # Aplicar filtro por categoría si se proporciona
     if category is not None:
-        query = query.filter(EventWithLocationView.category == category)
- 
+        filters.append(EventWithLocationView.category == category)
+    
+    # Keyset: continuar después de (start_time, id) del último evento
+    after = decode_cursor(cursor, (datetime.fromisoformat, UUID)) if cursor else None
+    
+    # 1. Eventos únicos: rango, cursor y orden los resuelve el índice (start_time, id)
+    query = select(*crud_events.EVENT_COLUMNS).where(
+        or_(
+            EventWithLocationView.is_recurring.isnot(True),
+            EventWithLocationView.recurrence_rule.is_(None)
+        ),
+        EventWithLocationView.start_time >= start_date,
+        EventWithLocationView.start_time <= end_of_day,
+        *filters
+    )
+    if after:
+        query = query.where(
+            tuple_(EventWithLocationView.start_time, EventWithLocationView.id) > after
+        )
     
-    # Ordenar y paginar
-    events = query.order_by(EventWithLocationView.start_time)\
-                  .offset(offset)\
-                  .limit(limit)\
-                  .all()
+    result = await db.execute(
+        query.order_by(EventWithLocationView.start_time, EventWithLocationView.id)
+             .limit(limit + 1)
+    )
+    pages = [[EventWithLocation.model_validate(event, from_attributes=True) for event in result]]
     
-    return events
\ No newline at end of file
+    # 2. Series recurrentes que empiezan antes del fin de la ventana: solo sus ocurrencias en la ventana
+    result = await db.execute(
+        select(
+            *crud_events.EVENT_COLUMNS,
+            EventWithLocationView.recurrence_rule,
+            EventWithLocationView.created_at,
+            EventWithLocationView.edited_at
+        ).where(
+            EventWithLocationView.is_recurring == True,
+            EventWithLocationView.recurrence_rule.isnot(None),
+            EventWithLocationView.start_time <= end_of_day,
+            # Sin las series que terminaron antes de la ventana (índice por series_end)
+            or_(
+                EventWithLocationView.series_end.is_(None),
+                EventWithLocationView.series_end >= start_date
+            ),
+            *filters
+        )
+    )
+    for series in result:
+        pages.append(_series_occurrences(series, start_date, end_of_day, after, limit + 1))
+    
+    # 3. Unir todo en orden (start_time, id)
+    sort_key = lambda event: (event.start_time, event.id)
+    events = list(islice(heapq.merge(*pages, key=sort_key), limit + 1))
+    
+    return model_response(EventWithLocationPage, build_page(events, limit, sort_key))
+
+
+# 10. Exportar eventos de un rango de fechas (NDJSON o CSV, en streaming)
+def _export_value(value):
+    """UUID/datetime como texto, igual que en las respuestas JSON"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+async def _export_ndjson(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield "".join(
+            json.dumps({key: _export_value(value) for key, value in zip(crud_events.EXPORT_COLUMNS, row)}) + "\n"
+            for row in rows
+        )
+
+
+async def _export_csv(batches: AsyncIterator[list]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(crud_events.EXPORT_COLUMNS)
+    
+    async for rows in batches:
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        # Reusar el buffer: la memoria no crece con el rango
+        buffer.seek(0)
+        buffer.truncate()
+    
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@router.get("/export/")
+async def export_events_by_date_range(
+    start_date: NaiveUTCDatetime = Query(..., description="Fecha de inicio (YYYY-MM-DD)"),
+    end_date: NaiveUTCDatetime = Query(..., description="Fecha de fin (YYYY-MM-DD)"),
+    location_id: Optional[int] = Query(None, description="Filtrar por ID de ubicación"),
+    format: Literal["ndjson", "csv"] = Query("ndjson", description="Formato de salida"),
+    current_user: CurrentUser = Depends(get_current_user)
+):
+    """
+    Exportar todos los eventos de un rango de fechas, sin límite de cantidad.
+    
+    - Las filas se leen con un cursor del servidor y se envían a medida que llegan
+    - Los eventos recurrentes salen una vez por ocurrencia del rango (como /by-date-range/)
+    - ndjson: un objeto JSON por línea; csv: con encabezado
+    - Ordenados por start_time
+    """
+    if end_date < start_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end_date must be greater than or equal to start_date"
+        )
+    
+    end_of_day = datetime(end_date.year, end_date.month, end_date.day, 23, 59, 59)
+    batches = crud_events.stream_events_by_date_range(start_date, end_of_day, location_id)
+    
+    if format == "csv":
+        return StreamingResponse(
+            _export_csv(batches),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="events.csv"'}
+        )
+    
+    return StreamingResponse(
+        _export_ndjson(batches),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="events.ndjson"'}
+    )
@@ -1,14 +1,15 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from uuid import UUID
 
-from app.database import get_db
-from app.models import User
+from app.database import get_async_db
 from app.schemas import (
     FavoriteCreate,
+    FavoriteSyncRequest,
     FavoriteResponse,
-    FavoriteCategoryList
+    FavoriteCategoryList,
+    CurrentUser
 )
 
 from app.routers.auth import get_current_user
@@ -21,17 +22,17 @@ router = APIRouter(prefix="/favorites", tags=["Favorites"])
 # ==================== FAVORITES ENDPOINTS ====================
 
 @router.post("/", response_model=FavoriteResponse, status_code=status.HTTP_201_CREATED)
-def add_favorite_category(
+async def add_favorite_category(
     favorite: FavoriteCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Agregar una categoría a favoritos del usuario autenticado.
     
     - Si ya existe, retorna error 409 (Conflict)
     """
-    db_favorite = crud_favorites.create_favorite(db, current_user.id, favorite)
+    db_favorite = await crud_favorites.create_favorite(db, current_user.id, favorite)
     
     if not db_favorite:
         raise HTTPException(
@@ -42,54 +43,82 @@ def add_favorite_category(
     return db_favorite
 
 
+@router.put("/", response_model=List[FavoriteResponse])
+async def sync_favorite_categories(
+    favorites: FavoriteSyncRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Reemplazar las categorías favoritas del usuario por esta lista (onboarding).
+    
+    - Crea las nuevas, reactiva las eliminadas y elimina (soft delete) las que no están
+    - Todo en una transacción; retorna la lista final de favoritos
+    - Si alguna categoría no existe retorna 404 sin cambiar nada
+    - Si choca con otro cambio concurrente retorna 409 (Conflict)
+    """
+    try:
+        return await crud_favorites.sync_favorites(db, current_user.id, favorites.category_ids)
+    except crud_favorites.UnknownCategories as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Categorías inexistentes: {e.args[0]}"
+        )
+    except crud_favorites.FavoritesConflict:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Los favoritos cambiaron mientras se sincronizaban, reintentar"
+        )
+
+
 @router.get("/", response_model=List[FavoriteResponse])
-def get_my_favorite_categories(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_favorite_categories(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener todas las categorías favoritas del usuario autenticado.
     
     Retorna lista completa con IDs y timestamps.
     """
-    favorites = crud_favorites.get_user_favorites(db, current_user.id)
+    favorites = await crud_favorites.get_user_favorites(db, current_user.id)
     return {"favorites": favorites}
 
 
 @router.get("/ids", response_model=FavoriteCategoryList)
-def get_my_favorite_category_ids(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_my_favorite_category_ids(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Obtener solo los IDs de categorías favoritas del usuario.
     
     Útil para checkear rápidamente si una categoría es favorita.
     """
-    category_ids = crud_favorites.get_user_favorite_ids(db, current_user.id)
+    category_ids = await crud_favorites.get_user_favorite_ids(db, current_user.id)
     return {"category_ids": category_ids}
 
 
 @router.get("/check/{category_id}", response_model=dict)
-def check_if_favorite(
+async def check_if_favorite(
     category_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Verificar si una categoría específica es favorita del usuario.
     
     Retorna: {"is_favorite": true/false}
     """
-    is_fav = crud_favorites.is_favorite(db, current_user.id, category_id)
+    is_fav = await crud_favorites.is_favorite(db, current_user.id, category_id)
     return {"is_favorite": is_fav}
 
 
 @router.delete("/{category_id}", status_code=status.HTTP_204_NO_CONTENT)
-def remove_favorite_category(
+async def remove_favorite_category(
     category_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Eliminar una categoría de favoritos (soft delete).
@@ -98,7 +127,7 @@ def remove_favorite_category(
     - Retorna 204 si se eliminó
     - Retorna 404 si no existía
     """
-    deleted = crud_favorites.delete_favorite(db, current_user.id, category_id)
+    deleted = await crud_favorites.delete_favorite(db, current_user.id, category_id)
     
     if not deleted:
         raise HTTPException(
@@ -112,26 +141,26 @@ def remove_favorite_category(
 
 
 @router.get("/count", response_model=dict)
-def count_my_favorites(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def count_my_favorites(
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Contar cuántas categorías favoritas tiene el usuario.
     
     Retorna: {"count": number}
     """
-    count = crud_favorites.count_user_favorites(db, current_user.id)
+    count = await crud_favorites.count_user_favorites(db, current_user.id)
     return {"count": count}
 
 
 # ==================== ADMIN ENDPOINTS (opcional) ====================
 
 @router.get("/users/{user_id}", response_model=List[FavoriteResponse])
-def get_user_favorites_admin(
+async def get_user_favorites_admin(
     user_id: UUID,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     [ADMIN] Obtener favoritos de cualquier usuario.
@@ -142,7 +171,7 @@ def get_user_favorites_admin(
     # if current_user.role != 'admin':
     #     raise HTTPException(status_code=403, detail="No autorizado")
     
-    favorites = crud_favorites.get_user_favorites(db, user_id)
+    favorites = await crud_favorites.get_user_favorites(db, user_id)
     return favorites
 
 
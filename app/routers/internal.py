@@ -0,0 +1,90 @@
+import os
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Response, status
+from fastapi.responses import FileResponse
+
+from app.config import settings
+from app.database import engine, async_engine
+from app.monitoring import profiling, prometheus
+from app.monitoring.pool import pool_stats
+
+
+def require_internal_token(
+    x_internal_token: Optional[str] = Header(None, alias="X-Internal-Token")
+):
+    """Protege los endpoints internos con el token INTERNAL_API_TOKEN."""
+    if not settings.INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND)
+
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, settings.INTERNAL_API_TOKEN):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Token interno inválido"
+        )
+
+
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal"],
+    include_in_schema=False,
+    dependencies=[Depends(require_internal_token)]
+)
+
+
+# ==================== POOL DE CONEXIONES ====================
+
+@router.get("/pool")
+def get_pool_stats():
+    """
+    Estado de los pools de conexiones de este worker.
+
+    - checked_out / overflow: conexiones en uso ahora
+    - timeouts: checkouts que superaron DB_POOL_TIMEOUT
+    - checkout_wait_seconds: histograma del tiempo para obtener una conexión
+    """
+    return {
+        "sync": pool_stats("sync", engine),
+        "async": pool_stats("async", async_engine.sync_engine),
+    }
+
+
+# ==================== MÉTRICAS (PROMETHEUS) ====================
+
+@router.get("/metrics")
+def get_metrics():
+    """
+    Métricas de este worker en formato de texto de Prometheus.
+
+    - http_requests_total: requests por ruta y status
+    - http_request_duration_seconds: latencia por ruta
+    - http_request_db_queries / http_request_db_seconds: consultas y tiempo de BD por request
+    - db_pool_*: espera y timeouts del pool de conexiones
+    """
+    return Response(content=prometheus.render_metrics(), media_type=prometheus.CONTENT_TYPE)
+
+
+# ==================== PERFILES (PROFILING_ENABLED) ====================
+
+@router.get("/profiles")
+def list_profiles():
+    """Perfiles guardados en este host, del más reciente al más viejo"""
+    if not os.path.isdir(settings.PROFILING_DIR):
+        return []
+    names = (name[:-len(".prof")] for name in os.listdir(settings.PROFILING_DIR) if name.endswith(".prof"))
+    return sorted(names, reverse=True)
+
+
+@router.get("/profiles/{profile_id}.{extension}")
+def get_profile(profile_id: str, extension: str):
+    """
+    Descargar un perfil (ver X-Profile-Url en la respuesta perfilada).
+
+    - .prof: cProfile (snakeviz, python -m pstats)
+    - .folded: pilas colapsadas (flamegraph.pl, speedscope)
+    """
+    path = profiling.profile_path(profile_id, extension)
+    if extension not in ("prof", "folded") or not profiling.PROFILE_ID.match(profile_id) or not os.path.isfile(path):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil no encontrado")
+    return FileResponse(path, filename=f"{profile_id}.{extension}")
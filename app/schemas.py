@@ -12,6 +12,9 @@ from uuid import UUID
 from enum import Enum
 import re
 
+from app import recurrence
+from app.dates import NaiveUTCDatetime
+
 
 
 # Esquema base para eventos
@@ -19,15 +22,15 @@ class EventBase(BaseModel):
     title: str
     description: Optional[str] = None
     location_id: Optional[int] = None
-    start_time: datetime
-    end_time: datetime
+    start_time: NaiveUTCDatetime
+    end_time: NaiveUTCDatetime
     is_recurring: Optional[bool] = False
-    # recurrence_rule: Optional[str] = None
+    recurrence_rule: Optional[str] = None  # RRULE (RFC 5545), p.ej. "FREQ=WEEKLY;BYDAY=MO"
     created_by: Optional[UUID] = None
     status: Optional[str] = "active"
-    created_at: datetime = None
+    created_at: NaiveUTCDatetime = None
     # category: Optional[int]  = None
-    edited_at: Optional[datetime] = None
+    edited_at: Optional[NaiveUTCDatetime] = None
 
 class EventWithLocation(BaseModel):
     id: UUID
@@ -38,14 +41,38 @@ class EventWithLocation(BaseModel):
     end_time: datetime
     # category: Optional[int] = None
     location_name: Optional[str] = None  # ✅ Del JOIN 
+    is_recurring: Optional[bool] = False  # Ocurrencia de un evento recurrente
  
 
 class Config:
     from_attributes = True  # Reemplaza orm_mode=True en Pydantic v2
 
+
+# Página de eventos (keyset pagination): next_cursor es None en la última página
+class EventWithLocationPage(BaseModel):
+    items: List[EventWithLocation]
+    next_cursor: Optional[str] = None
+
 # Esquema para crear un nuevo evento
 class EventCreate(EventBase):
-    pass  # Hereda todos los campos de EventBase
+    # Hereda todos los campos de EventBase
+    category_ids: Optional[List[int]] = None  # Se guardan en event_categories
+    
+    @field_validator('recurrence_rule')
+    @classmethod
+    def validate_recurrence_rule(cls, v):
+        return recurrence.validate_rule(v) if v else v
+
+# Importación masiva: errores de validación de una fila (row empieza en 1)
+class EventImportRowError(BaseModel):
+    row: int
+    errors: List[str]
+
+# Resultado de la importación: se insertan las filas válidas
+class EventImportResult(BaseModel):
+    created: int
+    event_ids: List[UUID]
+    errors: List[EventImportRowError]
 
 # Esquema de respuesta (incluye ID)
 class Event(EventBase):
@@ -56,13 +83,18 @@ class EventUpdate(BaseModel):
     title: Optional[str] = None
     description: Optional[str] = None
     location_id: Optional[int] = None
-    start_time: Optional[datetime] = None
-    end_time: Optional[datetime] = None
+    start_time: Optional[NaiveUTCDatetime] = None
+    end_time: Optional[NaiveUTCDatetime] = None
     is_recurring: Optional[bool] = None
-    #recurrence_rule: Optional[str] = None
+    recurrence_rule: Optional[str] = None
     status: Optional[str] = None
     #category: Optional[int]  = None
-    edited_at: Optional[datetime] = None
+    edited_at: Optional[NaiveUTCDatetime] = None
+    
+    @field_validator('recurrence_rule')
+    @classmethod
+    def validate_recurrence_rule(cls, v):
+        return recurrence.validate_rule(v) if v else v
 
 # ✅ Schema para respuestas (incluye location_name de la vista)
 class Event(EventBase):
@@ -130,6 +162,11 @@ class EventAssistStats(BaseModel):
     total: int
 
 
+# Schema para pedir estadísticas de varios eventos a la vez
+class EventStatsBatchRequest(BaseModel):
+    event_ids: List[UUID] = Field(..., min_length=1, max_length=200)
+
+
 # ==================== USER SCHEMAS ====================
 
 class UserBase(BaseModel):
@@ -200,6 +237,30 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class CurrentUser(BaseModel):
+    """
+    Usuario autenticado que devuelve get_current_user.
+    Snapshot inmutable (sin contraseña) que se puede cachear entre requests.
+    
+    En modo stateless (from_claims=True) se arma solo con los claims del token:
+    id, username, role, creator_type y token_version. El resto queda en None.
+    """
+    id: UUID
+    username: str
+    role: str
+    creator_type: Optional[str] = None
+    token_version: int = 0
+    email: Optional[str] = None
+    profile_picture: Optional[str] = None
+    bio: Optional[str] = None
+    created_at: Optional[datetime] = None
+    from_claims: bool = False
+    
+    class Config:
+        from_attributes = True
+        frozen = True
+
+
 class UserPublicProfile(BaseModel):
     """Perfil público del usuario (información limitada)"""
     id: UUID
@@ -252,6 +313,11 @@ class FavoriteCreate(BaseModel):
     category_id: int
 
 
+class FavoriteSyncRequest(BaseModel):
+    """Schema para reemplazar todas las categorías favoritas (onboarding)"""
+    category_ids: List[int] = Field(..., max_length=200)
+
+
 class FavoriteResponse(BaseModel):
     """Respuesta con información del favorito"""
     id: int
@@ -0,0 +1,9 @@
+"""
+Benchmarks HTTP reproducibles de la API.
+
+    python -m bench.seed --users 200 --events 20000      # datos sintéticos
+    python -m bench --requests 500 --concurrency 20      # medir
+    python -m bench --processes 4 --compare bench_prev.json
+
+Usan la BD de DATABASE_URL (solo locales, salvo --allow-remote).
+"""
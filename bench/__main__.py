@@ -0,0 +1,5 @@
+from bench.run import main
+
+
+if __name__ == "__main__":
+    main()
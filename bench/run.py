@@ -0,0 +1,404 @@
+"""
+Mide latencia (p50/p95/p99) y RPS de los endpoints más usados.
+
+Por defecto maneja la app de app/main.py en el mismo proceso (httpx con
+ASGITransport, sin red). Con --processes N se lanzan N procesos generadores
+de carga, cada uno con su propia app y su pool de conexiones; con --url se
+mide un servidor ya levantado (uvicorn/gunicorn) en lugar de la app local.
+
+Antes de medir: python -m bench.seed (ver bench/seed.py).
+
+Uso:
+    python -m bench --requests 500 --concurrency 20
+    python -m bench --processes 4 --scenarios read_event,stats
+    python -m bench --url http://localhost:8000 --output bench_uvicorn.json
+    python -m bench --compare bench_output.txt --output bench_new.json
+
+El resultado (JSON) se guarda en --output; con --compare se muestran las
+diferencias contra una corrida anterior.
+"""
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import random
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from bench.seed import BENCH_PASSWORD, BENCH_USER_PREFIX, WORDS, ensure_local_database
+
+
+# ==================== ESCENARIOS ====================
+
+@dataclass
+class Context:
+    """Datos de benchmark que usa cada proceso para armar los requests"""
+    usernames: List[str]
+    tokens: List[str]
+    event_ids: List[str]
+    category_ids: List[int]
+    base_date: datetime
+
+
+# (método, ruta, kwargs de httpx) de un request
+Request = Tuple[str, str, dict]
+
+
+@dataclass
+class Scenario:
+    build: Callable[[Context, random.Random], Request]
+    share: float = 1.0  # fracción de --requests (login es caro a propósito: bcrypt)
+
+
+def _auth(ctx: Context, rng: random.Random) -> dict:
+    return {"Authorization": f"Bearer {rng.choice(ctx.tokens)}"}
+
+
+def _login(ctx: Context, rng: random.Random) -> Request:
+    body = {"identifier": rng.choice(ctx.usernames), "password": BENCH_PASSWORD}
+    return "POST", "/auth/login", {"json": body}
+
+
+def _read_event(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/events/{rng.choice(ctx.event_ids)}", {"headers": _auth(ctx, rng)}
+
+
+def _by_date_range(ctx: Context, rng: random.Random) -> Request:
+    start = ctx.base_date + timedelta(days=rng.randint(-30, 300))
+    params = {
+        "start_date": start.isoformat(),
+        "end_date": (start + timedelta(days=7)).isoformat(),
+        "limit": 50,
+    }
+    return "GET", "/events/by-date-range/", {"params": params, "headers": _auth(ctx, rng)}
+
+
+def _toggle(status: str) -> Callable[[Context, random.Random], Request]:
+    def build(ctx: Context, rng: random.Random) -> Request:
+        return "POST", f"/assists/{rng.choice(ctx.event_ids)}/{status}", {"headers": _auth(ctx, rng)}
+    return build
+
+
+def _stats(ctx: Context, rng: random.Random) -> Request:
+    return "GET", f"/assists/{rng.choice(ctx.event_ids)}/stats", {"headers": _auth(ctx, rng)}
+
+
+def _stats_batch(ctx: Context, rng: random.Random) -> Request:
+    body = {"event_ids": rng.sample(ctx.event_ids, min(50, len(ctx.event_ids)))}
+    return "POST", "/assists/stats/batch", {"json": body, "headers": _auth(ctx, rng)}
+
+
+def _favorite_ids(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/favorites/ids", {"headers": _auth(ctx, rng)}
+
+
+def _favorite_check(ctx: Context, rng: random.Random) -> Request:
+    category_id = rng.choice(ctx.category_ids) if ctx.category_ids else 1
+    return "GET", f"/favorites/check/{category_id}", {"headers": _auth(ctx, rng)}
+
+
+def _favorite_count(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/favorites/count", {"headers": _auth(ctx, rng)}
+
+
+def _feed(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/events/feed", {"headers": _auth(ctx, rng)}
+
+
+def _search(ctx: Context, rng: random.Random) -> Request:
+    return "GET", "/events/search", {"params": {"q": rng.choice(WORDS)}, "headers": _auth(ctx, rng)}
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "login": Scenario(_login, share=0.1),
+    "read_event": Scenario(_read_event),
+    "by_date_range": Scenario(_by_date_range),
+    "toggle_assist": Scenario(_toggle("assist")),
+    "toggle_like": Scenario(_toggle("like")),
+    "stats": Scenario(_stats),
+    "stats_batch": Scenario(_stats_batch),
+    "favorites_ids": Scenario(_favorite_ids),
+    "favorites_check": Scenario(_favorite_check),
+    "favorites_count": Scenario(_favorite_count),
+    "feed": Scenario(_feed),
+    "search": Scenario(_search),
+}
+
+
+# ==================== GENERADOR DE CARGA ====================
+
+@dataclass
+class ScenarioRun:
+    latencies: List[float] = field(default_factory=list)  # segundos
+    errors: int = 0
+    started: float = 0.0
+    finished: float = 0.0
+
+
+async def _load_context(args: argparse.Namespace, worker: int, client: httpx.AsyncClient) -> Context:
+    """Ids de eventos y categorías desde la BD, y tokens de algunos usuarios (login)"""
+    from sqlalchemy import column, select, table
+
+    from app.database import AsyncSessionLocal
+    from app.models import Event, User
+
+    async with AsyncSessionLocal() as db:
+        bench_users = select(User.id).where(User.username.like(f"{BENCH_USER_PREFIX}%"))
+        result = await db.execute(
+            select(User.username).where(User.id.in_(bench_users)).order_by(User.username)
+        )
+        usernames = list(result.scalars())
+        result = await db.execute(
+            select(Event.id).where(Event.created_by.in_(bench_users)).order_by(Event.id).limit(args.event_pool)
+        )
+        event_ids = [str(event_id) for event_id in result.scalars()]
+        result = await db.execute(select(column("id")).select_from(table("categories")))
+        category_ids = list(result.scalars())
+
+    if not usernames or not event_ids:
+        sys.exit("No hay datos de benchmark: correr antes python -m bench.seed")
+
+    # Cada proceso usa su propio grupo de usuarios
+    rng = random.Random(args.seed + worker)
+    sample = rng.sample(usernames, min(args.users_per_process, len(usernames)))
+    tokens = []
+    for username in sample:
+        response = await client.post("/auth/login", json={"identifier": username, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        tokens.append(response.json()["access_token"])
+
+    return Context(
+        usernames=sample,
+        tokens=tokens,
+        event_ids=event_ids,
+        category_ids=category_ids,
+        base_date=datetime.combine(datetime.now().date(), datetime.min.time()),
+    )
+
+
+async def _drive(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: Context,
+    rng: random.Random,
+    requests: int,
+    concurrency: int
+) -> ScenarioRun:
+    """requests requests del escenario con concurrency en vuelo a la vez"""
+    run = ScenarioRun()
+    remaining = requests
+
+    async def user() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            method, url, kwargs = scenario.build(ctx, rng)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                if response.status_code >= 400:
+                    run.errors += 1
+            except httpx.HTTPError:
+                run.errors += 1
+            run.latencies.append(time.perf_counter() - started)
+
+    run.started = time.time()
+    await asyncio.gather(*(user() for _ in range(concurrency)))
+    run.finished = time.time()
+    return run
+
+
+def _make_client(args: argparse.Namespace, app=None) -> httpx.AsyncClient:
+    if args.url:
+        limits = httpx.Limits(max_connections=args.concurrency)
+        return httpx.AsyncClient(base_url=args.url, limits=limits, timeout=args.timeout)
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout)
+
+
+async def _run_scenarios(args: argparse.Namespace, worker: int, wait: Callable[[], None]) -> Dict[str, dict]:
+    rng = random.Random(args.seed + worker)
+    results = {}
+
+    async def run_all(client: httpx.AsyncClient) -> None:
+        ctx = await _load_context(args, worker, client)
+        for name in args.scenarios:
+            scenario = SCENARIOS[name]
+            requests = max(1, int(args.requests * scenario.share))
+            await _drive(client, scenario, ctx, rng, max(1, int(args.warmup * scenario.share)), args.concurrency)
+            # Todos los procesos empiezan cada escenario a la vez
+            await asyncio.get_running_loop().run_in_executor(None, wait)
+            run = await _drive(client, scenario, ctx, rng, requests, args.concurrency)
+            results[name] = run.__dict__
+
+    if args.url:
+        async with _make_client(args) as client:
+            await run_all(client)
+        from app.database import async_engine
+        await async_engine.dispose()
+        return results
+
+    from app.main import app
+    # Lifespan de la app: calibración de bcrypt al inicio, pools cerrados al final
+    async with app.router.lifespan_context(app):
+        async with _make_client(args, app) as client:
+            await run_all(client)
+    return results
+
+
+def _worker(args: argparse.Namespace, worker: int, barrier, queue) -> None:
+    """Proceso generador de carga (contexto spawn: importa la app por su cuenta)"""
+    try:
+        queue.put((worker, asyncio.run(_run_scenarios(args, worker, barrier.wait))))
+    except BaseException as e:
+        barrier.abort()
+        queue.put((worker, repr(e)))
+
+
+def run_processes(args: argparse.Namespace) -> List[Dict[str, dict]]:
+    if args.processes == 1:
+        return [asyncio.run(_run_scenarios(args, 0, lambda: None))]
+
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.processes)
+    queue = context.Queue()
+    processes = [
+        context.Process(target=_worker, args=(args, worker, barrier, queue))
+        for worker in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    failed = [result for _, result in results if isinstance(result, str)]
+    if failed:
+        sys.exit(f"Falló un proceso generador de carga: {failed[0]}")
+    return [result for _, result in sorted(results, key=lambda item: item[0])]
+
+
+# ==================== RESULTADOS ====================
+
+def percentile(ordered: List[float], percent: float) -> float:
+    """Percentil por rango más cercano (ordered ya ordenada)"""
+    if not ordered:
+        return 0.0
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(worker_results: List[Dict[str, dict]]) -> Dict[str, dict]:
+    """Junta los resultados de todos los procesos por escenario"""
+    summary = {}
+    for name in worker_results[0]:
+        runs = [result[name] for result in worker_results]
+        latencies = sorted(latency for run in runs for latency in run["latencies"])
+        elapsed = max(run["finished"] for run in runs) - min(run["started"] for run in runs)
+        summary[name] = {
+            "requests": len(latencies),
+            "errors": sum(run["errors"] for run in runs),
+            "rps": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+            "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    return summary
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _metadata(args: argparse.Namespace) -> dict:
+    from app.config import settings
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "target": args.url or "asgi",
+        "processes": args.processes,
+        "concurrency": args.concurrency,
+        "requests": args.requests,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "settings": {
+            "EVENTS_MATERIALIZED": settings.EVENTS_MATERIALIZED,
+            "AUTH_STATELESS_TOKENS": settings.AUTH_STATELESS_TOKENS,
+            "DB_POOL_SIZE": settings.DB_POOL_SIZE,
+        },
+    }
+
+
+def print_summary(summary: Dict[str, dict], previous: Optional[Dict[str, dict]] = None) -> None:
+    columns = ("rps", "p50_ms", "p95_ms", "p99_ms")
+    print(f"{'escenario':<18}{'reqs':>7}{'err':>6}" + "".join(f"{column:>18}" for column in columns))
+
+    for name, result in summary.items():
+        line = f"{name:<18}{result['requests']:>7}{result['errors']:>6}"
+        for column in columns:
+            value = f"{result[column]:.1f}"
+            before = (previous or {}).get(name, {}).get(column)
+            if before:
+                value += f" ({(result[column] - before) / before:+.0%})"
+            line += f"{value:>18}"
+        print(line)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark HTTP de la API")
+    parser.add_argument("--url", help="Servidor a medir (por defecto la app en el mismo proceso)")
+    parser.add_argument("--processes", type=int, default=1, help="Procesos generadores de carga")
+    parser.add_argument("--concurrency", type=int, default=10, help="Requests en vuelo por proceso")
+    parser.add_argument("--requests", type=int, default=500, help="Requests por escenario y proceso")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests sin medir antes de cada escenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Lista separada por comas")
+    parser.add_argument("--users-per-process", type=int, default=10)
+    parser.add_argument("--event-pool", type=int, default=1000, help="Eventos distintos a pedir")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_output.txt", help="Archivo JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior")
+    parser.add_argument("--allow-remote", action="store_true")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = build_parser().parse_args(argv)
+    args.scenarios = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f"Escenarios desconocidos: {', '.join(sorted(unknown))}")
+    ensure_local_database(args.allow_remote)
+
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)["results"]
+
+    summary = summarize(run_processes(args))
+    print_summary(summary, previous)
+
+    with open(args.output, "w") as f:
+        json.dump({"meta": _metadata(args), "results": summary}, f, indent=2)
+    print(f"Resultados en {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Carga un conjunto de datos sintético para los benchmarks.
+
+Los usuarios se llaman bench_user_00000, bench_user_00001, ... y comparten la
+contraseña BENCH_PASSWORD. Con la misma --seed se generan los mismos datos
+(las fechas son relativas a --base-date, por defecto hoy).
+
+Uso:
+    python -m bench.seed --users 200 --events 20000 --marks-per-user 50
+    python -m bench.seed --reset-only        # borrar los datos de benchmark
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from datetime import date, datetime, time, timedelta
+from typing import List, Sequence
+
+from sqlalchemy import column, delete, insert, select, table
+from sqlalchemy.engine import make_url
+
+from app import passwords
+from app.config import settings
+from app.crud import event_stats as crud_event_stats
+from app.crud import events as crud_events
+from app.database import DATABASE_URL, AsyncSessionLocal, async_engine
+from app.models import Assist, Event, EventCategory, Favorite, User
+
+
+BENCH_USER_PREFIX = "bench_user_"
+BENCH_PASSWORD = "bench-password"
+
+# Filas por INSERT (executemany)
+CHUNK_SIZE = 5000
+
+_LOCAL_HOSTS = {None, "", "localhost", "127.0.0.1", "::1"}
+
+WORDS = (
+    "concierto", "feria", "taller", "muestra", "maratón", "cine", "teatro",
+    "jazz", "rock", "pintura", "fotografía", "ajedrez", "yoga", "literatura",
+    "gastronomía", "ciencia", "robótica", "danza", "tango", "folklore",
+)
+
+
+def bench_username(index: int) -> str:
+    return f"{BENCH_USER_PREFIX}{index:05d}"
+
+
+def ensure_local_database(allow_remote: bool) -> None:
+    """Evita cargar (o medir) contra una BD remota por error"""
+    url = make_url(DATABASE_URL)
+    host = url.host or url.query.get("host")
+    if allow_remote or host in _LOCAL_HOSTS or str(host).startswith("/"):
+        return
+    sys.exit(f"DATABASE_URL apunta a {host}: usar una BD local o pasar --allow-remote")
+
+
+def _chunks(rows: Sequence[dict]):
+    for start in range(0, len(rows), CHUNK_SIZE):
+        yield rows[start:start + CHUNK_SIZE]
+
+
+async def _insert_rows(db, model, rows: List[dict]) -> None:
+    for chunk in _chunks(rows):
+        await db.execute(insert(model), chunk)
+
+
+async def reset_bench_data(db) -> None:
+    """Borra usuarios bench_user_* y todo lo que crearon"""
+    bench_users = select(User.id).where(User.username.like(f"{BENCH_USER_PREFIX}%"))
+
+    await db.execute(delete(Favorite).where(Favorite.user_id.in_(bench_users)))
+    # Marcas, categorías, contadores y copia materializada se borran por cascada
+    await db.execute(delete(Event).where(Event.created_by.in_(bench_users)))
+    await db.execute(delete(User).where(User.username.like(f"{BENCH_USER_PREFIX}%")))
+    await db.commit()
+
+
+async def _existing_ids(db, name: str) -> List[int]:
+    result = await db.execute(select(column("id")).select_from(table(name)).order_by(column("id")))
+    return list(result.scalars())
+
+
+async def seed(args: argparse.Namespace) -> None:
+    rng = random.Random(args.seed)
+    base = datetime.combine(args.base_date, time())
+
+    async with AsyncSessionLocal() as db:
+        await reset_bench_data(db)
+        if args.reset_only:
+            # Marcas de bench_user_* en eventos ajenos: descontarlas
+            await crud_event_stats.reconcile_event_stats(db)
+            return
+
+        location_ids = await _existing_ids(db, "locations")
+        category_ids = await _existing_ids(db, "categories")
+
+        # Todos con la misma contraseña: un solo hash
+        hashed_password = passwords.get_password_hash(BENCH_PASSWORD, rounds=passwords.get_target_rounds())
+
+        users = [
+            {
+                "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                "username": bench_username(index),
+                "email": f"{bench_username(index)}@bench.local",
+                "hashed_password": hashed_password,
+                "role": "user",
+            }
+            for index in range(args.users)
+        ]
+        await _insert_rows(db, User, users)
+
+        creators = [user["id"] for user in users[:max(1, args.users // 10)]]
+        events = []
+        event_categories = []
+        for _ in range(args.events):
+            event_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            start_time = base + timedelta(
+                days=rng.randint(-args.days_before, args.days_after),
+                minutes=15 * rng.randint(32, 88)
+            )
+            recurring = rng.random() < args.recurring_ratio
+            events.append({
+                "id": event_id,
+                "title": " ".join(rng.sample(WORDS, 3)).capitalize(),
+                "description": " ".join(rng.choices(WORDS, k=12)),
+                "location_id": rng.choice(location_ids) if location_ids else None,
+                "start_time": start_time,
+                "end_time": start_time + timedelta(hours=rng.randint(1, 4)),
+                "is_recurring": recurring,
+                "recurrence_rule": "FREQ=WEEKLY" if recurring else None,
+                "created_by": rng.choice(creators),
+                "status": "active",
+                "created_at": base - timedelta(days=rng.randint(1, 60)),
+            })
+            if category_ids:
+                for category_id in rng.sample(category_ids, min(2, len(category_ids))):
+                    event_categories.append({"event_id": event_id, "category_id": category_id})
+
+        await _insert_rows(db, Event, events)
+        await _insert_rows(db, EventCategory, event_categories)
+
+        event_ids = [event["id"] for event in events]
+        marks = []
+        favorites = []
+        for user in users:
+            for event_id in rng.sample(event_ids, min(args.marks_per_user, len(event_ids))):
+                marks.append({
+                    "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                    "user_id": user["id"],
+                    "event_id": event_id,
+                    "status": rng.choice(("assist", "like")),
+                    "created_at": base,
+                })
+            for category_id in rng.sample(category_ids, min(args.favorites_per_user, len(category_ids))):
+                favorites.append({"user_id": user["id"], "category_id": category_id})
+
+        await _insert_rows(db, Assist, marks)
+        await _insert_rows(db, Favorite, favorites)
+        await db.commit()
+
+        # Contadores y copia materializada a partir de lo insertado
+        await crud_event_stats.reconcile_event_stats(db)
+        if settings.EVENTS_MATERIALIZED:
+            await crud_events.refresh_materialized_events(db)
+
+    print(
+        f"bench: {len(users)} usuarios, {len(events)} eventos, "
+        f"{len(marks)} marcas, {len(favorites)} favoritos"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Carga datos sintéticos para los benchmarks")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--marks-per-user", type=int, default=50)
+    parser.add_argument("--favorites-per-user", type=int, default=2)
+    parser.add_argument("--recurring-ratio", type=float, default=0.02)
+    parser.add_argument("--days-before", type=int, default=30, help="Eventos pasados (días)")
+    parser.add_argument("--days-after", type=int, default=335, help="Eventos futuros (días)")
+    parser.add_argument("--base-date", type=date.fromisoformat, default=date.today())
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset-only", action="store_true", help="Solo borrar los datos de benchmark")
+    parser.add_argument("--allow-remote", action="store_true")
+    return parser
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        await seed(args)
+    finally:
+        await async_engine.dispose()
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    ensure_local_database(arguments.allow_remote)
+    asyncio.run(main(arguments))
@@ -0,0 +1,117 @@
+"""
+CPU de serializar una página de eventos, sin BD ni red.
+
+Compara, para una página de --rows filas:
+  - fastapi_json:   response_model (validar + pasar a dicts) + JSONResponse (lo que había)
+  - fastapi_orjson: response_model (validar + pasar a dicts) + ORJSONResponse (default actual)
+  - direct:         model_response() (app/responses.py)
+
+con dos entradas: objetos ORM (by_created_by, my-marks) y modelos
+EventWithLocation ya validados (by-date-range, feed).
+
+Uso:
+    python -m bench.serialization --rows 500 --repeat 200
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from app.models import EventWithLocationView
+from app.pagination import build_page
+from app.responses import model_response
+from app.schemas import EventWithLocation, EventWithLocationPage
+
+
+def make_rows(count: int) -> List[EventWithLocationView]:
+    base = datetime(2026, 1, 1, 18, 0)
+    return [
+        EventWithLocationView(
+            id=uuid.UUID(int=index + 1, version=4),
+            title=f"Evento de prueba número {index}",
+            description="Descripción del evento con algo de texto para que pese como uno real. " * 3,
+            location_id=index % 20,
+            start_time=base + timedelta(hours=index),
+            end_time=base + timedelta(hours=index + 2),
+            location_name="Parque Central",
+            created_by=uuid.UUID(int=1, version=4),
+            created_at=base,
+            is_recurring=False,
+        )
+        for index in range(count)
+    ]
+
+
+def _page(rows: list) -> dict:
+    return build_page(rows, len(rows) - 1, lambda event: (event.start_time, event.id))
+
+
+_response_field = create_model_field(name="Response_page", type_=EventWithLocationPage, mode="serialization")
+_loop = asyncio.new_event_loop()
+
+
+def _through_response_model(response_class) -> Callable[[list], bytes]:
+    """Lo que hace FastAPI con un dict de objetos ORM y response_model"""
+    def render(rows: list) -> bytes:
+        content = _loop.run_until_complete(
+            serialize_response(field=_response_field, response_content=_page(rows))
+        )
+        return response_class(content).body
+    return render
+
+
+def _direct(rows: list) -> bytes:
+    return model_response(EventWithLocationPage, _page(rows)).body
+
+
+STRATEGIES = {
+    "fastapi_json": _through_response_model(JSONResponse),
+    "fastapi_orjson": _through_response_model(ORJSONResponse),
+    "direct": _direct,
+}
+
+
+def measure(render: Callable[[list], bytes], rows: list, repeat: int) -> float:
+    """CPU (process_time) promedio por página, en segundos"""
+    render(rows)  # calentamiento (TypeAdapters, caches)
+    start = time.process_time()
+    for _ in range(repeat):
+        render(rows)
+    return (time.process_time() - start) / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="CPU de serializar una página de eventos")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows + 1)  # limit + 1, como en los endpoints
+    inputs = {
+        "objetos ORM": rows,
+        "modelos validados": [EventWithLocation.model_validate(row, from_attributes=True) for row in rows],
+    }
+
+    print(f"Página de {args.rows} eventos, {args.repeat} repeticiones")
+    for label, items in inputs.items():
+        # Los tres caminos tienen que producir el mismo JSON
+        bodies = {name: json.loads(render(items)) for name, render in STRATEGIES.items()}
+        assert all(body == bodies["fastapi_json"] for body in bodies.values()), "Las salidas no coinciden"
+
+        print(f"\n{label}:")
+        baseline = None
+        for name, render in STRATEGIES.items():
+            seconds = measure(render, items, args.repeat)
+            baseline = baseline or seconds
+            print(f"  {name:<16}{seconds * 1000:>9.2f} ms/página{baseline / seconds:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
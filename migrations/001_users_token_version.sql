@@ -0,0 +1,7 @@
+-- ============================================
+-- Versión de tokens por usuario (tokens stateless)
+-- Se incrementa al cambiar contraseña o rol: los tokens con versión menor quedan revocados
+-- ============================================
+
+ALTER TABLE users
+    ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0;
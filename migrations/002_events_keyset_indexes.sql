@@ -0,0 +1,16 @@
+-- ============================================
+-- Índices para la paginación por cursor (keyset) de eventos
+-- /events/by_created_by/  -> (created_by, created_at DESC, id DESC)
+-- /events/by-date-range/  -> (start_time, id)
+-- ============================================
+
+-- created_at es parte del cursor: completar los eventos creados sin fecha
+UPDATE events SET created_at = COALESCE(edited_at, start_time, now()) WHERE created_at IS NULL;
+ALTER TABLE events ALTER COLUMN created_at SET DEFAULT now();
+ALTER TABLE events ALTER COLUMN created_at SET NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_events_created_by_created_at_id
+    ON events (created_by, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_events_start_time_id
+    ON events (start_time, id);
@@ -0,0 +1,22 @@
+-- ============================================
+-- Contadores materializados de assists/likes por evento
+-- Los mantienen toggle_assist / toggle_like en la misma transacción;
+-- python -m app.jobs.reconcile_event_stats los recalcula desde assist.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS event_stats (
+    event_id UUID PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+    total_assists INTEGER NOT NULL DEFAULT 0,
+    total_likes INTEGER NOT NULL DEFAULT 0
+);
+
+-- Carga inicial
+INSERT INTO event_stats (event_id, total_assists, total_likes)
+SELECT event_id,
+       COUNT(*) FILTER (WHERE status = 'assist'),
+       COUNT(*) FILTER (WHERE status = 'like')
+FROM assist
+GROUP BY event_id
+ON CONFLICT (event_id) DO UPDATE
+    SET total_assists = EXCLUDED.total_assists,
+        total_likes = EXCLUDED.total_likes;
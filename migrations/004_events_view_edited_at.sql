@@ -0,0 +1,19 @@
+-- ============================================
+-- edited_at en la vista events_with_location
+-- GET /events/{id} arma el ETag con edited_at (o created_at si nunca se editó).
+-- CREATE OR REPLACE VIEW solo permite agregar columnas al final.
+-- ============================================
+
+CREATE OR REPLACE VIEW events_with_location AS
+SELECT e.id,
+       e.title,
+       e.description,
+       e.location_id,
+       e.start_time,
+       e.end_time,
+       l.name AS location_name,
+       e.created_by,
+       e.created_at,
+       e.edited_at
+FROM events e
+LEFT JOIN locations l ON l.id = e.location_id;
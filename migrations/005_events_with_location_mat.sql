@@ -0,0 +1,39 @@
+-- ============================================
+-- Copia materializada de la vista events_with_location
+-- Se usa con EVENTS_MATERIALIZED=true: las lecturas no repiten el JOIN con locations.
+-- La API la mantiene al crear/editar eventos (los borrados se propagan por la FK);
+-- python -m app.jobs.refresh_events_mat la recalcula completa.
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS events_with_location_mat (
+    id UUID PRIMARY KEY REFERENCES events(id) ON DELETE CASCADE,
+    title TEXT NOT NULL,
+    description TEXT,
+    location_id INTEGER,
+    start_time TIMESTAMP,
+    end_time TIMESTAMP,
+    location_name TEXT,
+    created_by UUID,
+    created_at TIMESTAMP NOT NULL,
+    edited_at TIMESTAMP
+);
+
+-- Carga inicial
+INSERT INTO events_with_location_mat
+SELECT id, title, description, location_id, start_time, end_time,
+       location_name, created_by, created_at, edited_at
+FROM events_with_location
+ON CONFLICT (id) DO NOTHING;
+
+-- /events/by-date-range/ y /events/export/
+CREATE INDEX IF NOT EXISTS idx_events_mat_start_time_id
+    ON events_with_location_mat (start_time, id);
+
+-- /events/by_created_by/
+CREATE INDEX IF NOT EXISTS idx_events_mat_created_by_created_at_id
+    ON events_with_location_mat (created_by, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS idx_events_mat_location_id
+    ON events_with_location_mat (location_id);
+
+ANALYZE events_with_location_mat;
@@ -0,0 +1,39 @@
+-- ============================================
+-- Eventos recurrentes en events_with_location
+-- /events/by-date-range/ expande las series (is_recurring + recurrence_rule)
+-- dentro de la ventana pedida; el resto de los eventos sigue usando el índice.
+-- ============================================
+
+CREATE OR REPLACE VIEW events_with_location AS
+SELECT e.id,
+       e.title,
+       e.description,
+       e.location_id,
+       e.start_time,
+       e.end_time,
+       l.name AS location_name,
+       e.created_by,
+       e.created_at,
+       e.edited_at,
+       e.is_recurring,
+       e.recurrence_rule
+FROM events e
+LEFT JOIN locations l ON l.id = e.location_id;
+
+-- Copia materializada (EVENTS_MATERIALIZED)
+ALTER TABLE events_with_location_mat ADD COLUMN IF NOT EXISTS is_recurring BOOLEAN;
+ALTER TABLE events_with_location_mat ADD COLUMN IF NOT EXISTS recurrence_rule TEXT;
+
+-- Todas las filas: con NULL la API devolvería null donde la vista devuelve false
+UPDATE events_with_location_mat m
+SET is_recurring = COALESCE(e.is_recurring, false),
+    recurrence_rule = e.recurrence_rule
+FROM events e
+WHERE e.id = m.id;
+
+-- Series que pueden caer en una ventana: start_time <= fin de la ventana
+CREATE INDEX IF NOT EXISTS idx_events_recurring_start_time
+    ON events (start_time) WHERE is_recurring AND recurrence_rule IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_events_mat_recurring_start_time
+    ON events_with_location_mat (start_time) WHERE is_recurring AND recurrence_rule IS NOT NULL;
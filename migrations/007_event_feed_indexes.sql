@@ -0,0 +1,11 @@
+-- ============================================
+-- Índices para /events/feed (eventos de las categorías favoritas)
+-- event_categories: su PK es (event_id, category_id); el feed busca por category_id
+-- favorite: favoritos activos de un usuario
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_event_categories_category_event
+    ON event_categories (category_id, event_id);
+
+CREATE INDEX IF NOT EXISTS idx_favorite_user_active
+    ON favorite (user_id, category_id) WHERE deleted_at IS NULL;
@@ -0,0 +1,14 @@
+-- ============================================
+-- Búsqueda de texto en eventos (/events/search)
+-- search_vector es una columna generada: se mantiene sola en cada INSERT/UPDATE.
+-- Título con peso A y descripción con peso B (ts_rank los pondera).
+-- ============================================
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish'::regconfig, coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('spanish'::regconfig, coalesce(description, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_events_search_vector
+    ON events USING GIN (search_vector);
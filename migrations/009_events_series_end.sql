@@ -0,0 +1,47 @@
+-- ============================================
+-- Fin de las series recurrentes (series_end)
+-- Inicio de la última ocurrencia (UNTIL o COUNT); NULL si la serie no termina.
+-- La API lo calcula al escribir recurrence_rule/start_time. /events/by-date-range/
+-- y /events/export/ descartan con él las series que terminaron antes de la ventana.
+-- Las series existentes quedan en NULL (abiertas, mismo resultado) hasta correr
+-- (con EVENTS_MATERIALIZED también actualiza la copia materializada):
+--     python -m app.jobs.backfill_series_end
+-- ============================================
+
+ALTER TABLE events ADD COLUMN IF NOT EXISTS series_end TIMESTAMP;
+
+CREATE OR REPLACE VIEW events_with_location AS
+SELECT e.id,
+       e.title,
+       e.description,
+       e.location_id,
+       e.start_time,
+       e.end_time,
+       l.name AS location_name,
+       e.created_by,
+       e.created_at,
+       e.edited_at,
+       COALESCE(e.is_recurring, false) AS is_recurring,
+       e.recurrence_rule,
+       e.series_end
+FROM events e
+LEFT JOIN locations l ON l.id = e.location_id;
+
+-- Copia materializada (EVENTS_MATERIALIZED)
+ALTER TABLE events_with_location_mat ADD COLUMN IF NOT EXISTS series_end TIMESTAMP;
+
+-- Todas las filas: 006 solo copiaba is_recurring de las series (el resto quedaba NULL)
+UPDATE events_with_location_mat m
+SET is_recurring = COALESCE(e.is_recurring, false),
+    series_end = e.series_end
+FROM events e
+WHERE e.id = m.id
+  AND (m.is_recurring IS DISTINCT FROM COALESCE(e.is_recurring, false)
+       OR m.series_end IS DISTINCT FROM e.series_end);
+
+-- Series que pueden caer en una ventana: series_end IS NULL OR series_end >= inicio de la ventana
+CREATE INDEX IF NOT EXISTS idx_events_recurring_series_end
+    ON events (series_end) WHERE is_recurring AND recurrence_rule IS NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_events_mat_recurring_series_end
+    ON events_with_location_mat (series_end) WHERE is_recurring AND recurrence_rule IS NOT NULL;
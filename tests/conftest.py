@@ -0,0 +1,45 @@
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.database import async_engine
+from app.main import app
+from app.routers.auth import get_current_user
+from app.schemas import CurrentUser
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def client():
+    """
+    httpx.AsyncClient sobre la app (ASGITransport, sin red), contra la BD de
+    DATABASE_URL. Si la BD no responde, la prueba se saltea.
+    """
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except (OSError, SQLAlchemyError) as e:
+        pytest.skip(f"BD no disponible: {e}")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+    # Cada prueba corre en su propio event loop: no reutilizar conexiones
+    await async_engine.dispose()
+
+
+@pytest.fixture
+def as_user():
+    """Requests autenticados sin token: get_current_user devuelve este usuario"""
+    user = CurrentUser(id=uuid.uuid4(), username="test", role="user", from_claims=True)
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(get_current_user, None)
@@ -0,0 +1,48 @@
+import uuid
+from types import SimpleNamespace
+
+import asyncpg
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.crud import assists as crud_assists
+
+
+def _integrity_error(error_class, sqlstate: str, constraint: str) -> IntegrityError:
+    """IntegrityError como lo deja el adaptador asyncpg: la excepción original es la causa de orig"""
+    cause = error_class.new({"C": sqlstate, "M": "violation", "n": constraint})
+    orig = Exception(str(cause))
+    orig.__cause__ = cause
+    return IntegrityError("WITH deleted AS (...)", {}, orig)
+
+
+def _failing_db(error: IntegrityError):
+    async def execute(statement):
+        raise error
+
+    async def rollback():
+        db.rolled_back = True
+
+    db = SimpleNamespace(execute=execute, rollback=rollback, rolled_back=False)
+    return db
+
+
+@pytest.mark.anyio
+async def test_toggle_missing_event_is_event_not_found():
+    db = _failing_db(_integrity_error(asyncpg.ForeignKeyViolationError, "23503", "assist_event_id_fkey"))
+    with pytest.raises(crud_assists.EventNotFound):
+        await crud_assists.toggle_mark(db, uuid.uuid4(), uuid.uuid4(), "assist")
+    assert db.rolled_back
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("error_class, sqlstate, constraint", [
+    (asyncpg.ForeignKeyViolationError, "23503", "assist_user_id_fkey"),  # usuario borrado, token stateless vigente
+    (asyncpg.ForeignKeyViolationError, "23503", "event_stats_event_id_fkey"),
+    (asyncpg.CheckViolationError, "23514", "assist_status_check"),
+])
+async def test_toggle_other_integrity_errors_are_raised(error_class, sqlstate, constraint):
+    db = _failing_db(_integrity_error(error_class, sqlstate, constraint))
+    with pytest.raises(IntegrityError):
+        await crud_assists.toggle_mark(db, uuid.uuid4(), uuid.uuid4(), "like")
+    assert db.rolled_back
@@ -0,0 +1,114 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.config import settings
+from app.crud import users as crud_users
+from app.routers.auth import create_access_token, get_current_user, principal_from_claims
+
+
+class FakeSession:
+    """Sesión mínima para get_user: cuenta los accesos a la BD"""
+
+    def __init__(self, user):
+        self.user = user
+        self.gets = 0
+
+    async def get(self, model, key):
+        self.gets += 1
+        return self.user
+
+
+def make_user(token_version: int = 3):
+    return SimpleNamespace(
+        id=uuid.uuid4(),
+        username="ana",
+        role="organizer",
+        creator_type="comercio",
+        token_version=token_version,
+        email="ana@example.com",
+    )
+
+
+def claims(user) -> dict:
+    return {
+        "sub": str(user.id),
+        "username": user.username,
+        "role": user.role,
+        "creator_type": user.creator_type,
+        "ver": user.token_version,
+    }
+
+
+@pytest.mark.anyio
+async def test_token_version_cached_after_invalidation_and_refresh():
+    user = make_user()
+    db = FakeSession(user)
+
+    # Invalidar otra entrada mueve el contador de la cache de usuarios
+    crud_users.invalidate_current_user(uuid.uuid4())
+    crud_users.invalidate_current_user(user.id)
+    await crud_users.refresh_current_user(db, user.id)
+    await crud_users.refresh_current_user(db, user.id)
+
+    assert crud_users.get_known_token_version(user.id) == 3
+    principal = principal_from_claims(user.id, claims(user))
+    assert principal is not None and principal.from_claims
+    assert principal.role == "organizer"
+
+
+@pytest.mark.anyio
+async def test_stateless_token_resolves_without_db(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_STATELESS_TOKENS", True)
+    user = make_user()
+    db = FakeSession(user)
+    token = create_access_token(user.id, user=user)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    # Primer request: versión desconocida, se lee de la BD una vez
+    crud_users.invalidate_current_user(uuid.uuid4())
+    first = await get_current_user(credentials, db)
+    assert db.gets == 1 and not first.from_claims
+
+    # Los siguientes se resuelven con los claims
+    second = await get_current_user(credentials, db)
+    assert db.gets == 1 and second.from_claims
+
+
+def test_stale_version_is_not_resolved_from_claims():
+    user = make_user(token_version=2)
+    crud_users._token_version_cache.set(user.id, 3)
+    assert principal_from_claims(user.id, claims(user)) is None
+
+
+class SlowSession(FakeSession):
+    """get() que, mientras "lee" de la BD, deja correr un cambio del usuario"""
+
+    def __init__(self, user, during_read):
+        super().__init__(user)
+        self.during_read = during_read
+
+    async def get(self, model, key):
+        snapshot = SimpleNamespace(**vars(self.user))
+        self.during_read()
+        self.gets += 1
+        return snapshot
+
+
+@pytest.mark.anyio
+async def test_concurrent_read_does_not_restore_revoked_version():
+    user = make_user(token_version=3)
+
+    def change_password():
+        user.token_version = 4
+        crud_users._after_user_change(user)
+
+    crud_users.invalidate_current_user(user.id)
+    await crud_users.get_current_user_cached(SlowSession(user, change_password), user.id)
+
+    # La lectura vio la versión 3, pero el cambio ya había publicado la 4
+    assert crud_users.get_known_token_version(user.id) == 4
+    revoked = claims(user) | {"ver": 3}
+    assert principal_from_claims(user.id, revoked) is None
@@ -0,0 +1,76 @@
+from app.cache import TTLCache
+
+
+def test_get_set_and_lru_order():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" pasa a ser la más reciente
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_stale_fill_is_rejected():
+    cache = TTLCache(maxsize=10, ttl=60)
+    stamp = cache.stamp()
+    cache.pop("a")  # invalidación mientras se "leía de la BD"
+    assert cache.set("a", "viejo", stamp=stamp) is False
+    assert cache.get("a") is None
+
+    stamp = cache.stamp()
+    assert cache.set("a", "nuevo", stamp=stamp) is True
+    assert cache.get("a") == "nuevo"
+
+
+def test_stamp_is_per_cache_not_per_key():
+    cache = TTLCache(maxsize=10, ttl=60)
+    stamp = cache.stamp()
+    cache.pop("otra")
+    assert cache.set("a", 1, stamp=stamp) is False
+
+    stamp = cache.stamp()
+    cache.clear()
+    assert cache.set("a", 1, stamp=stamp) is False
+
+
+def test_disabled_cache_does_not_store():
+    cache = TTLCache(maxsize=0, ttl=60)
+    assert cache.set("a", 1) is False
+    assert cache.get("a") is None
+
+
+def test_on_evict_called_for_every_way_out():
+    evicted = []
+    cache = TTLCache(maxsize=2, ttl=60, on_evict=lambda key, value: evicted.append((key, value)))
+
+    cache.set("a", 1)
+    cache.set("a", 2)  # reemplazo
+    cache.set("a", 2)  # mismo valor: no es un desalojo
+    assert evicted == [("a", 1)]
+
+    cache.set("b", 3)
+    cache.set("c", 4)  # desalojo LRU de "a"
+    assert evicted[-1] == ("a", 2)
+
+    cache.pop("b")
+    assert evicted[-1] == ("b", 3)
+    cache.pop("b")  # ya no está: no se llama
+    assert len(evicted) == 3
+
+    cache.set("d", 5, ttl=-1)  # expirada
+    assert cache.get("d") is None
+    assert evicted[-1] == ("d", 5)
+
+    cache.clear()
+    assert evicted[-1] == ("c", 4)
+    assert len(cache) == 0
+
+
+def test_on_evict_runs_outside_the_lock():
+    cache = TTLCache(maxsize=1, ttl=60)
+    # El callback vuelve a usar la cache: con el lock tomado se bloquearía
+    cache.on_evict = lambda key, value: cache.get("x")
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.pop("b")
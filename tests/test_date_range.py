@@ -0,0 +1,234 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import column, delete, insert, table
+
+from app import recurrence
+from app.crud import events as crud_events
+from app.database import AsyncSessionLocal
+from app.models import Event, User
+from app.schemas import EventCreate
+
+
+# Ventana lejana para no cruzarse con otros datos de la BD
+WINDOW_START = datetime(2091, 3, 1)
+WINDOW_END = datetime(2091, 3, 31, 23, 59, 59)
+HOUR = timedelta(hours=1)
+
+_locations = table("locations", column("id"), column("name"))
+
+
+def _event(title: str, start: datetime, rule: str = None) -> EventCreate:
+    return EventCreate(
+        title=title,
+        start_time=start,
+        end_time=start + HOUR,
+        is_recurring=rule is not None,
+        recurrence_rule=rule,
+    )
+
+
+# Únicos y series con empates de start_time entre sí y con las ocurrencias
+EVENTS = [
+    _event("único 1", datetime(2091, 3, 1, 18)),
+    _event("único 2", datetime(2091, 3, 1, 18)),
+    _event("único 3", datetime(2091, 3, 8, 18)),
+    _event("único 4", datetime(2091, 3, 31, 23, 59, 59)),
+    _event("único fuera", datetime(2091, 4, 1, 0, 0)),
+    _event("semanal", datetime(2091, 2, 22, 18), "FREQ=WEEKLY"),
+    _event("semanal 2", datetime(2091, 2, 22, 18), "FREQ=WEEKLY"),
+    _event("diario x10", datetime(2091, 3, 1, 18), "FREQ=DAILY;COUNT=10"),
+    _event("lun y mié", datetime(2091, 1, 5, 9), "FREQ=WEEKLY;BYDAY=MO,WE"),
+    _event("mensual", datetime(2091, 3, 31, 23, 59, 59), "FREQ=MONTHLY"),
+    _event("después", datetime(2091, 4, 2, 18), "FREQ=DAILY"),
+    _event("terminada", datetime(2091, 1, 1, 18), "FREQ=DAILY;COUNT=5"),
+    _event("hasta el 8", datetime(2091, 2, 1, 12), "FREQ=WEEKLY;UNTIL=20910308T120000"),
+]
+
+
+def test_expand_with_offset_window():
+    dtstart = datetime(2091, 2, 22, 18)
+    aware = recurrence.expand(
+        "FREQ=WEEKLY", dtstart,
+        datetime(2091, 3, 1, tzinfo=timezone.utc),
+        datetime(2091, 3, 20, tzinfo=timezone(timedelta(hours=-3)))
+    )
+    assert aware == recurrence.expand("FREQ=WEEKLY", dtstart, datetime(2091, 3, 1), datetime(2091, 3, 20, 3))
+    assert aware == tuple(datetime(2091, 3, day, 18) for day in (1, 8, 15))
+    assert all(start.tzinfo is None for start in aware)
+
+
+def test_series_end():
+    start = datetime(2091, 3, 1, 18)
+    assert recurrence.series_end("FREQ=DAILY;COUNT=10", start) == datetime(2091, 3, 10, 18)
+    assert recurrence.series_end("FREQ=WEEKLY;UNTIL=20910331T000000", start) == datetime(2091, 3, 31)
+    assert recurrence.series_end("FREQ=WEEKLY", start) is None
+    assert recurrence.series_end("garbage", start) is None
+    assert recurrence.series_end(None, start) is None
+
+
+def test_zero_interval_is_rejected():
+    with pytest.raises(ValueError):
+        recurrence.validate_rule("FREQ=DAILY;INTERVAL=0")
+    with pytest.raises(ValueError):
+        EventCreate(
+            title="x", start_time=datetime(2091, 3, 1), end_time=datetime(2091, 3, 1, 1),
+            is_recurring=True, recurrence_rule="FREQ=DAILY;INTERVAL=0"
+        )
+
+    # Filas guardadas antes de la validación: la serie se omite (ni 500 ni ocurrencias repetidas)
+    for dtstart in (datetime(2091, 1, 1), datetime(2091, 3, 10)):
+        series = SimpleNamespace(
+            id=uuid.uuid4(), recurrence_rule="FREQ=DAILY;INTERVAL=0", start_time=dtstart,
+            created_at=dtstart, edited_at=None
+        )
+        assert recurrence.get_series_occurrences(series, WINDOW_START, WINDOW_END) == ()
+
+
+def test_utc_until():
+    # UNTIL en UTC (forma de RFC 5545) con DTSTART sin zona
+    rule = "FREQ=WEEKLY;UNTIL=20910315T180000Z"
+    assert recurrence.validate_rule(rule) == rule
+    assert recurrence.validate_rule("RRULE:UNTIL=20910315T180000Z;FREQ=WEEKLY")
+
+    dtstart = datetime(2091, 2, 22, 18)
+    assert recurrence.expand(rule, dtstart, WINDOW_START, WINDOW_END) == (
+        datetime(2091, 3, 1, 18), datetime(2091, 3, 8, 18), datetime(2091, 3, 15, 18)
+    )
+    assert recurrence.series_end(rule, dtstart) == datetime(2091, 3, 15, 18)
+
+
+def test_invalid_stored_rule_is_skipped(caplog):
+    # Filas anteriores a validate_rule: la serie se omite en vez de dar 500
+    series = SimpleNamespace(
+        id=uuid.uuid4(), recurrence_rule="garbage", start_time=datetime(2091, 2, 22, 18),
+        created_at=datetime(2091, 1, 1), edited_at=None
+    )
+    assert recurrence.get_series_occurrences(series, WINDOW_START, WINDOW_END) == ()
+    assert "garbage" in caplog.text
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("batch_size", [1, 2, 3, 100])
+async def test_export_merge_keeps_order(batch_size):
+    def row(day, hour, event_id):
+        return (uuid.UUID(int=event_id), "t", None, None, datetime(2091, 3, day, hour), None, None)
+
+    one_off = sorted([row(1, 9, 5), row(1, 18, 1), row(2, 18, 2), row(5, 9, 3), row(9, 9, 4)], key=crud_events._export_key)
+    occurrences = sorted([row(1, 18, 7), row(1, 8, 8), row(9, 10, 6), row(12, 9, 9), row(12, 9, 10)], key=crud_events._export_key)
+
+    async def batches():
+        for offset in range(0, len(one_off), batch_size):
+            yield one_off[offset:offset + batch_size]
+
+    merged = [r async for rows in crud_events.merge_occurrences(batches(), occurrences, batch_size) for r in rows]
+    assert merged == sorted(one_off + occurrences, key=crud_events._export_key)
+
+
+@pytest.fixture
+async def fixture_events(client):
+    """
+    Crea EVENTS en una locación propia (las series abiertas de otros datos
+    también llegan a 2091) y los borra al terminar. Devuelve (location_id, ids).
+    """
+    user_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User).values(
+            id=user_id, username=f"test_{user_id.hex[:12]}",
+            email=f"{user_id.hex[:12]}@test.local", hashed_password="-"
+        ))
+        location_id = await db.scalar(
+            insert(_locations).values(name="test_date_range").returning(_locations.c.id)
+        )
+        events = [event.model_copy(update={"location_id": location_id}) for event in EVENTS]
+        event_ids = await crud_events.bulk_create_events(db, events, user_id)
+
+    yield location_id, event_ids
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Event).where(Event.created_by == user_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.execute(delete(_locations).where(_locations.c.id == location_id))
+        await db.commit()
+
+
+def expected_occurrences(event_ids):
+    """Expansión sin paginar: (start_time, id) de todas las ocurrencias de la ventana"""
+    expected = []
+    for event_id, event in zip(event_ids, EVENTS):
+        if event.recurrence_rule:
+            starts = recurrence.expand(event.recurrence_rule, event.start_time, WINDOW_START, WINDOW_END)
+        else:
+            starts = [event.start_time] if WINDOW_START <= event.start_time <= WINDOW_END else []
+        expected.extend((start, str(event_id)) for start in starts)
+    return sorted(expected)
+
+
+async def fetch_all(client, location_id: int, limit: int):
+    params = {
+        "start_date": WINDOW_START.isoformat(), "end_date": "2091-03-31",
+        "location_id": location_id, "limit": limit,
+    }
+    items, pages = [], 0
+    while True:
+        response = await client.get("/events/by-date-range/", params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        assert len(page["items"]) <= limit
+        items.extend((datetime.fromisoformat(item["start_time"]), item["id"]) for item in page["items"])
+        pages += 1
+        if not page["next_cursor"]:
+            return items, pages
+        params["cursor"] = page["next_cursor"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("limit", [1, 2, 3, 7, 500])
+async def test_pages_match_unpaginated_expansion(client, as_user, fixture_events, limit):
+    location_id, event_ids = fixture_events
+    expected = expected_occurrences(event_ids)
+    assert len(expected) > 20  # la ventana tiene empates en varios límites de página
+
+    items, pages = await fetch_all(client, location_id, limit)
+
+    assert items == expected
+    assert pages == max(1, -(-len(expected) // limit))
+
+
+@pytest.mark.anyio
+async def test_offset_window_with_recurring_events(client, as_user, fixture_events):
+    # Ventana con zona: antes comparaba fechas con y sin zona en recurrence.expand (500)
+    location_id, event_ids = fixture_events
+    params = {
+        "start_date": "2091-02-28T21:00:00-03:00", "end_date": "2091-03-31T00:00:00Z",
+        "location_id": location_id, "limit": 500,
+    }
+    response = await client.get("/events/by-date-range/", params=params)
+    assert response.status_code == 200, response.text
+    items = [(datetime.fromisoformat(item["start_time"]), item["id"]) for item in response.json()["items"]]
+    assert items == expected_occurrences(event_ids)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+async def test_export_expands_series_like_by_date_range(client, as_user, fixture_events, format):
+    location_id, event_ids = fixture_events
+    params = {
+        "start_date": WINDOW_START.isoformat(), "end_date": "2091-03-31",
+        "location_id": location_id, "format": format,
+    }
+    response = await client.get("/events/export/", params=params)
+    assert response.status_code == 200, response.text
+
+    lines = response.text.splitlines()
+    if format == "csv":
+        header, *lines = lines
+        rows = [dict(zip(header.split(","), line.split(","))) for line in lines]
+    else:
+        rows = [json.loads(line) for line in lines]
+
+    items = [(datetime.fromisoformat(row["start_time"]), row["id"]) for row in rows]
+    assert items == expected_occurrences(event_ids)
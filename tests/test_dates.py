@@ -0,0 +1,48 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.dates import to_naive_utc, utc_now
+from app.schemas import EventCreate, EventUpdate
+
+
+def test_to_naive_utc():
+    aware = datetime(2025, 1, 1, 0, 0, tzinfo=timezone(timedelta(hours=-3)))
+    assert to_naive_utc(aware) == datetime(2025, 1, 1, 3, 0)
+    assert to_naive_utc(datetime(2025, 1, 1, 0, 0, tzinfo=timezone.utc)).tzinfo is None
+    assert to_naive_utc(datetime(2025, 1, 1, 12, 30)) == datetime(2025, 1, 1, 12, 30)
+    assert to_naive_utc(None) is None
+
+
+def test_utc_now_ignores_host_timezone(monkeypatch):
+    monkeypatch.setenv("TZ", "ART3")  # UTC-3, como un servidor en Argentina
+    time.tzset()
+    try:
+        now = utc_now()
+        assert now.tzinfo is None
+        assert abs(now - datetime.now(timezone.utc).replace(tzinfo=None)) < timedelta(seconds=5)
+        assert abs(now - datetime.now() - timedelta(hours=3)) < timedelta(seconds=5)
+    finally:
+        monkeypatch.undo()
+        time.tzset()
+
+
+def test_event_schemas_store_naive_utc():
+    event = EventCreate(title="x", start_time="2025-01-01T20:00:00-03:00", end_time="2025-01-01T23:00:00Z")
+    assert event.start_time == datetime(2025, 1, 1, 23, 0) and event.start_time.tzinfo is None
+    assert event.end_time == datetime(2025, 1, 1, 23, 0)
+    assert EventUpdate(start_time="2025-01-01T00:00:00Z").start_time.tzinfo is None
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("url", [
+    "/events/by-date-range/?start_date=2025-01-01T00:00:00Z&end_date=2025-01-31T00:00:00Z",
+    "/events/by-date-range/?start_date=2025-01-01T00:00:00%2B02:00&end_date=2025-01-02",
+    "/events/search?q=concierto&start_date=2025-01-01T00:00:00Z&end_date=2025-12-31T00:00:00Z",
+    "/events/export/?start_date=2025-01-01T00:00:00Z&end_date=2025-01-31T00:00:00Z",
+])
+async def test_offset_datetime_query_params(client, as_user, url):
+    # Con asyncpg un datetime con zona en una columna sin zona daba 500
+    response = await client.get(url)
+    assert response.status_code == 200, response.text
@@ -0,0 +1,19 @@
+import uuid
+from datetime import datetime
+from types import SimpleNamespace
+
+from app.crud.events import etag_matches, event_etag
+
+
+def test_if_none_match_accepts_weak_tags_and_wildcard():
+    event = SimpleNamespace(id=uuid.uuid4(), created_at=datetime(2091, 1, 1), edited_at=datetime(2091, 1, 2, 3))
+    etag = event_etag(event)
+
+    assert etag_matches(etag, etag)
+    assert etag_matches(f"W/{etag}", etag)
+    assert etag_matches(f'"otro", W/{etag}', etag)
+    assert etag_matches("*", etag)
+
+    assert not etag_matches(None, etag)
+    assert not etag_matches('"otro", W/"otro"', etag)
+    assert not etag_matches(f"W/{event_etag(SimpleNamespace(id=event.id, created_at=event.created_at, edited_at=None))}", etag)
@@ -0,0 +1,84 @@
+import uuid
+
+import pytest
+from sqlalchemy import delete, insert, select
+
+from app.crud.events import validate_event_rows
+from app.database import AsyncSessionLocal
+from app.main import app
+from app.models import Event, User
+from app.routers.auth import get_current_user
+from app.schemas import CurrentUser
+
+
+def _row(**fields):
+    row = {"title": "evento", "start_time": "2091-03-01T18:00:00", "end_time": "2091-03-01T19:00:00"}
+    row.update(fields)
+    return row
+
+
+def test_rows_breaking_events_constraints_are_reported_per_row():
+    valid, errors = validate_event_rows([
+        _row(),
+        _row(status="borrador"),
+        _row(end_time="2091-03-01T17:00:00", status="archived"),
+        _row(status="cancelled"),
+        _row(title=None),
+    ])
+
+    assert [row for row, _ in valid] == [1, 4]
+    assert errors == [
+        {"row": 2, "errors": ["status: must be one of active, cancelled, past"]},
+        {"row": 3, "errors": [
+            "end_time must be after start_time",
+            "status: must be one of active, cancelled, past",
+        ]},
+        {"row": 5, "errors": ["title: Input should be a valid string"]},
+    ]
+
+
+@pytest.fixture
+async def organizer(client):
+    """Organizador real en la BD (events.created_by es FK a users); borra sus eventos al terminar"""
+    user_id = uuid.uuid4()
+    async with AsyncSessionLocal() as db:
+        await db.execute(insert(User).values(
+            id=user_id, username=f"test_{user_id.hex[:12]}",
+            email=f"{user_id.hex[:12]}@test.local", hashed_password="-", role="organizer"
+        ))
+        await db.commit()
+
+    user = CurrentUser(id=user_id, username="test", role="organizer", from_claims=True)
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(get_current_user, None)
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(delete(Event).where(Event.created_by == user_id))
+        await db.execute(delete(User).where(User.id == user_id))
+        await db.commit()
+
+
+@pytest.mark.anyio
+async def test_csv_import_reports_bad_rows_and_keeps_defaults(client, organizer):
+    csv = (
+        "title,location_id,start_time,end_time,status,is_recurring\n"
+        "vacías,,2091-03-01T18:00:00,2091-03-01T19:00:00,,\n"
+        "sin locación,2147483000,2091-03-01T18:00:00,2091-03-01T19:00:00,,\n"
+        "mal status,,2091-03-01T18:00:00,2091-03-01T19:00:00,borrador,\n"
+    )
+    response = await client.post("/events/bulk/csv", files={"file": ("events.csv", csv, "text/csv")})
+
+    assert response.status_code == 201, response.text
+    result = response.json()
+    assert result["created"] == 1
+    assert result["errors"] == [
+        {"row": 2, "errors": ["location_id: unknown 2147483000"]},
+        {"row": 3, "errors": ["status: must be one of active, cancelled, past"]},
+    ]
+
+    async with AsyncSessionLocal() as db:
+        event = (await db.execute(
+            select(Event.status, Event.is_recurring).where(Event.id == uuid.UUID(result["event_ids"][0]))
+        )).one()
+    assert event == ("active", False)
@@ -0,0 +1,49 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from app.crud import favorites as crud_favorites
+
+
+class FakeSession:
+    """Sesión mínima para sync_favorites: la primera consulta son las categorías existentes"""
+
+    def __init__(self, categories, fail_on_write=False):
+        self.categories = categories
+        self.fail_on_write = fail_on_write
+        self.rolled_back = False
+
+    async def execute(self, statement):
+        if statement.is_select:
+            return SimpleNamespace(scalars=lambda: iter(self.categories))
+        if self.fail_on_write:
+            raise IntegrityError(str(statement), {}, Exception("fk violation"))
+        raise AssertionError("no debería escribir")
+
+    async def rollback(self):
+        self.rolled_back = True
+
+
+@pytest.mark.anyio
+async def test_sync_with_unknown_category_changes_nothing():
+    db = FakeSession(categories=[1, 2])
+    with pytest.raises(crud_favorites.UnknownCategories) as error:
+        await crud_favorites.sync_favorites(db, uuid.uuid4(), [2, 9, 1, 7, 9])
+    assert error.value.args[0] == [7, 9]
+
+
+@pytest.mark.anyio
+async def test_sync_integrity_error_is_a_conflict():
+    db = FakeSession(categories=[1, 2], fail_on_write=True)
+    with pytest.raises(crud_favorites.FavoritesConflict):
+        await crud_favorites.sync_favorites(db, uuid.uuid4(), [1, 2])
+    assert db.rolled_back
+
+
+@pytest.mark.anyio
+async def test_sync_endpoint_rejects_unknown_category(client, as_user):
+    response = await client.put("/favorites/", json={"category_ids": [2147483000]})
+    assert response.status_code == 404, response.text
+    assert "2147483000" in response.json()["detail"]
@@ -0,0 +1,206 @@
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.crud import feed as crud_feed
+from app.schemas import EventWithLocation
+
+
+# Feeds chicos para cruzar FEED_SIZE con pocos eventos
+FEED_SIZE = 3
+BASE = datetime(2091, 1, 1, 18)
+
+
+class FakeStore:
+    """Eventos y favoritos en memoria: query_feed, query_events y la consulta de favoritos de _build_feed"""
+
+    def __init__(self):
+        self.events = []  # (EventWithLocation, category_ids)
+        self.favorites = {}  # user_id -> category_ids
+        self.event_queries = 0
+
+    def add(self, day: float, *category_ids: int) -> EventWithLocation:
+        start = BASE + timedelta(days=day)
+        event = EventWithLocation(id=uuid.uuid4(), title=f"día {day}", start_time=start, end_time=start + timedelta(hours=1))
+        self.events.append((event, set(category_ids)))
+        return event
+
+    def db(self, user_id):
+        async def execute(query):
+            return SimpleNamespace(scalars=lambda: set(self.favorites[user_id]))
+        return SimpleNamespace(execute=execute)
+
+    async def query_feed(self, db, category_ids, limit, after=None):
+        category_ids = set(category_ids)
+        events = sorted(
+            (event for event, categories in self.events
+             if categories & category_ids and (after is None or (event.start_time, event.id) > after)),
+            key=lambda event: (event.start_time, event.id)
+        )
+        return events[:limit]
+
+    async def query_events(self, db, event_ids):
+        self.event_queries += 1
+        return [event for event, _ in self.events if event.id in set(event_ids)]
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeStore()
+    monkeypatch.setattr(settings, "FEED_SIZE", FEED_SIZE)
+    monkeypatch.setattr(crud_feed, "query_feed", store.query_feed)
+    monkeypatch.setattr(crud_feed, "query_events", store.query_events)
+    crud_feed._feed_cache.clear()
+    crud_feed._feed_events.clear()
+    yield store
+    crud_feed._feed_cache.clear()
+    crud_feed._feed_events.clear()
+    assert crud_feed._feeds_by_category == {} and crud_feed._feeds_by_event == {}
+
+
+async def rebuilt(store, user_id):
+    """Lo que calcula _build_feed desde cero para las mismas categorías (con otro usuario)"""
+    twin = uuid.uuid4()
+    store.favorites[twin] = store.favorites[user_id]
+    feed = await crud_feed._build_feed(store.db(twin), twin)
+    crud_feed._feed_cache.pop(twin)
+    return feed
+
+
+async def assert_matches_rebuild(store, user_id):
+    feed = crud_feed._feed_cache.get(user_id)
+    expected = await rebuilt(store, user_id)
+    keys = feed.events
+
+    # La lista mantenida es un prefijo exacto del feed recalculado
+    assert keys == expected.events[:len(keys)]
+    if feed.complete:
+        assert expected.complete and len(keys) == len(expected.events)
+
+    # Y las páginas (cache + consultas más allá) son las mismas
+    pages, after = [], None
+    while True:
+        page = await crud_feed.get_feed_page(store.db(user_id), user_id, 2, after)
+        pages.extend((event.start_time, event.id) for event in page[:2])
+        if len(page) <= 2:
+            break
+        after = pages[-1]
+    everything = await store.query_feed(None, store.favorites[user_id], len(store.events))
+    assert pages == [(event.start_time, event.id) for event in everything]
+
+
+def assert_indexes_match(user_ids):
+    """Los índices inversos tienen exactamente los feeds que están en cache"""
+    by_category, by_event = {}, {}
+    for user_id in user_ids:
+        feed = crud_feed._feed_cache.get(user_id)
+        if feed is None:
+            continue
+        for category_id in feed.category_ids:
+            by_category.setdefault(category_id, set()).add(user_id)
+        for _, event_id in feed.events:
+            by_event.setdefault(event_id, set()).add(user_id)
+
+    assert crud_feed._feeds_by_category == by_category
+    assert crud_feed._feeds_by_event == by_event
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("existing", [0, 1, 3, 5])
+async def test_created_events_keep_feed_exact(store, existing):
+    user_id = uuid.uuid4()
+    store.favorites[user_id] = {1}
+    for day in range(existing):
+        store.add(2 * day + 1, 1)
+    await crud_feed._build_feed(store.db(user_id), user_id)
+
+    # Antes de todo, empate con otro, en el medio, al final, lejos y de otra categoría
+    for day, categories in [(0, (1,)), (1, (1,)), (4, (1, 2)), (9, (1,)), (30, (1,)), (2, (2,))]:
+        event = store.add(day, *categories)
+        crud_feed.on_event_created(event, categories)
+        await assert_matches_rebuild(store, user_id)
+        assert_indexes_match([user_id])
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("existing, added", [(0, 2), (1, 1), (2, 1), (5, 1), (1, 5), (5, 5), (4, 0)])
+async def test_favorite_added_merges_up_to_cutoff(store, existing, added):
+    user_id = uuid.uuid4()
+    store.favorites[user_id] = {1}
+    for day in range(existing):
+        store.add(2 * day, 1)
+    for day in range(added):
+        store.add(2 * day + 1, 2)
+    store.add(3, 1, 2)  # en las dos categorías: aparece una sola vez
+    await crud_feed._build_feed(store.db(user_id), user_id)
+
+    store.favorites[user_id] = {1, 2}
+    await crud_feed.on_favorite_added(store.db(user_id), user_id, 2)
+
+    assert crud_feed._feed_cache.get(user_id).category_ids == {1, 2}
+    await assert_matches_rebuild(store, user_id)
+    assert_indexes_match([user_id])
+
+
+@pytest.mark.anyio
+async def test_evicted_feeds_leave_both_indexes(store):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    store.favorites[first] = {1}
+    store.favorites[second] = {1, 2}
+    shared = store.add(1, 1)
+    store.add(2, 2)
+    for user_id in (first, second):
+        await crud_feed._build_feed(store.db(user_id), user_id)
+    assert_indexes_match([first, second])
+
+    # Recalcular reemplaza el feed: el anterior sale de los índices
+    await crud_feed._build_feed(store.db(first), first)
+    assert_indexes_match([first, second])
+
+    crud_feed.on_event_changed(shared.id)
+    assert crud_feed._feed_cache.get(first) is None and crud_feed._feed_cache.get(second) is None
+    assert crud_feed._feeds_by_category == {} and crud_feed._feeds_by_event == {}
+
+    await crud_feed._build_feed(store.db(second), second)
+    crud_feed.on_favorite_removed(second)
+    assert crud_feed._feeds_by_category == {} and crud_feed._feeds_by_event == {}
+
+
+@pytest.mark.anyio
+async def test_feeds_share_event_data(store):
+    first, second = uuid.uuid4(), uuid.uuid4()
+    store.favorites[first] = {1}
+    store.favorites[second] = {1, 2}
+    for day in range(3):
+        store.add(day, 1)
+    for user_id in (first, second):
+        await crud_feed._build_feed(store.db(user_id), user_id)
+
+    # Los feeds solo tienen claves; los eventos son los mismos objetos para los dos
+    pages = [await crud_feed.get_feed_page(store.db(user_id), user_id, 10) for user_id in (first, second)]
+    assert all(a is b for a, b in zip(*pages))
+    assert store.event_queries == 0
+
+    # Si los datos salen de la cache compartida se leen en una consulta
+    crud_feed._feed_events.clear()
+    assert await crud_feed.get_feed_page(store.db(first), first, 10) == pages[0]
+    assert store.event_queries == 1
+
+
+@pytest.mark.anyio
+async def test_event_deleted_elsewhere_rebuilds_feed(store):
+    user_id = uuid.uuid4()
+    store.favorites[user_id] = {1}
+    events = [store.add(day, 1) for day in range(3)]
+    await crud_feed._build_feed(store.db(user_id), user_id)
+
+    # Borrado en otro proceso: este solo se entera al no encontrar sus datos
+    del store.events[1]
+    crud_feed._feed_events.pop(events[1].id)
+
+    page = await crud_feed.get_feed_page(store.db(user_id), user_id, 10)
+    assert [event.id for event in page] == [events[0].id, events[2].id]
+    assert crud_feed._feed_cache.get(user_id) is None
@@ -0,0 +1,81 @@
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.monitoring.budget import assert_query_budget, capture_requests, check_request, fingerprint
+
+
+# ==================== fingerprint ====================
+
+def test_fingerprint_collapses_asyncpg_placeholders_with_casts():
+    statement = (
+        "SELECT event_stats.event_id \nFROM event_stats \n"
+        "WHERE event_stats.event_id IN ($2::UUID, $3::UUID, $4::UUID) "
+        "AND event_stats.total_likes > $1::INTEGER"
+    )
+    assert fingerprint(statement) == (
+        "SELECT event_stats.event_id FROM event_stats "
+        "WHERE event_stats.event_id IN (?) AND event_stats.total_likes > ?"
+    )
+
+
+def test_fingerprint_in_expansion_does_not_depend_on_list_length():
+    one = "SELECT id FROM events WHERE id IN ($1::UUID)"
+    many = "SELECT id FROM events WHERE id IN ($1::UUID, $2::UUID, $3::UUID, $4::UUID)"
+    assert fingerprint(one) == fingerprint(many) == "SELECT id FROM events WHERE id IN (?)"
+
+
+def test_fingerprint_multiword_and_sized_casts():
+    statement = (
+        "SELECT * FROM events WHERE start_time >= $1::TIMESTAMP WITHOUT TIME ZONE "
+        "AND status IN ($2::VARCHAR(10), $3::VARCHAR(10))"
+    )
+    assert fingerprint(statement) == "SELECT * FROM events WHERE start_time >= ? AND status IN (?)"
+
+
+def test_fingerprint_psycopg2_placeholders_and_literals():
+    statement = "SELECT * FROM events WHERE id IN (%(id_1)s, %(id_2)s) AND title = 'it''s' AND price > 3.5 LIMIT 20"
+    assert fingerprint(statement) == "SELECT * FROM events WHERE id IN (?) AND title = ? AND price > ? LIMIT ?"
+
+
+def test_fingerprint_keeps_identifiers_with_digits():
+    assert fingerprint("SELECT anon_1.id FROM anon_1 WHERE anon_1.x = 7") == "SELECT anon_1.id FROM anon_1 WHERE anon_1.x = ?"
+
+
+# ==================== check_request ====================
+
+def test_check_request_flags_repeated_statement(monkeypatch):
+    monkeypatch.setattr(settings, "N_PLUS_ONE_THRESHOLD", 5)
+    statements = {f"SELECT * FROM assist WHERE event_id = ${n}::UUID": 1 for n in range(1, 6)}
+    statements["SELECT 1"] = 1
+
+    with capture_requests() as captured:
+        report = check_request("GET", "/events/feed", 6, statements)
+
+    assert captured == [report]
+    assert report.suspects == [("SELECT * FROM assist WHERE event_id = ?", 5)]
+
+
+def test_check_request_budget(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_BUDGETS", {"GET /events/{event_id}": 2})
+    monkeypatch.setattr(settings, "QUERY_BUDGET_DEFAULT", None)
+
+    assert check_request("GET", "/events/{event_id}", 3, {}).over_budget
+    assert not check_request("GET", "/events/{event_id}", 2, {}).over_budget
+    assert not check_request("GET", "/events/feed", 100, {}).over_budget
+
+
+# ==================== endpoints (BD) ====================
+
+@pytest.mark.anyio
+async def test_event_stats_within_budget(client):
+    # Evento inexistente: lookup de contadores + comprobación de existencia
+    response = await assert_query_budget(client, "GET", f"/assists/{uuid.uuid4()}/stats", max_queries=2)
+    assert response.status_code == 404
+
+
+@pytest.mark.anyio
+async def test_assert_query_budget_fails_over_budget(client):
+    with pytest.raises(AssertionError, match=r"GET /assists/\{event_id\}/stats: 2 consultas \(máximo 1\)"):
+        await assert_query_budget(client, "GET", f"/assists/{uuid.uuid4()}/stats", max_queries=1)